@@ -0,0 +1,93 @@
+"""
+Model registry yönetimi için API endpoints
+"""
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from src.models.registry import discover_versions, get_registry
+from src.api.shadow import get_traffic_splitter
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/models")
+def get_models():
+    """Yüklü / yüklenen / diskte bulunan versiyonlar ve bellek kullanımı"""
+    return get_registry().status()
+
+
+@router.post("/models/refresh")
+def refresh_models(auto_activate: bool = False):
+    """artifacts/ klasörünü tara, startup'tan sonra eklenen veya güncellenen versiyonları arka planda yükle"""
+    started = get_registry().scan(auto_activate=auto_activate)
+    return {"loading": started}
+
+
+@router.post("/models/{version}/load", status_code=202)
+def load_model_version(version: str, activate: bool = False):
+    """Versiyonu arka planda yükle (request path bloklanmaz)"""
+    registry = get_registry()
+    path = discover_versions(registry.artifacts_dir).get(version)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Model artifact for version {version} not found.")
+
+    registry.load_async(version, path, activate=activate)
+    return {"version": version, "status": "loading", "activate": activate}
+
+
+@router.post("/models/{version}/activate")
+def activate_model_version(version: str):
+    """Yüklü bir versiyonu aktif yap (atomik referans değişimi)"""
+    try:
+        lm = get_registry().activate(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not loaded.")
+    return {"active_version": lm.version}
+
+
+@router.delete("/models/{version}")
+def unload_model_version(version: str):
+    """Aktif olmayan bir versiyonu bellekten çıkar"""
+    registry = get_registry()
+    if registry.get(version) is None:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not loaded.")
+    try:
+        registry.unload(version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"unloaded": version, "loaded": registry.versions()}
+
+
+class TrafficConfig(BaseModel):
+    # None -> mevcut ayar korunur
+    shadow_versions: Optional[List[str]] = None
+    canary_weights: Optional[Dict[str, float]] = None
+
+
+@router.get("/traffic")
+def get_traffic():
+    """Shadow / canary ayarları"""
+    return get_traffic_splitter().status()
+
+
+@router.put("/traffic")
+def set_traffic(cfg: TrafficConfig):
+    """Shadow / canary ayarlarını değiştir; yüklü olmayan versiyonlar arka planda yüklenir"""
+    weights = cfg.canary_weights
+    if weights is not None and (any(w < 0 for w in weights.values()) or sum(weights.values()) > 1.0):
+        raise HTTPException(status_code=422, detail="Canary weights must be >= 0 and sum to at most 1.")
+
+    registry = get_registry()
+    available = discover_versions(registry.artifacts_dir)
+    requested = set(cfg.shadow_versions or []) | set(weights or {})
+    missing = sorted(v for v in requested if v not in available and registry.get(v) is None)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Model artifacts not found for versions: {missing}")
+
+    splitter = get_traffic_splitter()
+    splitter.configure(shadow_versions=cfg.shadow_versions, canary_weights=weights)
+    for v in splitter.required_versions():
+        if registry.get(v) is None:
+            registry.load_async(v, available[v])
+    return splitter.status()
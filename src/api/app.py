@@ -1,14 +1,45 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+import json
+import math
 import os
+import threading
+import time
 import logging
-import joblib
-import pandas as pd
+# numpy bilinçli olarak eager: engine, monitoring ve drift onu modül seviyesinde
+# kullanır ve registry import'u zaten yükler; burada lazy yapmak cold start'tan
+# bir şey kazandırmaz
 import numpy as np
 
-from src.data.preprocess import preprocess
+# pandas sadece batch endpoint'lerinde gerekir; import'u /health'in ilk
+# cevabını geciktirmesin diye ilk kullanımda (veya warm-up'ta) yapılır
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.api import monitoring
+from src.api.monitoring import (
+    get_shadow_stats,
+    log_prediction,
+    log_predictions_batch,
+    shutdown_monitoring,
+    update_probability_stats,
+    update_probability_stats_batch,
+)
+from src.models.registry import DEFAULT_VERSION, LoadedModel, discover_versions, get_registry, version_of
+from src.api.drift import set_drift_monitor
+from src.api.shadow import get_traffic_splitter
+from src.api.prediction_cache import get_prediction_cache, row_digest
+from src.api.batching import MICROBATCH_ENABLED, get_micro_batcher
+from src.api.metrics import MetricsMiddleware, get_metrics, observe_stage, render_metrics
+from src.inference.engine import set_stage_observer
+from src.data.feature_store import get_feature_store
+from src.api.feature_capture import get_feature_capture, shutdown_feature_capture
 
 
 # -------------------------
@@ -69,6 +100,10 @@ else:
         allow_headers=["*"],
     )
 
+# Route bazlı request sayaçları / latency histogramları (/metrics)
+app.add_middleware(MetricsMiddleware)
+set_stage_observer(observe_stage)
+
 
 # -------------------------
 # Model + UI Meta Globals
@@ -76,180 +111,613 @@ else:
 MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/churn_model.joblib")
 DATA_PATH = os.getenv("DATA_PATH", "data/raw/telco.csv")
 
-model = None
+# Batch scoring limitleri
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "2000"))
 
-EXPECTED_COLS = []
-DEFAULTS = {}
-CATEGORICAL_OPTIONS = {}
-_X_CACHE = None
+# Registry ayarları
+# PRELOAD_VERSIONS: "all" veya "1,2" -> startup'ta arka planda yüklenecek ek versiyonlar
+PRELOAD_VERSIONS = os.getenv("PRELOAD_VERSIONS", "")
+# MODEL_WATCH_INTERVAL > 0 ise artifacts/ bu aralıkla taranır, yeni versiyonlar yüklenir
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+MODEL_AUTO_ACTIVATE = os.getenv("MODEL_AUTO_ACTIVATE", "false").lower() == "true"
+# true ise startup model yüklenip ısınana kadar bekler (eski davranış); varsayılan
+# olarak warm-up arka planda yapılır, /health hemen, /ready model hazır olunca 200 döner
+MODEL_WARMUP_BLOCKING = os.getenv("MODEL_WARMUP_BLOCKING", "false").lower() == "true"
 
+registry = get_registry()
+# Drift endpoint'i aktif modelin profilini kullanır
+registry.on_change(lambda r: set_drift_monitor(r.active.drift if r.active is not None else None))
 
-def _build_expected_cols_from_pipeline(m):
-    pre = m.named_steps["preprocess"]  # ColumnTransformer
-    cols = []
-    for _, _, col_list in pre.transformers_:
-        if isinstance(col_list, list):
-            cols.extend(col_list)
+# Shadow / canary (SHADOW_VERSIONS, CANARY_WEIGHTS)
+splitter = get_traffic_splitter()
 
-    seen = set()
-    out = []
-    for c in cols:
-        if c not in seen:
-            seen.add(c)
-            out.append(c)
-    return out
+# Prediction cache; model değişince ilgili versiyonun kayıtları silinir
+prediction_cache = get_prediction_cache()
+registry.on_change(prediction_cache.on_registry_change)
 
+# Eşzamanlı /predict çağrıları tek vektörize skorlamada birleştirilir
+micro_batcher = get_micro_batcher()
 
-def _compute_defaults_and_options(m):
-    """
-    Model + dataset varsa UI için meta üretir.
-    Model/dataset yoksa boş döner (CI'da import kırılmasın).
-    """
-    global EXPECTED_COLS, DEFAULTS, CATEGORICAL_OPTIONS, _X_CACHE
 
-    if m is None:
-        logger.warning("Meta build skipped: model is not loaded.")
-        return
+def preload_models(background: bool = True):
+    """
+    MODEL_PATH'i (aktif) ve PRELOAD_VERSIONS + shadow/canary adaylarını yükler.
+    Zaten yüklü olan versiyonlar atlanır; serve.py bunu fork'tan önce
+    background=False ile çağırır, worker'lar modeli parent'tan devralır.
 
-    if not os.path.exists(DATA_PATH):
-        logger.warning(f"Meta build skipped: dataset not found at {DATA_PATH}")
-        return
+    CI'da import test sırasında artifact olmayabilir.
+    Bu yüzden burada 'varsa yükle', yoksa servis ayakta kalsın.
+    """
+    registry.data_path = DATA_PATH
 
-    df = pd.read_csv(DATA_PATH)
-    X, _, cat_cols, num_cols = preprocess(df)
+    version = version_of(MODEL_PATH) or DEFAULT_VERSION
+    if registry.get(version) is None:
+        if os.path.exists(MODEL_PATH):
+            try:
+                registry.load(version, MODEL_PATH, activate=True)
+            except Exception as e:
+                logger.warning(f"Model load failed (non-blocking): {e}")
+        else:
+            logger.warning(f"Model not found at: {MODEL_PATH}")
+
+    # Ek versiyonlar (preload + shadow/canary adayları); startup'ta request
+    # path'i bekletmeden arka planda yüklenir
+    available = discover_versions(registry.artifacts_dir)
+    wanted = splitter.required_versions()
+    if PRELOAD_VERSIONS:
+        wanted += list(available) if PRELOAD_VERSIONS == "all" else [v.strip() for v in PRELOAD_VERSIONS.split(",")]
+    for v in wanted:
+        if v in available and registry.get(v) is None:
+            if background:
+                registry.load_async(v, available[v])
+            else:
+                try:
+                    registry.load(v, available[v])
+                except Exception as e:
+                    logger.warning(f"Model v{v} load failed (non-blocking): {e}")
+
+
+# Readiness durumu (warm-up bitince set edilir) ve aşama süreleri (sn)
+_ready = threading.Event()
+_warmup_error: Optional[str] = None
+STARTUP_PHASES: Dict[str, float] = {}
+
+
+def warm_up():
+    """
+    Aktif modeli yükler ve ilk request'in ödeyeceği tek seferlik maliyetleri
+    (lazy import'lar, şema doğrulayıcı, scorer) önceden öder. Hata olsa da
+    sonunda readiness set edilir; model yoksa /ready 503 vermeye devam eder.
+    """
+    global _warmup_error
+    t0 = time.perf_counter()
+    try:
+        preload_models(background=True)
+        STARTUP_PHASES["preload_models"] = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        lm = registry.active
+        if lm is not None:
+            features = dict(lm.sample_rows[0]) if lm.sample_rows else dict(lm.defaults)
+            payload = lm.schema.validate_json(json.dumps({"features": features}))
+            row = lm.schema.build_row(payload)
+            lm.engine.predict_row(row)
+            lm.engine.predict_columns({c: [row[c]] * 2 for c in lm.expected_cols}, 2)
+        STARTUP_PHASES["warmup_predict"] = time.perf_counter() - t1
+
+        # Batch yolu: pandas import'u ve DataFrame tabanlı satır üretimi
+        t1 = time.perf_counter()
+        if lm is not None:
+            X, _ = _assemble_batch(lm, {c: [features.get(c)] for c in lm.expected_cols}, 1)
+            lm.engine.predict_frame(X)
+        STARTUP_PHASES["warmup_batch"] = time.perf_counter() - t1
+    except Exception as e:
+        _warmup_error = str(e)
+        logger.warning(f"Warm-up failed (non-blocking): {e}")
+    finally:
+        STARTUP_PHASES["warmup_total"] = time.perf_counter() - t0
+        _ready.set()
+        logger.info(f"Warm-up finished in {STARTUP_PHASES['warmup_total']:.2f}s (active: {registry.active_version})")
 
-    EXPECTED_COLS = _build_expected_cols_from_pipeline(m)
 
-    # defaults: numeric -> median, categorical -> mode
-    DEFAULTS = {}
-    CATEGORICAL_OPTIONS = {}
+@app.on_event("startup")
+def startup():
+    get_metrics().start()
+    if MODEL_WARMUP_BLOCKING:
+        warm_up()
+    else:
+        threading.Thread(target=warm_up, name="model-warmup", daemon=True).start()
 
-    for c in num_cols:
-        DEFAULTS[c] = float(pd.to_numeric(X[c], errors="coerce").median())
+    # Startup'ta diskte olan versiyonlar watcher / refresh için "yeni" değil
+    registry.mark_seen()
+    if MODEL_WATCH_INTERVAL > 0:
+        registry.start_watcher(MODEL_WATCH_INTERVAL, auto_activate=MODEL_AUTO_ACTIVATE)
 
-    for c in cat_cols:
-        mode_val = X[c].mode(dropna=True)
-        DEFAULTS[c] = str(mode_val.iloc[0]) if len(mode_val) else "Unknown"
-        vals = sorted([str(v) for v in X[c].dropna().unique().tolist()])
-        CATEGORICAL_OPTIONS[c] = vals[:50]
 
-    _X_CACHE = X
-    logger.info("Meta built successfully.")
+@app.on_event("shutdown")
+def shutdown():
+    """Buffer'daki monitoring kayıtlarını diske yaz"""
+    splitter.close()
+    micro_batcher.close()
+    registry.stop()
+    shutdown_monitoring()
+    shutdown_feature_capture()
+    get_metrics().close()
 
 
-@app.on_event("startup")
-def startup():
+class PredictRequest(BaseModel):
     """
-    CI'da import test sırasında artifact olmayabilir.
-    Bu yüzden burada 'varsa yükle', yoksa servis ayakta kalsın.
+    /predict gövdesi (dokümantasyon için). Gerçek doğrulama modelin
+    pipeline'ından üretilen şemayla yapılır (src/api/schema.py, GET /schema).
     """
-    global model
-    if os.path.exists(MODEL_PATH):
-        model = joblib.load(MODEL_PATH)
-        logger.info(f"Model loaded from: {MODEL_PATH}")
-    else:
-        model = None
-        logger.warning(f"Model not found at: {MODEL_PATH}")
+    # İki format desteklenir (biri zorunlu):
+    #   features: {"Age": 29, ...}
+    #   values:   [29, "Male", ...]  (/meta expected_cols sırasında)
+    features: Optional[dict] = None
+    values: Optional[List[Any]] = None
+    # Belirtilmezse aktif model kullanılır
+    model_version: Optional[str] = None
 
-    # model + dataset varsa meta üret
-    try:
-        _compute_defaults_and_options(model)
-    except Exception as e:
-        logger.warning(f"Meta build failed (non-blocking): {e}")
 
+class PredictByIdRequest(BaseModel):
+    customer_id: str
+    model_version: Optional[str] = None
 
-class PredictRequest(BaseModel):
-    features: dict
 
+class BatchPredictByIdRequest(BaseModel):
+    customer_ids: List[str]
+    model_version: Optional[str] = None
 
-@app.get("/health")
-def health():
-    return {
-        "status": "ok",
-        "env": ENV,
-        "model_loaded": model is not None,
-        "meta_ready": bool(EXPECTED_COLS),
-    }
 
+class BatchPredictRequest(BaseModel):
+    # İki format desteklenir:
+    #   rows:    [{"Age": 29, ...}, {...}]
+    #   columns: {"Age": [29, 41, ...], ...}
+    rows: Optional[List[Any]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+    model_version: Optional[str] = None
 
-@app.post("/predict")
-def predict(req: PredictRequest):
-    if model is None:
+
+def _resolve_model(version: Optional[str] = None) -> LoadedModel:
+    """
+    Request başında modeli bir kez çözer; request boyunca aynı referans
+    kullanılır (aktif versiyon arada değişse bile).
+    """
+    lm = registry.get(version)
+    if lm is None:
+        if version is not None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Model version {version} not loaded. Loaded: {registry.versions()}",
+            )
+        if not _ready.is_set():
+            raise HTTPException(status_code=503, detail="Model is warming up.", headers={"Retry-After": "1"})
         raise HTTPException(
             status_code=503,
             detail=f"Model artifact not loaded. Expected at {MODEL_PATH}. Train/build artifacts first.",
         )
+    return lm
 
-    incoming = req.features or {}
 
-    # Eğer meta hazır değilse minimum güvenli fallback:
-    # (Normalde meta startup'ta doluyor)
-    if not EXPECTED_COLS:
-        raise HTTPException(
-            status_code=503,
-            detail="Meta not ready (EXPECTED_COLS empty). Ensure dataset exists and restart API.",
-        )
+@app.get("/health")
+def health():
+    """Liveness: process ayakta mı? (model yüklenmesini beklemez)"""
+    active = registry.active
+    return {
+        "status": "ok",
+        "env": ENV,
+        "ready": _ready.is_set() and active is not None,
+        "model_loaded": active is not None,
+        "meta_ready": active is not None and bool(active.expected_cols),
+        "active_version": registry.active_version,
+    }
 
-    row = {}
-    for col in EXPECTED_COLS:
-        val = incoming.get(col, None)
-        if val is None or (isinstance(val, str) and val.strip() == ""):
-            val = DEFAULTS.get(col)
 
-        # sayısal default varsa float'a çevir
-        if col in DEFAULTS and isinstance(DEFAULTS[col], float):
-            try:
-                val = float(val)
-            except Exception:
-                val = DEFAULTS[col]
+@app.get("/ready")
+def ready():
+    """Readiness: aktif model yüklenip ısındıysa 200, aksi halde 503"""
+    active = registry.active
+    if not _ready.is_set():
+        status = "warming_up"
+    elif active is None:
+        status = "no_model"
+    else:
+        status = "ready"
+    body = {
+        "status": status,
+        "active_version": registry.active_version,
+        "loaded_versions": registry.versions(),
+        "startup_phases": STARTUP_PHASES,
+        "warmup_error": _warmup_error,
+    }
+    return body if status == "ready" else JSONResponse(status_code=503, content=body)
 
-        row[col] = val
 
-    X = pd.DataFrame([row], columns=EXPECTED_COLS)
+def _validation_errors(e: ValidationError) -> List[Dict[str, Any]]:
+    """
+    422 detayı; NaN/Infinity literal'leri JSON'a yazılamadığı için
+    (aksi halde 422 yerine 500 döner) input'ta string'e çevrilir
+    """
+    errors = e.errors(include_url=False)
+    for err in errors:
+        v = err.get("input")
+        if isinstance(v, float) and not math.isfinite(v):
+            err["input"] = str(v)
+    return errors
 
-    pred_label = model.predict(X)[0]
-    pred_proba_yes = float(model.predict_proba(X)[:, 1][0])
 
-    response_data = {"pred_label": pred_label, "pred_proba_yes": pred_proba_yes}
+def _parse_predict_body(body: bytes, lm: LoadedModel) -> Dict[str, Any]:
+    try:
+        payload = lm.schema.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(_validation_errors(e))
+    if ("features" in payload) == ("values" in payload):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'features' or 'values'.")
+    return payload
+
+
+@app.post(
+    "/predict",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": PredictRequest.model_json_schema()}},
+        }
+    },
+)
+async def predict(request: Request):
+    body = await request.body()
+
+    # Gövde, skorlayacak modelin şemasıyla tek geçişte (pydantic-core) doğrulanır.
+    # Farklı bir model_version istenmişse o modelin şemasıyla tekrar doğrulanır.
+    t0 = time.perf_counter()
+    lm = _resolve_model(splitter.choose_version(None))
+    payload = _parse_predict_body(body, lm)
+    requested = payload.get("model_version")
+    if requested is not None and requested != lm.version:
+        lm = _resolve_model(requested)
+        payload = _parse_predict_body(body, lm)
+
+    row = lm.schema.build_row(payload)
+    incoming = payload["features"] if "features" in payload else row
+    return await _score_row(lm, row, incoming, t0)
+
+
+async def _score_row(lm: LoadedModel, row: Dict[str, Any], incoming: Dict[str, Any], t0: float,
+                     customer_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Tek satırın ortak skorlama yolu: cache -> micro-batch -> shadow -> monitoring
+
+    Args:
+        t0: input_assembly aşamasının başlangıcı
+        customer_id: by-id çağrılarında feature capture'a yazılır
+    """
+    cached = None
+    if prediction_cache.enabled:
+        digest = row_digest(row, lm.expected_cols)
+        cached = prediction_cache.get(lm, digest)
+    observe_stage("input_assembly", time.perf_counter() - t0)
+
+    if cached is not None:
+        pred_label, pred_proba_yes = cached
+        elapsed = None
+    else:
+        if MICROBATCH_ENABLED:
+            pred_label, pred_proba_yes, elapsed = await micro_batcher.score(lm, row)
+        else:
+            t0 = time.perf_counter()
+            pred_label, pred_proba_yes = await run_in_threadpool(lm.engine.predict_row, row)
+            elapsed = time.perf_counter() - t0
+        if prediction_cache.enabled:
+            prediction_cache.put(lm, digest, pred_label, pred_proba_yes)
+
+    response_data = {
+        "pred_label": pred_label,
+        "pred_proba_yes": pred_proba_yes,
+        "model_version": lm.version,
+    }
+
+    # Shadow skorlama arka planda; response'u bekletmez
+    try:
+        splitter.submit(incoming, lm.version, pred_label, pred_proba_yes)
+    except Exception as e:
+        logger.warning(f"Shadow submit error (ignored): {e}")
 
     # Monitoring: hata olursa ana akış bozulmasın
+    t0 = time.perf_counter()
     try:
-        from src.api.monitoring import log_prediction, update_probability_stats
+        if elapsed is not None:
+            get_shadow_stats().record_latency(lm.version, elapsed)
         log_prediction({"features": incoming}, response_data)
         update_probability_stats(pred_proba_yes)
+        if lm.drift is not None:
+            lm.drift.observe(row, pred_proba_yes)
+        capture = get_feature_capture(monitoring.WORKER_ID)
+        if capture is not None:
+            capture.submit_row(lm, row, pred_label, pred_proba_yes, customer_id)
     except Exception as e:
         logger.warning(f"Monitoring error (ignored): {e}")
+    observe_stage("monitoring", time.perf_counter() - t0)
 
     return response_data
 
 
+def _blank_mask(s: "pd.Series") -> "pd.Series":
+    """None/NaN veya boş string olan hücreler"""
+    import pandas as pd
+
+    mask = s.isna()
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "mixed", "mixed-integer"):
+        mask |= s.str.strip().eq("").fillna(False).astype(bool)
+    return mask
+
+
+def _assemble_batch(lm: LoadedModel, raw_cols: Dict[str, List[Any]], n_rows: int):
+    """
+    Kolon bazlı (vektörize) satır üretimi.
+    Eksik/boş hücreler modelin default değerleri ile doldurulur, sayısal kolonlar tek seferde
+    coerce edilir. Çevrilemeyen veya sonsuz sayısal hücreler satır hatası olarak döner.
+
+    Returns:
+        X: pd.DataFrame (n_rows x expected_cols)
+        errors: {row_index: [mesaj, ...]}
+    """
+    import pandas as pd
+
+    errors: Dict[int, List[str]] = {}
+    data = {}
+
+    for col in lm.expected_cols:
+        values = raw_cols.get(col)
+        if values is None:
+            values = [None] * n_rows
+        s = pd.Series(values, dtype=object)
+        blank = _blank_mask(s)
+        default = lm.defaults.get(col)
+
+        if isinstance(default, float):
+            num = pd.to_numeric(s.where(~blank), errors="coerce")
+            # "inf" / Infinity da sayıya çevrilir; /predict şemasıyla aynı şekilde reddedilir
+            bad = (num.isna() | np.isinf(num)) & ~blank
+            for i in np.flatnonzero(bad.to_numpy()):
+                if np.isinf(num.iat[i]):
+                    msg = f"{col}: {values[i]!r} is not a finite number"
+                else:
+                    msg = f"{col}: cannot convert {values[i]!r} to number"
+                errors.setdefault(int(i), []).append(msg)
+            data[col] = num.fillna(default).astype(float)
+        else:
+            data[col] = s.where(~blank, default)
+
+    X = pd.DataFrame(data, columns=lm.expected_cols)
+    return X, errors
+
+
+@app.post("/predict/batch")
+def predict_batch(req: BatchPredictRequest):
+    lm = _resolve_model(req.model_version)
+    if (req.rows is None) == (req.columns is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'rows' or 'columns'.")
+
+    errors: Dict[int, List[str]] = {}
+    t0 = time.perf_counter()
+
+    if req.rows is not None:
+        n_rows = len(req.rows)
+        records = []
+        for i, r in enumerate(req.rows):
+            if isinstance(r, dict):
+                records.append(r)
+            else:
+                records.append({})
+                errors[i] = [f"row must be an object, got {type(r).__name__}"]
+        raw_cols = {col: [r.get(col) for r in records] for col in lm.expected_cols}
+    else:
+        lengths = {len(v) for v in req.columns.values()}
+        if len(lengths) > 1:
+            raise HTTPException(status_code=422, detail="All columns must have the same length.")
+        n_rows = lengths.pop() if lengths else 0
+        raw_cols = req.columns
+
+    if n_rows > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {n_rows} rows (max {MAX_BATCH_SIZE}).",
+        )
+
+    X, coerce_errors = _assemble_batch(lm, raw_cols, n_rows)
+    for i, msgs in coerce_errors.items():
+        errors.setdefault(i, []).extend(msgs)
+    observe_stage("input_assembly", time.perf_counter() - t0)
+
+    valid_idx = np.array([i for i in range(n_rows) if i not in errors], dtype=int)
+    labels = np.empty(n_rows, dtype=object)
+    probas = np.full(n_rows, np.nan)
+
+    # engine chunk başına tek sefer çalışır
+    for start in range(0, len(valid_idx), BATCH_CHUNK_SIZE):
+        idx = valid_idx[start:start + BATCH_CHUNK_SIZE]
+        labels[idx], probas[idx] = lm.engine.predict_frame(X.iloc[idx])
+
+    results = []
+    for i in range(n_rows):
+        if i in errors:
+            results.append({"index": i, "error": errors[i]})
+        else:
+            results.append({
+                "index": i,
+                "pred_label": labels[i],
+                "pred_proba_yes": float(probas[i]),
+            })
+
+    logger.info(f"Batch scored: {len(valid_idx)}/{n_rows} rows ({len(errors)} failed)")
+
+    t0 = time.perf_counter()
+    try:
+        update_probability_stats_batch(probas[valid_idx])
+        log_predictions_batch(labels[valid_idx], probas[valid_idx], lm.version, len(lm.expected_cols))
+        scored = X.iloc[valid_idx]
+        scored_cols = {c: scored[c].to_numpy() for c in scored.columns}
+        if lm.drift is not None:
+            lm.drift.observe_columns(scored_cols, probas[valid_idx], len(valid_idx))
+        capture = get_feature_capture(monitoring.WORKER_ID)
+        if capture is not None:
+            capture.submit_columns(lm, scored_cols, labels[valid_idx], probas[valid_idx], len(valid_idx))
+    except Exception as e:
+        logger.warning(f"Monitoring error (ignored): {e}")
+    observe_stage("monitoring", time.perf_counter() - t0)
+
+    return {
+        "model_version": lm.version,
+        "count": n_rows,
+        "scored": int(len(valid_idx)),
+        "failed": len(errors),
+        "results": results,
+    }
+
+
+def _require_feature_store():
+    store = get_feature_store()
+    if store is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Feature store not available. Ingest data with: python -m src.data.feature_store <csv>",
+        )
+    return store
+
+
+def _store_columns(lm: LoadedModel, data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    """
+    Feature store'dan gelen kolonları modelin beklediği hale getirir
+    (batch CLI'daki predict.fill_missing ile aynı kural): NULL sayısal
+    değerler default ile doldurulur, NULL kategorikler NaN kalır; encoder
+    onları eğitimde ayrı bir kategori olarak öğrenir (ör. Offer boş = "yok").
+    """
+    cat = set(lm.engine.categorical_cols)
+    columns = {}
+    for c in lm.expected_cols:
+        fill = np.nan if c in cat else lm.defaults.get(c)
+        columns[c] = [fill if v is None else v for v in data[c]]
+    return columns
+
+
+@app.post("/predict/by-id")
+async def predict_by_id(req: PredictByIdRequest):
+    """Feature'lar istemciden değil, Customer ID ile feature store'dan alınır"""
+    t0 = time.perf_counter()
+    store = _require_feature_store()
+    lm = _resolve_model(splitter.choose_version(req.model_version))
+
+    # PRIMARY KEY lookup (B-tree, birkaç sayfa); event loop'u bloklamayacak kadar kısa
+    found, data, _ = store.lookup_columns([req.customer_id], lm.expected_cols)
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Customer {req.customer_id} not found in feature store.")
+
+    row = {c: v[0] for c, v in _store_columns(lm, data).items()}
+    response = await _score_row(lm, row, row, t0, customer_id=req.customer_id)
+    return {"customer_id": req.customer_id, **response}
+
+
+@app.post("/predict/by-id/batch")
+def predict_by_id_batch(req: BatchPredictByIdRequest):
+    """ID listesi tek sorguda (chunk'lı IN) okunur ve tek vektörize geçişte skorlanır"""
+    store = _require_feature_store()
+    lm = _resolve_model(req.model_version)
+    n_rows = len(req.customer_ids)
+    if n_rows > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {n_rows} rows (max {MAX_BATCH_SIZE}).",
+        )
+
+    t0 = time.perf_counter()
+    found, data, missing = store.lookup_columns(req.customer_ids, lm.expected_cols)
+    columns = _store_columns(lm, data)
+    observe_stage("input_assembly", time.perf_counter() - t0)
+
+    labels = np.empty(len(found), dtype=object)
+    probas = np.empty(len(found))
+    for start in range(0, len(found), BATCH_CHUNK_SIZE):
+        stop = min(start + BATCH_CHUNK_SIZE, len(found))
+        chunk = {c: v[start:stop] for c, v in columns.items()}
+        labels[start:stop], probas[start:stop] = lm.engine.predict_columns(chunk, stop - start)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * n_rows
+    for j, i in enumerate(found):
+        results[i] = {
+            "index": i,
+            "customer_id": req.customer_ids[i],
+            "pred_label": labels[j],
+            "pred_proba_yes": float(probas[j]),
+        }
+    for i in missing:
+        results[i] = {"index": i, "customer_id": req.customer_ids[i], "error": ["customer not found"]}
+
+    logger.info(f"Batch by-id scored: {len(found)}/{n_rows} rows ({len(missing)} not found)")
+
+    t0 = time.perf_counter()
+    try:
+        update_probability_stats_batch(probas)
+        log_predictions_batch(labels, probas, lm.version, len(lm.expected_cols))
+        if lm.drift is not None and found:
+            lm.drift.observe_columns({c: np.asarray(v, dtype=object) for c, v in columns.items()}, probas, len(found))
+        capture = get_feature_capture(monitoring.WORKER_ID)
+        if capture is not None and found:
+            capture.submit_columns(lm, columns, labels, probas, len(found),
+                                   customer_ids=[req.customer_ids[i] for i in found])
+    except Exception as e:
+        logger.warning(f"Monitoring error (ignored): {e}")
+    observe_stage("monitoring", time.perf_counter() - t0)
+
+    return {
+        "model_version": lm.version,
+        "count": n_rows,
+        "scored": len(found),
+        "failed": len(missing),
+        "results": results,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text formatı (tüm worker'lar birleştirilmiş)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/schema")
+def schema(model_version: Optional[str] = None):
+    """Modelin /predict gövdesi için JSON Schema'sı (kategoriler enum olarak)"""
+    lm = _resolve_model(model_version)
+    return lm.schema.json_schema()
+
+
 @app.get("/meta")
-def meta():
+def meta(model_version: Optional[str] = None):
+    lm = registry.get(model_version)
+    if lm is None:
+        return {"expected_cols": [], "defaults": {}, "categorical_options": {}}
     return {
-        "expected_cols": EXPECTED_COLS,
-        "defaults": DEFAULTS,
-        "categorical_options": CATEGORICAL_OPTIONS,
+        "model_version": lm.version,
+        "expected_cols": lm.expected_cols,
+        "defaults": lm.defaults,
+        "categorical_options": lm.categorical_options,
     }
 
 
 @app.get("/sample")
-def sample():
-    if _X_CACHE is None or not EXPECTED_COLS:
+def sample(model_version: Optional[str] = None):
+    lm = registry.get(model_version)
+    if lm is None or not lm.sample_rows:
         raise HTTPException(status_code=503, detail="Sample not ready. Meta not built yet.")
-    row = _X_CACHE.sample(1, random_state=42).iloc[0].to_dict()
-
-    clean = {}
-    for k, v in row.items():
-        if pd.isna(v):
-            clean[k] = DEFAULTS.get(k)
-        elif isinstance(v, (np.integer, np.floating)):
-            clean[k] = float(v)
-        else:
-            clean[k] = v
 
-    return {"features": clean}
+    return {"features": dict(lm.sample_rows[0])}
 
 
 # Monitoring endpoints
 from src.api.monitoring_endpoints import router as monitoring_router
 app.include_router(monitoring_router)
+
+# Model registry admin endpoints
+from src.api.admin_endpoints import router as admin_router
+app.include_router(admin_router)
@@ -0,0 +1,172 @@
+"""
+/predict için micro-batching
+
+Eşzamanlı tek satırlık request'ler bir asyncio kuyruğunda toplanır; toplayıcı
+task kuyruktakileri (en fazla MICROBATCH_MAX_SIZE satır) alır, tek bir
+vektörize engine çağrısıyla skorlar ve sonuçları bekleyen request'lere dağıtır.
+
+Adaptif: yük yokken (son batch'ler tek satırlık) hiç beklenmez; eşzamanlılık
+görülünce ilk satırdan sonra en fazla MICROBATCH_MAX_WAIT_MS kadar ek satır
+beklenir. Skorlama ayrı bir thread'de yapıldığı için o sırada gelen
+request'ler bir sonraki batch'te birikir.
+
+Ayarlar:
+    MICROBATCH_ENABLED=true
+    MICROBATCH_MAX_SIZE=64
+    MICROBATCH_MAX_WAIT_MS=2
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "true").lower() == "true"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Son batch boyutlarının üstel ortalaması bu değeri geçince bekleme devreye girer
+_CONCURRENCY_THRESHOLD = 1.5
+_EWMA_ALPHA = 0.2
+
+
+def _score_rows(lm, rows: List[Dict[str, Any]]):
+    columns = {c: [r[c] for r in rows] for c in lm.expected_cols}
+    return lm.engine.predict_columns(columns, len(rows))
+
+
+class MicroBatcher:
+    """
+    Args:
+        max_size: Batch başına en fazla satır
+        max_wait_ms: Eşzamanlılık varken ek satır için en fazla bekleme
+    """
+
+    def __init__(self, max_size: int = MICROBATCH_MAX_SIZE, max_wait_ms: float = MICROBATCH_MAX_WAIT_MS):
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+        self._ewma = 1.0
+
+        # Batch boyutu histogramı: 1, 2, 3-4, 5-8, ... (2'nin kuvvetleri)
+        self.size_buckets: List[int] = []
+        self.batches = 0
+        self.rows = 0
+        self.waited_batches = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def score(self, lm, row: Dict[str, Any]) -> Tuple[Any, float, float]:
+        """
+        Returns:
+            label, proba_yes, batch skorlama süresi (sn)
+        """
+        self._ensure_started()
+        fut = self._loop.create_future()
+        self._queue.put_nowait((lm, row, fut))
+        return await fut
+
+    async def _collect(self) -> List[tuple]:
+        q = self._queue
+        batch = [await q.get()]
+        while len(batch) < self.max_size and not q.empty():
+            batch.append(q.get_nowait())
+
+        if len(batch) < self.max_size and self.max_wait > 0 and self._ewma > _CONCURRENCY_THRESHOLD:
+            self.waited_batches += 1
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(q.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            self._record(len(batch))
+            await self._flush(batch)
+
+    def _record(self, size: int):
+        self._ewma = (1 - _EWMA_ALPHA) * self._ewma + _EWMA_ALPHA * size
+        self.batches += 1
+        self.rows += size
+        bucket = (size - 1).bit_length()
+        if bucket >= len(self.size_buckets):
+            self.size_buckets.extend([0] * (bucket + 1 - len(self.size_buckets)))
+        self.size_buckets[bucket] += 1
+
+    async def _flush(self, batch: List[tuple]):
+        # Aynı istekte farklı versiyonlar olabilir (canary / model_version)
+        groups: Dict[int, Tuple[Any, List[tuple]]] = {}
+        for lm, row, fut in batch:
+            groups.setdefault(id(lm), (lm, []))[1].append((row, fut))
+
+        for lm, items in groups.values():
+            rows = [row for row, _ in items]
+            t0 = time.perf_counter()
+            try:
+                labels, probas = await self._loop.run_in_executor(self._executor, _score_rows, lm, rows)
+            except Exception as e:
+                self.errors += 1
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - t0
+            for i, (_, fut) in enumerate(items):
+                # İstemci bağlantıyı kestiyse future iptal edilmiş olabilir
+                if not fut.done():
+                    fut.set_result((labels[i], float(probas[i]), elapsed))
+
+    def stats(self) -> Dict[str, Any]:
+        histogram = {}
+        for i, count in enumerate(self.size_buckets):
+            lo, hi = (1 << (i - 1)) + 1 if i else 1, 1 << i
+            histogram[str(hi) if lo == hi else f"{lo}-{hi}"] = count
+        return {
+            "enabled": MICROBATCH_ENABLED,
+            "max_size": self.max_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else None,
+            "recent_batch_size": self._ewma,
+            "waited_batches": self.waited_batches,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "errors": self.errors,
+            "batch_size_histogram": histogram,
+        }
+
+    def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._executor.shutdown(wait=False)
+
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def get_micro_batcher() -> MicroBatcher:
+    """Process başına tek batcher"""
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher()
+    return _batcher
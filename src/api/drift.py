@@ -0,0 +1,367 @@
+"""
+Dağılım tabanlı drift tespiti
+
+Eğitim sırasında bir referans profil (numeric kolonlar için quantile binli
+histogramlar, kategorik kolonlar için frekanslar ve skor dağılımı) kaydedilir.
+Canlı trafik zaman bucket'larına ayrılmış sayaç vektörlerine işlenir; pencere
+toplamı artımlı tutulduğu için /monitoring/drift dosya okumadan, trafik
+hacminden bağımsız sürede PSI / KS / chi-square hesaplar.
+"""
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMAT_VERSION = 1
+NUMERIC_BINS = 10
+SCORE_BINS = 10
+MAX_CATEGORIES = 30
+MISSING = "__missing__"
+
+# Drift eşikleri
+PSI_THRESHOLD = 0.2
+P_VALUE_THRESHOLD = 0.01
+MIN_WINDOW_COUNT = 30
+
+# Canlı pencere: bucket_seconds x n_buckets (varsayılan 1 saat)
+BUCKET_SECONDS = 60
+N_BUCKETS = 60
+
+
+def profile_path_for(model_path: str) -> Path:
+    """artifacts/churn_model_v2.joblib -> artifacts/churn_model_v2_profile.json"""
+    p = Path(model_path)
+    return p.with_name(f"{p.stem}_profile.json")
+
+
+def _numeric_edges(values: "pd.Series", bins: int) -> List[float]:
+    import pandas as pd
+
+    v = pd.to_numeric(values, errors="coerce").dropna()
+    if v.empty:
+        return []
+    qs = np.quantile(v, np.linspace(0, 1, bins + 1)[1:-1])
+    return sorted(set(float(q) for q in qs))
+
+
+def _as_float(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        import pandas as pd
+        return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+
+
+def _bin_numeric(values, edges) -> np.ndarray:
+    v = _as_float(values)
+    idx = np.searchsorted(np.asarray(edges, dtype=float), v, side="right")
+    return idx[~np.isnan(v)]
+
+
+def _category_key(v: Any) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return MISSING
+    return str(v)
+
+
+def build_reference_profile(X: "pd.DataFrame", cat_cols, num_cols, scores) -> Dict[str, Any]:
+    """
+    Eğitim verisinden referans profil üretir (train.py tarafından kaydedilir)
+
+    Args:
+        X: Eğitim feature'ları
+        cat_cols / num_cols: preprocess çıktısındaki kolon listeleri
+        scores: Eğitim verisi için pozitif sınıf olasılıkları
+    """
+    numeric = {}
+    for c in num_cols:
+        edges = _numeric_edges(X[c], NUMERIC_BINS)
+        counts = np.bincount(_bin_numeric(X[c], edges), minlength=len(edges) + 1)
+        numeric[c] = {"edges": edges, "counts": counts.tolist()}
+
+    categorical = {}
+    for c in cat_cols:
+        freq = X[c].map(_category_key).value_counts()
+        top = freq.index[:MAX_CATEGORIES].tolist()
+        # son bin: top listesinde olmayan (diğer) kategoriler
+        counts = freq.iloc[:MAX_CATEGORIES].tolist() + [int(freq.iloc[MAX_CATEGORIES:].sum())]
+        categorical[c] = {"categories": top, "counts": [int(x) for x in counts]}
+
+    score_edges = np.linspace(0, 1, SCORE_BINS + 1)[1:-1].tolist()
+    score_counts = np.bincount(_bin_numeric(scores, score_edges), minlength=SCORE_BINS)
+
+    return {
+        "format_version": PROFILE_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "rows": int(len(X)),
+        "numeric": numeric,
+        "categorical": categorical,
+        "score": {"edges": score_edges, "counts": score_counts.tolist()},
+    }
+
+
+def save_reference_profile(profile: Dict[str, Any], path) -> None:
+    with open(path, "w") as f:
+        json.dump(profile, f)
+
+
+def load_reference_profile(path) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _psi(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> float:
+    e = np.clip(expected / max(expected.sum(), 1), eps, None)
+    a = np.clip(actual / max(actual.sum(), 1), eps, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def _ks(expected: np.ndarray, actual: np.ndarray) -> Dict[str, float]:
+    """Bin'lenmiş iki örneklem KS (bin sınırlarındaki CDF farkı)"""
+    from scipy.stats import kstwobign
+
+    n, m = expected.sum(), actual.sum()
+    d = float(np.max(np.abs(np.cumsum(expected) / n - np.cumsum(actual) / m)))
+    en = math.sqrt(n * m / (n + m))
+    return {"ks": d, "p_value": float(kstwobign.sf(en * d))}
+
+
+def _chi2(expected: np.ndarray, actual: np.ndarray) -> Dict[str, float]:
+    """
+    Referans oranlara göre chi-square uyum testi.
+
+    Referansta hiç görülmemiş bin'ler (expected == 0) testten çıkarılır ve
+    beklenen değerler kalan gözlem toplamına ölçeklenir; o bin'lere düşen
+    pay ayrıca unseen_share olarak raporlanır (PSI bu payı zaten cezalandırır).
+    """
+    from scipy.stats import chi2
+
+    mask = expected > 0
+    obs = actual[mask]
+    unseen_share = float(actual[~mask].sum() / actual.sum())
+    if obs.sum() == 0:
+        # Trafiğin tamamı referansta olmayan bin'lerde
+        return {"chi2": None, "p_value": 0.0, "unseen_share": unseen_share}
+
+    exp = expected[mask] / expected[mask].sum() * obs.sum()
+    stat = float(np.sum((obs - exp) ** 2 / exp))
+    dof = max(int(mask.sum()) - 1, 1)
+    return {"chi2": stat, "p_value": float(chi2.sf(stat, dof)), "unseen_share": unseen_share}
+
+
+class DriftMonitor:
+    """
+    Canlı trafik sketch'leri.
+
+    Tüm feature'ların ve skorun bin sayaçları tek bir düz vektörde tutulur.
+    Her bucket bir vektördür; pencere toplamı gözlemde artırılır, süresi dolan
+    bucket çıkarılırken azaltılır.
+    """
+
+    def __init__(self, profile: Dict[str, Any], bucket_seconds: int = BUCKET_SECONDS, n_buckets: int = N_BUCKETS):
+        self.profile = profile
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+
+        # feature -> (offset, size)
+        self.layout: Dict[str, tuple] = {}
+        offset = 0
+
+        self.num_cols = list(profile["numeric"])
+        self._edges = [np.asarray(profile["numeric"][c]["edges"], dtype=float) for c in self.num_cols]
+        for c in self.num_cols:
+            size = len(profile["numeric"][c]["counts"])
+            self.layout[c] = (offset, size)
+            offset += size
+
+        self.cat_cols = list(profile["categorical"])
+        self._cat_index = {}
+        for c in self.cat_cols:
+            cats = profile["categorical"][c]["categories"]
+            self._cat_index[c] = {k: i for i, k in enumerate(cats)}
+            self.layout[c] = (offset, len(cats) + 1)
+            offset += len(cats) + 1
+
+        self._score_edges = np.asarray(profile["score"]["edges"], dtype=float)
+        self.layout["__score__"] = (offset, len(profile["score"]["counts"]))
+        offset += len(profile["score"]["counts"])
+
+        self.width = offset
+        self._num_offsets = np.array([self.layout[c][0] for c in self.num_cols], dtype=np.int64)
+        self._cat_offsets = [self.layout[c][0] for c in self.cat_cols]
+        self._cat_other = [len(self._cat_index[c]) for c in self.cat_cols]
+        self._edge_lists = [e.tolist() for e in self._edges]
+        self._num_offsets_list = self._num_offsets.tolist()
+        self._score_edge_list = self._score_edges.tolist()
+
+        self._buckets = np.zeros((n_buckets, self.width), dtype=np.int64)
+        self._bucket_rows = np.zeros(n_buckets, dtype=np.int64)
+        self._bucket_epoch = np.full(n_buckets, -1, dtype=np.int64)
+        self._window = np.zeros(self.width, dtype=np.int64)
+        self._window_rows = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, **kwargs) -> Optional["DriftMonitor"]:
+        profile = load_reference_profile(path)
+        return cls(profile, **kwargs) if profile else None
+
+    def _slot(self, now: float) -> int:
+        """Mevcut bucket'ı döndürür, süresi dolmuş bucket'ları pencereden çıkarır"""
+        epoch = int(now // self.bucket_seconds)
+
+        stale = (self._bucket_epoch >= 0) & (self._bucket_epoch <= epoch - self.n_buckets)
+        if stale.any():
+            self._window -= self._buckets[stale].sum(axis=0)
+            self._window_rows -= int(self._bucket_rows[stale].sum())
+            self._buckets[stale] = 0
+            self._bucket_rows[stale] = 0
+            self._bucket_epoch[stale] = -1
+
+        slot = epoch % self.n_buckets
+        if self._bucket_epoch[slot] != epoch:
+            self._bucket_epoch[slot] = epoch
+        return slot
+
+    def _indices(self, columns: Dict[str, Any], scores, n_rows: int) -> np.ndarray:
+        parts = []
+
+        for c, edges, off in zip(self.num_cols, self._edges, self._num_offsets):
+            v = _as_float(columns[c])
+            ok = ~np.isnan(v)
+            parts.append(np.searchsorted(edges, v[ok], side="right") + off)
+
+        for c, off, other in zip(self.cat_cols, self._cat_offsets, self._cat_other):
+            index = self._cat_index[c]
+            parts.append(np.fromiter(
+                (off + index.get(_category_key(v), other) for v in columns[c]),
+                dtype=np.int64,
+                count=n_rows,
+            ))
+
+        s_off = self.layout["__score__"][0]
+        parts.append(np.searchsorted(self._score_edges, np.asarray(scores, dtype=float), side="right") + s_off)
+
+        return np.concatenate(parts)
+
+    def observe_columns(self, columns: Dict[str, Any], scores, n_rows: int, now: float = None):
+        """Kolon bazlı (batch) gözlem ekler"""
+        if n_rows == 0:
+            return
+        counts = np.bincount(self._indices(columns, scores, n_rows), minlength=self.width)
+        with self._lock:
+            slot = self._slot(time.time() if now is None else now)
+            self._buckets[slot] += counts
+            self._bucket_rows[slot] += n_rows
+            self._window += counts
+            self._window_rows += n_rows
+
+    def observe(self, row: Dict[str, Any], score: float, now: float = None):
+        """Tek satır gözlem (numpy dizisi kurmadan, bisect + dict lookup)"""
+        idx = []
+        for c, edges, off in zip(self.num_cols, self._edge_lists, self._num_offsets_list):
+            try:
+                v = float(row.get(c))
+            except (TypeError, ValueError):
+                continue
+            if v == v:
+                idx.append(off + bisect.bisect_right(edges, v))
+
+        for c, off, other in zip(self.cat_cols, self._cat_offsets, self._cat_other):
+            idx.append(off + self._cat_index[c].get(_category_key(row.get(c)), other))
+
+        idx.append(self.layout["__score__"][0] + bisect.bisect_right(self._score_edge_list, score))
+
+        # Bir satırdaki indeksler feature offset'leri sayesinde benzersizdir
+        with self._lock:
+            slot = self._slot(time.time() if now is None else now)
+            self._buckets[slot, idx] += 1
+            self._bucket_rows[slot] += 1
+            self._window[idx] += 1
+            self._window_rows += 1
+
+    def _window_counts(self, window_minutes: Optional[int], now: float):
+        with self._lock:
+            self._slot(now)
+            if window_minutes is None or window_minutes * 60 >= self.bucket_seconds * self.n_buckets:
+                return self._window.copy(), self._window_rows
+
+            current = int(now // self.bucket_seconds)
+            k = max(1, math.ceil(window_minutes * 60 / self.bucket_seconds))
+            mask = (self._bucket_epoch > current - k) & (self._bucket_epoch >= 0)
+            return self._buckets[mask].sum(axis=0), int(self._bucket_rows[mask].sum())
+
+    def report(self, window_minutes: Optional[int] = None, now: float = None) -> Dict[str, Any]:
+        """Pencere için feature bazlı PSI / KS / chi-square sonuçları"""
+        now = time.time() if now is None else now
+        counts, rows = self._window_counts(window_minutes, now)
+        max_minutes = self.bucket_seconds * self.n_buckets // 60
+
+        result: Dict[str, Any] = {
+            "window_minutes": min(window_minutes or max_minutes, max_minutes),
+            "window_count": rows,
+            "reference_rows": self.profile.get("rows"),
+        }
+        if rows < MIN_WINDOW_COUNT:
+            result["status"] = "insufficient_data"
+            result["min_count"] = MIN_WINDOW_COUNT
+            return result
+
+        features = {}
+        for c in self.num_cols + self.cat_cols + ["__score__"]:
+            off, size = self.layout[c]
+            actual = counts[off:off + size].astype(float)
+            if c == "__score__":
+                expected = np.asarray(self.profile["score"]["counts"], dtype=float)
+            elif c in self.profile["numeric"]:
+                expected = np.asarray(self.profile["numeric"][c]["counts"], dtype=float)
+            else:
+                expected = np.asarray(self.profile["categorical"][c]["counts"], dtype=float)
+
+            if actual.sum() == 0 or expected.sum() == 0:
+                continue
+
+            info = {"psi": _psi(expected, actual)}
+            if c in self.profile["categorical"]:
+                info["test"] = "chi2"
+                info.update(_chi2(expected, actual))
+            else:
+                info["test"] = "ks"
+                info.update(_ks(expected, actual))
+            info["drift"] = bool(info["psi"] > PSI_THRESHOLD or info["p_value"] < P_VALUE_THRESHOLD)
+            features[c] = info
+
+        score = features.pop("__score__", None)
+        result["status"] = "ok"
+        result["score"] = score
+        result["features"] = features
+        result["drifted_features"] = sorted(c for c, info in features.items() if info["drift"])
+        result["is_drift"] = bool(result["drifted_features"]) or bool(score and score["drift"])
+        return result
+
+
+_monitor: Optional[DriftMonitor] = None
+
+
+def set_drift_monitor(monitor: Optional[DriftMonitor]):
+    global _monitor
+    _monitor = monitor
+
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    return _monitor
@@ -0,0 +1,723 @@
+"""
+Servis edilen feature satırlarının kolon bazlı yakalanması (replay / yeniden eğitim)
+
+log_prediction sadece features_count tuttuğu için production trafiği tekrar
+oynatılamıyor. Ham dict'leri JSON olarak loglamak ise hem disk hem yazma
+maliyeti açısından pahalı. Bu modül skorlanan satırları modelin expected_cols
+sırasında buffer'lar ve arka plandaki thread ile sıkıştırılmış kolon bazlı
+segmentler (.npz) olarak yazar:
+
+    capture/date=2026-10-18/hour=14/seg-<ms>-<worker>-<seq>.npz   (partition'lar UTC)
+
+Segment içinde her kolon ayrı bir npz üyesidir (okurken sadece istenen
+kolonlar açılır):
+
+    <sayısal kolon>          float32
+    <kategorik kolon>        int32 kod (-1: eksik) + "<kolon>__values" sözlüğü
+    ts                       float64 (unix zamanı)
+    pred_proba_yes           float32
+    pred_label, customer_id  sözlük kodlu (customer_id sadece by-id çağrılarında)
+    __meta__                 JSON (model_version, kolon sırası, satır sayısı...)
+
+Segmentler (model_version, kolon düzeni) başına tutulur; satır sayısı
+(FEATURE_CAPTURE_SEGMENT_ROWS), yaş (FEATURE_CAPTURE_FLUSH_INTERVAL) veya saat
+partition'ı değişince kapatılır. Request path sadece kuyruğa ekler; kuyruk
+doluysa kayıt düşürülür.
+
+Retention her segment yazımından sonra writer thread'de uygulanır:
+FEATURE_CAPTURE_RETENTION_DAYS'ten eski hour= partition'ları silinir, toplam
+boyut FEATURE_CAPTURE_MAX_BYTES'ı aşarsa en eski segmentlerden başlanarak
+silinir (0 = sınırsız).
+
+Ayarlar:
+    FEATURE_CAPTURE_ENABLED=true
+    FEATURE_CAPTURE_DIR=monitoring/capture
+    FEATURE_CAPTURE_SAMPLE_RATE=1.0
+    FEATURE_CAPTURE_SEGMENT_ROWS=50000
+    FEATURE_CAPTURE_FLUSH_INTERVAL=300   (sn)
+    FEATURE_CAPTURE_RETENTION_DAYS=7
+    FEATURE_CAPTURE_MAX_BYTES=1073741824
+
+Kullanım:
+    python -m src.api.feature_capture --since 2026-10-18                # özet + JSON boyut karşılaştırması
+    python -m src.api.feature_capture --columns Age Contract --export captured.csv
+    python -m src.api.feature_capture --drift-profile artifacts/churn_model_v2_profile.json
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# pandas yazma (arka plan thread'i) ve okuma tarafında lazy import edilir
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FEATURE_CAPTURE_ENABLED = os.getenv("FEATURE_CAPTURE_ENABLED", "true").lower() == "true"
+FEATURE_CAPTURE_DIR = Path(os.getenv("FEATURE_CAPTURE_DIR", "monitoring/capture"))
+FEATURE_CAPTURE_SAMPLE_RATE = float(os.getenv("FEATURE_CAPTURE_SAMPLE_RATE", "1.0"))
+FEATURE_CAPTURE_SEGMENT_ROWS = int(os.getenv("FEATURE_CAPTURE_SEGMENT_ROWS", "50000"))
+FEATURE_CAPTURE_FLUSH_INTERVAL = float(os.getenv("FEATURE_CAPTURE_FLUSH_INTERVAL", "300"))
+FEATURE_CAPTURE_QUEUE_SIZE = int(os.getenv("FEATURE_CAPTURE_QUEUE_SIZE", "10000"))
+FEATURE_CAPTURE_RETENTION_DAYS = float(os.getenv("FEATURE_CAPTURE_RETENTION_DAYS", "7"))
+FEATURE_CAPTURE_MAX_BYTES = int(os.getenv("FEATURE_CAPTURE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+SEGMENT_FORMAT = 1
+META_KEY = "__meta__"
+VALUES_SUFFIX = "__values"
+# Segmentteki feature dışı kolonlar
+RESERVED_COLUMNS = ("timestamp", "model_version", "customer_id", "pred_label", "pred_proba_yes")
+
+TimeArg = Union[None, str, float, datetime]
+
+
+def _partition(ts: float) -> Tuple[str, int]:
+    dt = datetime.fromtimestamp(ts, timezone.utc)
+    return dt.strftime("%Y-%m-%d"), dt.hour
+
+
+def _partition_start(date_dir: Path, hour_dir: Path) -> Optional[datetime]:
+    """date=/hour= klasörlerinin temsil ettiği saatin başlangıcı (UTC)"""
+    try:
+        lo = datetime.strptime(f"{date_dir.name[5:]} {hour_dir.name[5:]}", "%Y-%m-%d %H")
+    except ValueError:
+        return None
+    return lo.replace(tzinfo=timezone.utc)
+
+
+def enforce_retention(directory: Path = FEATURE_CAPTURE_DIR, retention_days: float = FEATURE_CAPTURE_RETENTION_DAYS,
+                      max_bytes: int = FEATURE_CAPTURE_MAX_BYTES, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Süresi dolan partition'ları ve boyut sınırını aşan en eski segmentleri siler
+    (birden fazla worker aynı anda çalıştırabilir; silinmiş dosyalar atlanır)
+
+    Returns:
+        {"segments_deleted", "bytes_deleted"}
+    """
+    directory = Path(directory)
+    deleted = {"segments_deleted": 0, "bytes_deleted": 0}
+    if not directory.is_dir():
+        return deleted
+    now = time.time() if now is None else now
+
+    def drop(path: Path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        deleted["segments_deleted"] += 1
+        deleted["bytes_deleted"] += size
+
+    kept: List[Tuple[Path, int]] = []
+    for date_dir in sorted(directory.glob("date=*")):
+        for hour_dir in sorted(date_dir.glob("hour=*")):
+            lo = _partition_start(date_dir, hour_dir)
+            if lo is None:
+                continue
+            expired = retention_days > 0 and (lo + timedelta(hours=1)).timestamp() <= now - retention_days * 86400
+            for seg in sorted(hour_dir.glob("seg-*.npz")):
+                if expired:
+                    drop(seg)
+                    continue
+                try:
+                    kept.append((seg, seg.stat().st_size))
+                except FileNotFoundError:
+                    pass
+            if expired:
+                shutil.rmtree(hour_dir, ignore_errors=True)
+        try:
+            empty = not any(date_dir.iterdir())
+        except FileNotFoundError:
+            continue
+        if empty:
+            shutil.rmtree(date_dir, ignore_errors=True)
+
+    if max_bytes > 0:
+        total = sum(size for _, size in kept)
+        for seg, size in kept:
+            if total <= max_bytes:
+                break
+            drop(seg)
+            total -= size
+    return deleted
+
+
+def _encode_categorical(values) -> Tuple[np.ndarray, np.ndarray]:
+    """Sözlük kodlama: (int32 kodlar, -1 eksik; str değerler)"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    return codes.astype(np.int32), np.asarray([str(v) for v in uniques], dtype=str)
+
+
+def _decode_categorical(codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    lookup = np.empty(len(values) + 1, dtype=object)
+    lookup[:-1] = values
+    lookup[-1] = None
+    return lookup[codes]
+
+
+class _Buffer:
+    """Tek (model_version, kolon düzeni) için açık segment"""
+
+    def __init__(self, version: str, columns: Tuple[str, ...], numeric: Tuple[bool, ...], partition):
+        self.version = version
+        self.columns = columns
+        self.numeric = numeric
+        self.partition = partition
+        self.opened = time.monotonic()
+        self.rows = 0
+        self.ts: List[np.ndarray] = []
+        # blok: tek satır için değer tuple'ı, batch için {kolon: dizi}
+        self.blocks: List[Union[tuple, Dict[str, Any]]] = []
+        self.labels: List[Any] = []
+        self.probas: List[np.ndarray] = []
+        self.ids: List[Any] = []
+
+    def column(self, j: int, name: str) -> np.ndarray:
+        parts = []
+        for block in self.blocks:
+            if isinstance(block, tuple):
+                arr = np.empty(1, dtype=object)
+                arr[0] = block[j]
+                parts.append(arr)
+            else:
+                parts.append(np.asarray(block[name], dtype=object))
+        return np.concatenate(parts)
+
+
+class FeatureCaptureWriter:
+    """
+    Arka planda çalışan, buffer'lı segment yazıcısı (PredictionLogWriter ile
+    aynı kuyruk modeli). Request path'te sadece değerlerin tuple'a alınıp
+    kuyruğa eklenmesi kalır.
+    """
+
+    def __init__(
+        self,
+        directory: Path = FEATURE_CAPTURE_DIR,
+        worker_id: str = "",
+        sample_rate: float = FEATURE_CAPTURE_SAMPLE_RATE,
+        segment_rows: int = FEATURE_CAPTURE_SEGMENT_ROWS,
+        flush_interval: float = FEATURE_CAPTURE_FLUSH_INTERVAL,
+        max_queue: int = FEATURE_CAPTURE_QUEUE_SIZE,
+        retention_days: float = FEATURE_CAPTURE_RETENTION_DAYS,
+        max_bytes: int = FEATURE_CAPTURE_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.worker_id = worker_id or str(os.getpid())
+        self.sample_rate = sample_rate
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._buffers: Dict[tuple, _Buffer] = {}
+        self._layouts: Dict[int, Tuple[list, Tuple[str, ...], Tuple[bool, ...]]] = {}
+        self._seq = 0
+
+        self.submitted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.rows_written = 0
+        self.segments = 0
+        self.bytes_written = 0
+        self.write_errors = 0
+        self.segments_deleted = 0
+        self.bytes_deleted = 0
+        self.last_segment: Optional[str] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feature-capture-writer", daemon=True)
+        self._thread.start()
+
+    def _layout(self, lm) -> Tuple[Tuple[str, ...], Tuple[bool, ...]]:
+        """Model başına kolon sırası ve sayısal maskesi (default'u float olanlar sayısal)"""
+        cached = self._layouts.get(id(lm.expected_cols))
+        if cached is None or cached[0] is not lm.expected_cols:
+            cols = tuple(lm.expected_cols)
+            numeric = tuple(isinstance(lm.defaults.get(c), float) for c in cols)
+            cached = (lm.expected_cols, cols, numeric)
+            self._layouts[id(lm.expected_cols)] = cached
+        return cached[1], cached[2]
+
+    def _sampled(self, n: int = 1) -> bool:
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            return True
+        self.sampled_out += n
+        return False
+
+    def _put(self, item: tuple, n: int) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += n
+            return False
+        self.submitted += n
+        return True
+
+    def submit_row(self, lm, row: Dict[str, Any], pred_label: Any, pred_proba_yes: float,
+                   customer_id: Optional[str] = None) -> bool:
+        """Tek satır (expected_cols sırasında tuple olarak kuyruğa)"""
+        if not self._sampled():
+            return False
+        cols, numeric = self._layout(lm)
+        values = tuple(row.get(c) for c in cols)
+        return self._put((lm.version, cols, numeric, time.time(), values, pred_label, pred_proba_yes, customer_id), 1)
+
+    def submit_columns(self, lm, columns: Dict[str, Any], labels, probas, n_rows: int,
+                       customer_ids: Optional[Sequence[str]] = None) -> bool:
+        """Kolon bazlı batch (satır batch'i örneklenir, tek tek değil)"""
+        if n_rows == 0 or not self._sampled(n_rows):
+            return False
+        cols, numeric = self._layout(lm)
+        block = {c: columns[c] for c in cols}
+        ids = list(customer_ids) if customer_ids is not None else None
+        return self._put(
+            (lm.version, cols, numeric, time.time(), block, np.asarray(labels, dtype=object),
+             np.asarray(probas, dtype=float), ids),
+            n_rows,
+        )
+
+    def _add(self, item: tuple):
+        version, cols, numeric, ts, values, labels, probas, ids = item
+        key = (version, cols)
+        partition = _partition(ts)
+        buf = self._buffers.get(key)
+        if buf is not None and buf.partition != partition:
+            self._flush(key)
+            buf = None
+        if buf is None:
+            buf = self._buffers[key] = _Buffer(version, cols, numeric, partition)
+
+        if isinstance(values, tuple):
+            n = 1
+            buf.labels.append(labels)
+            buf.probas.append(np.array([probas], dtype=float))
+            buf.ids.append(ids)
+        else:
+            n = len(probas)
+            buf.labels.extend(labels)
+            buf.probas.append(probas)
+            buf.ids.extend(ids if ids is not None else [None] * n)
+        buf.blocks.append(values)
+        buf.ts.append(np.full(n, ts))
+        buf.rows += n
+
+        if buf.rows >= self.segment_rows:
+            self._flush(key)
+
+    def _segment_arrays(self, buf: _Buffer) -> Dict[str, np.ndarray]:
+        import pandas as pd
+
+        arrays: Dict[str, np.ndarray] = {}
+        categorical = []
+        for j, (c, is_num) in enumerate(zip(buf.columns, buf.numeric)):
+            col = buf.column(j, c)
+            if is_num:
+                arrays[c] = pd.to_numeric(pd.Series(col), errors="coerce").to_numpy(dtype=np.float32)
+            else:
+                arrays[c], arrays[c + VALUES_SUFFIX] = _encode_categorical(col)
+                categorical.append(c)
+
+        ts = np.concatenate(buf.ts)
+        arrays["ts"] = ts
+        arrays["pred_proba_yes"] = np.concatenate(buf.probas).astype(np.float32)
+        arrays["pred_label"], arrays["pred_label" + VALUES_SUFFIX] = _encode_categorical(buf.labels)
+        if any(i is not None for i in buf.ids):
+            arrays["customer_id"], arrays["customer_id" + VALUES_SUFFIX] = _encode_categorical(buf.ids)
+
+        meta = {
+            "format": SEGMENT_FORMAT,
+            "model_version": buf.version,
+            "columns": list(buf.columns),
+            "categorical": categorical,
+            "rows": buf.rows,
+            "start": float(ts.min()),
+            "end": float(ts.max()),
+            "worker": self.worker_id,
+        }
+        arrays[META_KEY] = np.asarray(json.dumps(meta))
+        return arrays
+
+    def _flush(self, key: tuple):
+        buf = self._buffers.pop(key, None)
+        if buf is None or buf.rows == 0:
+            return
+        try:
+            arrays = self._segment_arrays(buf)
+            date, hour = buf.partition
+            part_dir = self.directory / f"date={date}" / f"hour={hour:02d}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            self._seq += 1
+            name = f"seg-{int(arrays['ts'][0] * 1000)}-{self.worker_id}-{self._seq:06d}.npz"
+            path = part_dir / name
+
+            # Okuyucular yarım dosya görmesin: önce gizli tmp, sonra os.replace
+            tmp = part_dir / f".{name}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp, path)
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Feature capture segment write failed ({buf.rows} rows lost): {e}")
+            return
+
+        self.rows_written += buf.rows
+        self.segments += 1
+        self.bytes_written += path.stat().st_size
+        self.last_segment = str(path)
+        logger.debug(f"Feature capture segment written: {path} ({buf.rows} rows)")
+
+        try:
+            deleted = enforce_retention(self.directory, self.retention_days, self.max_bytes)
+        except Exception as e:
+            logger.error(f"Feature capture retention failed: {e}")
+            return
+        self.segments_deleted += deleted["segments_deleted"]
+        self.bytes_deleted += deleted["bytes_deleted"]
+        if deleted["segments_deleted"]:
+            logger.info(f"Feature capture retention: {deleted['segments_deleted']} segments deleted")
+
+    def _flush_expired(self, force: bool = False):
+        now = time.monotonic()
+        for key, buf in list(self._buffers.items()):
+            if force or now - buf.opened >= self.flush_interval:
+                self._flush(key)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._add(self._queue.get(timeout=1.0))
+                while True:
+                    self._add(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            self._flush_expired()
+
+        # Kapanış: kuyrukta kalanlar dahil açık segmentleri yaz
+        while True:
+            try:
+                self._add(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._flush_expired(force=True)
+
+    def close(self, timeout: float = 10.0):
+        """Worker'ı durdurur ve açık segmentleri diske yazar"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "sample_rate": self.sample_rate,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "buffered_rows": sum(b.rows for b in list(self._buffers.values())),
+            "rows_written": self.rows_written,
+            "segments": self.segments,
+            "bytes_written": self.bytes_written,
+            "write_errors": self.write_errors,
+            "retention_days": self.retention_days,
+            "max_bytes": self.max_bytes,
+            "segments_deleted": self.segments_deleted,
+            "bytes_deleted": self.bytes_deleted,
+            "last_segment": self.last_segment,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+_writer: Optional[FeatureCaptureWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_feature_capture(worker_id: str = "") -> Optional[FeatureCaptureWriter]:
+    """Process başına tek writer (ilk kullanımda başlatılır); kapalıysa None"""
+    global _writer
+    if _writer is None and FEATURE_CAPTURE_ENABLED:
+        with _writer_lock:
+            if _writer is None:
+                writer = FeatureCaptureWriter(FEATURE_CAPTURE_DIR, worker_id)
+                writer.start()
+                _writer = writer
+    return _writer
+
+
+def shutdown_feature_capture():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+atexit.register(shutdown_feature_capture)
+
+
+def _reset_after_fork():
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ---------------------------------------------------------------------------
+# Okuma tarafı (train.py, drift kontrolleri, benchmark'lar)
+# ---------------------------------------------------------------------------
+
+def _to_timestamp(value: TimeArg) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def iter_segments(directory: Path = FEATURE_CAPTURE_DIR, start: TimeArg = None, end: TimeArg = None) -> Iterator[Path]:
+    """
+    [start, end) aralığıyla kesişebilecek segmentler (zaman sırasıyla).
+    Aralık dışındaki date=/hour= partition'ları listelenmeden atlanır.
+    """
+    start_ts, end_ts = _to_timestamp(start), _to_timestamp(end)
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+
+    for date_dir in sorted(directory.glob("date=*")):
+        for hour_dir in sorted(date_dir.glob("hour=*")):
+            lo = _partition_start(date_dir, hour_dir)
+            if lo is None:
+                continue
+            hi = lo + timedelta(hours=1)
+            if start_ts is not None and hi.timestamp() <= start_ts:
+                continue
+            if end_ts is not None and lo.timestamp() >= end_ts:
+                continue
+            yield from sorted(hour_dir.glob("seg-*.npz"))
+
+
+def segment_meta(path: Path) -> Dict[str, Any]:
+    with np.load(path, allow_pickle=False) as npz:
+        return json.loads(str(npz[META_KEY]))
+
+
+def read_segment(path: Path, columns: Optional[Sequence[str]] = None,
+                 start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> "pd.DataFrame":
+    """
+    Tek segmenti DataFrame olarak okur. columns verilirse sadece o kolonların
+    npz üyeleri açılır (timestamp ve model_version her zaman döner).
+    """
+    import pandas as pd
+
+    with np.load(path, allow_pickle=False) as npz:
+        meta = json.loads(str(npz[META_KEY]))
+        members = set(npz.files)
+        ts = npz["ts"]
+        mask = None
+        if start_ts is not None or end_ts is not None:
+            mask = np.ones(len(ts), dtype=bool)
+            if start_ts is not None:
+                mask &= ts >= start_ts
+            if end_ts is not None:
+                mask &= ts < end_ts
+            if not mask.any():
+                return pd.DataFrame()
+
+        wanted = list(meta["columns"]) + ["customer_id", "pred_label", "pred_proba_yes"] if columns is None else columns
+        data: Dict[str, Any] = {"timestamp": pd.to_datetime(ts, unit="s", utc=True)}
+        for c in wanted:
+            if c in ("timestamp", "model_version"):
+                continue
+            if c not in members:
+                data[c] = np.full(len(ts), np.nan if c != "customer_id" else None, dtype=object)
+            elif c + VALUES_SUFFIX in members:
+                data[c] = _decode_categorical(npz[c], npz[c + VALUES_SUFFIX])
+            else:
+                data[c] = npz[c]
+
+    df = pd.DataFrame(data)
+    df.insert(1, "model_version", meta["model_version"])
+    return df[mask].reset_index(drop=True) if mask is not None else df
+
+
+def load_capture(start: TimeArg = None, end: TimeArg = None, columns: Optional[Sequence[str]] = None,
+                 model_version: Optional[str] = None, directory: Path = FEATURE_CAPTURE_DIR,
+                 limit: Optional[int] = None) -> "pd.DataFrame":
+    """
+    Yakalanan satırları tek DataFrame olarak döndürür
+
+    Args:
+        start, end: [start, end) aralığı (ISO string, unix zamanı veya datetime)
+        columns: Kolon projeksiyonu (feature'lar ve/veya RESERVED_COLUMNS);
+                 None ise hepsi
+        model_version: Sadece bu versiyonla skorlanmış segmentler
+        limit: En fazla bu kadar satır (eski -> yeni)
+    """
+    import pandas as pd
+
+    start_ts, end_ts = _to_timestamp(start), _to_timestamp(end)
+    frames, total = [], 0
+    for path in iter_segments(directory, start, end):
+        if model_version is not None and segment_meta(path)["model_version"] != model_version:
+            continue
+        df = read_segment(path, columns, start_ts, end_ts)
+        if df.empty:
+            continue
+        frames.append(df)
+        total += len(df)
+        if limit is not None and total >= limit:
+            break
+
+    if not frames:
+        return pd.DataFrame(columns=["timestamp", "model_version"] + list(columns or []))
+    out = pd.concat(frames, ignore_index=True)
+    return out.head(limit) if limit is not None else out
+
+
+def load_labeled_capture(labels_path: str, columns: Sequence[str], start: TimeArg = None, end: TimeArg = None,
+                         directory: Path = FEATURE_CAPTURE_DIR) -> Tuple["pd.DataFrame", "pd.Series"]:
+    """
+    Yeniden eğitim için: customer_id ile yakalanmış satırları sonradan gelen
+    etiketlerle (Customer ID + Churn Label kolonlu CSV) birleştirir. Aynı
+    müşteri birden fazla kez skorlandıysa en son servis edilen satır alınır.
+
+    Returns:
+        X (columns sırasında), y
+    """
+    import pandas as pd
+    from src.data.feature_store import ID_COLUMN
+    from src.data.preprocess import TARGET
+
+    df = load_capture(start, end, list(columns) + ["customer_id"], directory=directory)
+    df = df[df["customer_id"].notna()].drop_duplicates("customer_id", keep="last")
+    labels = pd.read_csv(labels_path, usecols=[ID_COLUMN, TARGET]).dropna()
+    labels = labels.drop_duplicates(ID_COLUMN, keep="last")
+    merged = df.merge(labels, left_on="customer_id", right_on=ID_COLUMN, how="inner")
+    return merged[list(columns)].reset_index(drop=True), merged[TARGET].reset_index(drop=True)
+
+
+def capture_summary(directory: Path = FEATURE_CAPTURE_DIR, start: TimeArg = None, end: TimeArg = None) -> Dict[str, Any]:
+    """Segment sayısı, satırlar, disk boyutu ve versiyon dağılımı (sadece __meta__ okunur)"""
+    segments, rows, size = 0, 0, 0
+    versions: Dict[str, int] = {}
+    first, last = None, None
+    for path in iter_segments(directory, start, end):
+        meta = segment_meta(path)
+        segments += 1
+        rows += meta["rows"]
+        size += path.stat().st_size
+        versions[meta["model_version"]] = versions.get(meta["model_version"], 0) + meta["rows"]
+        first = meta["start"] if first is None else min(first, meta["start"])
+        last = meta["end"] if last is None else max(last, meta["end"])
+    return {
+        "directory": str(directory),
+        "segments": segments,
+        "rows": rows,
+        "bytes": size,
+        "bytes_per_row": size / rows if rows else None,
+        "model_versions": versions,
+        "first": datetime.fromtimestamp(first, timezone.utc).isoformat() if first is not None else None,
+        "last": datetime.fromtimestamp(last, timezone.utc).isoformat() if last is not None else None,
+    }
+
+
+def _json_size(df: "pd.DataFrame") -> int:
+    """Aynı satırların log_prediction tarzı JSON satırı olarak boyutu"""
+    import pandas as pd
+
+    features = [c for c in df.columns if c not in RESERVED_COLUMNS]
+    size = 0
+    for rec in df.to_dict(orient="records"):
+        entry = {
+            "timestamp": rec["timestamp"].isoformat(),
+            "request": {"features": {c: (None if pd.isna(rec[c]) else rec[c]) for c in features}},
+            "response": {
+                "pred_label": rec.get("pred_label"),
+                "pred_proba_yes": float(rec["pred_proba_yes"]),
+                "model_version": rec["model_version"],
+            },
+        }
+        size += len(json.dumps(entry, default=float)) + 1
+    return size
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Yakalanan feature segmentlerini oku / özetle")
+    parser.add_argument("--dir", default=str(FEATURE_CAPTURE_DIR), help="Capture klasörü")
+    parser.add_argument("--since", help="Başlangıç (ISO, örn. 2026-10-18 veya 2026-10-18T14:00)")
+    parser.add_argument("--until", help="Bitiş (ISO, hariç)")
+    parser.add_argument("--model-version", help="Sadece bu versiyon")
+    parser.add_argument("--columns", nargs="*", help="Kolon projeksiyonu")
+    parser.add_argument("--export", help="Satırları yaz (.csv veya .parquet)")
+    parser.add_argument("--no-json-compare", action="store_true", help="JSON boyut karşılaştırmasını atla")
+    parser.add_argument("--drift-profile", help="Yakalanan trafiği bu referans profile göre drift kontrolünden geçir")
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    summary = capture_summary(directory, args.since, args.until)
+    print(f"📦 {summary['segments']} segment, {summary['rows']:,} satır, {summary['bytes'] / 1024:.1f} KB "
+          f"({summary['first']} -> {summary['last']})")
+    for v, n in sorted(summary["model_versions"].items()):
+        print(f"   {v}: {n:,} satır")
+    if not summary["rows"]:
+        raise SystemExit(0)
+
+    t0 = time.perf_counter()
+    df = load_capture(args.since, args.until, args.columns, args.model_version, directory)
+    print(f"⏱️ {len(df):,} satır x {df.shape[1]} kolon {time.perf_counter() - t0:.3f} sn'de okundu")
+
+    if not args.no_json_compare and args.columns is None and args.model_version is None:
+        json_bytes = _json_size(df)
+        print(f"🗜️ JSON log karşılığı {json_bytes / 1024:.1f} KB -> segmentler {summary['bytes'] / 1024:.1f} KB "
+              f"({json_bytes / max(summary['bytes'], 1):.1f}x küçük)")
+
+    if args.drift_profile:
+        from src.api.drift import DriftMonitor
+        monitor = DriftMonitor.from_file(args.drift_profile)
+        if monitor is None:
+            raise SystemExit(f"❌ Profil okunamadı: {args.drift_profile}")
+        cols = {c: df[c].to_numpy() if c in df.columns else np.full(len(df), np.nan)
+                for c in monitor.num_cols + monitor.cat_cols}
+        monitor.observe_columns(cols, df["pred_proba_yes"].to_numpy(dtype=float), len(df))
+        report = monitor.report()
+        drifted = report.get("drifted_features", [])
+        print(f"📈 Drift: {report['status']} | drift olan: {', '.join(drifted) or '-'}")
+
+    if args.export:
+        from src.inference.predict import ResultWriter
+        writer = ResultWriter(args.export)
+        try:
+            writer.write(df)
+        finally:
+            writer.close()
+        print(f"✅ {len(df):,} satır -> {args.export}")
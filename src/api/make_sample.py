@@ -1,9 +1,7 @@
-import pandas as pd
-from src.data.preprocess import preprocess
+from src.data.cache import load_dataset
 import json
 
-df = pd.read_csv("data/raw/telco.csv")
-X, _, _, _ = preprocess(df)
+X, _, _, _ = load_dataset("data/raw/telco.csv")
 
 sample = X.sample(1, random_state=42).iloc[0].to_dict()
 print(json.dumps({"features": sample}, ensure_ascii=False, indent=2))
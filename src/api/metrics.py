@@ -0,0 +1,356 @@
+"""
+Prometheus metin formatında /metrics
+
+Sayaçlar ve histogramlar thread başına ayrı bir shard'da tutulur (kilit
+yok); okuma anında shard'lar toplanır. Her worker process periyodik olarak
+kendi toplamını monitoring/metrics/ altına yazar, /metrics tüm worker
+dosyalarını birleştirir (çoklu uvicorn worker'da toplam görünüm). Ölen
+worker'ların dosyaları periyodik olarak metrics_compacted.json'a katlanır.
+
+Metrikler:
+    churn_http_requests_total{route,method,status}
+    churn_http_errors_total{route,status}                (status >= 400)
+    churn_http_request_duration_seconds{route}           histogram
+    churn_predict_stage_duration_seconds{stage}          histogram
+        stage: input_assembly, transform, classifier, compiled_score, monitoring
+    churn_model_load_seconds{version}, churn_model_active{version}
+    churn_prediction_score                               histogram
+    churn_process_resident_memory_bytes{worker}, churn_process_proportional_memory_bytes{worker}
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.api import monitoring
+from src.api.monitoring import (
+    MONITORING_DIR,
+    SNAPSHOT_COMPACT_INTERVAL,
+    _atomic_write_json,
+    compact_worker_snapshots,
+    get_global_stats,
+    pid_alive,
+    read_worker_snapshots,
+)
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = MONITORING_DIR / "metrics"
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5.0"))
+
+# Histogram bucket üst sınırları (saniye)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_HELP = {
+    "churn_http_requests_total": ("counter", "HTTP requests by route, method and status"),
+    "churn_http_errors_total": ("counter", "HTTP responses with status >= 400"),
+    "churn_http_request_duration_seconds": ("histogram", "HTTP request latency by route"),
+    "churn_predict_stage_duration_seconds": ("histogram", "Prediction hot-path latency by stage (per engine call)"),
+    "churn_model_load_seconds": ("gauge", "Model artifact load time"),
+    "churn_model_active": ("gauge", "1 for the active model version"),
+    "churn_prediction_score": ("histogram", "Distribution of predicted churn probability"),
+    "churn_process_resident_memory_bytes": ("gauge", "Resident memory per worker process"),
+    "churn_process_proportional_memory_bytes": ("gauge", "Proportional set size (shared pages split across workers)"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """Tek bir thread'in sayaçları (sadece o thread yazar)"""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket sayıları..., +Inf], sum
+        self.histograms: Dict[Tuple[str, Labels], List] = {}
+
+
+class Metrics:
+    """
+    Process içi metrik kaydı
+
+    inc / observe request path'inde kilit almaz; thread'e ait shard'ı günceller.
+    Shard listesi sadece yeni bir thread ilk kez yazdığında kilitle büyür.
+    """
+
+    def __init__(self, snapshot_dir: Path = METRICS_DIR, snapshot_interval: float = METRICS_SNAPSHOT_INTERVAL):
+        # WORKER_ID fork sonrası değişir, bu yüzden modül üzerinden okunur
+        self.worker_id = monitoring.WORKER_ID
+        self.snapshot_path = Path(snapshot_dir) / f"metrics_{self.worker_id}.json"
+        self.snapshot_interval = snapshot_interval
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        h = histograms.get(key)
+        if h is None:
+            h = histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+        h[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        h[1] += seconds
+
+    def collect(self) -> Dict[str, Any]:
+        """Tüm shard'ların toplamı (JSON uyumlu)"""
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, v in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0.0) + v
+            for key, (buckets, total) in list(shard.histograms.items()):
+                agg = histograms.setdefault(key, [[0] * len(buckets), 0.0])
+                agg[0] = [a + b for a, b in zip(agg[0], buckets)]
+                agg[1] += total
+        return {
+            "counters": [[name, list(labels), v] for (name, labels), v in counters.items()],
+            "histograms": [[name, list(labels), b, s] for (name, labels), (b, s) in histograms.items()],
+        }
+
+    def snapshot(self):
+        from src.models.registry import memory_usage
+
+        data = self.collect()
+        data["worker_id"] = self.worker_id
+        data["pid"] = os.getpid()
+        data["memory"] = memory_usage()
+        data["updated_at"] = time.time()
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write_json(self.snapshot_path, data)
+        except Exception as e:
+            logger.error(f"Metrics snapshot failed: {e}")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def compact(self) -> int:
+        """Ölü worker'ların snapshot'larını metrics_compacted.json'a katlar"""
+        try:
+            return compact_worker_snapshots(self.snapshot_path.parent, "metrics", _fold_snapshot)
+        except Exception as e:
+            logger.error(f"Metrics snapshot compaction failed: {e}")
+            return 0
+
+    def _run(self):
+        last_compact = 0.0
+        while not self._stop.wait(self.snapshot_interval):
+            self.snapshot()
+            if time.monotonic() - last_compact >= SNAPSHOT_COMPACT_INTERVAL:
+                self.compact()
+                last_compact = time.monotonic()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.snapshot()
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def _reset_after_fork():
+    global _metrics
+    _metrics = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Predict hot-path aşama süresi (engine ve app buradan kaydeder)"""
+    get_metrics().observe("churn_predict_stage_duration_seconds", (("stage", stage),), seconds)
+
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware (BaseHTTPMiddleware'in task/stream overhead'i yok).
+    Route etiketi path şablonudur (/admin/models/{version}), eşleşmeyen
+    path'ler "unmatched" olarak sayılır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            code = str(status[0])
+            m = get_metrics()
+            m.inc("churn_http_requests_total", (("route", path), ("method", scope["method"]), ("status", code)))
+            m.observe("churn_http_request_duration_seconds", (("route", path),), elapsed)
+            if status[0] >= 400:
+                m.inc("churn_http_errors_total", (("route", path), ("status", code)))
+
+
+def _accumulate(counters: Dict, histograms: Dict, data: Dict[str, Any]):
+    """Bir snapshot'ın sayaç/histogramlarını toplamlara ekler"""
+    for name, labels, v in data.get("counters", []):
+        key = (name, tuple(tuple(x) for x in labels))
+        counters[key] = counters.get(key, 0.0) + v
+    for name, labels, buckets, total in data.get("histograms", []):
+        key = (name, tuple(tuple(x) for x in labels))
+        agg = histograms.setdefault(key, [[0] * len(buckets), 0.0])
+        agg[0] = [a + b for a, b in zip(agg[0], buckets)]
+        agg[1] += total
+
+
+def _fold_snapshot(compacted: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Ölü worker snapshot'ını compacted dosyaya ekler (memory gauge'ları atılır)"""
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], List] = {}
+    _accumulate(counters, histograms, compacted)
+    _accumulate(counters, histograms, data)
+    return {
+        "counters": [[name, list(labels), v] for (name, labels), v in counters.items()],
+        "histograms": [[name, list(labels), b, s] for (name, labels), (b, s) in histograms.items()],
+        "updated_at": time.time(),
+    }
+
+
+def _merge_worker_snapshots() -> Tuple[Dict, Dict, Dict[str, int]]:
+    """
+    Tüm worker'ların sayaç/histogramlarını toplar.
+    Bu process'in payı dosyadan değil canlı bellekten alınır; RSS sadece
+    yaşayan worker'lar için raporlanır.
+    """
+    from src.models.registry import memory_usage
+
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], List] = {}
+    memory: Dict[str, Dict[str, int]] = {}
+
+    m = get_metrics()
+    for data in read_worker_snapshots(METRICS_DIR, "metrics", own=m.snapshot_path):
+        _accumulate(counters, histograms, data)
+        if data.get("pid") and pid_alive(int(data["pid"])):
+            memory[data.get("worker_id", str(data["pid"]))] = data.get("memory") or {}
+
+    _accumulate(counters, histograms, m.collect())
+    memory[m.worker_id] = memory_usage()
+    return counters, histograms, memory
+
+
+def _fmt_labels(labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + inner + "}"
+
+
+def _render_histogram(lines: List[str], name: str, labels, buckets, bounds, total: float):
+    cum = 0
+    for le, c in zip(list(bounds) + ["+Inf"], buckets):
+        cum += c
+        le_label = le if isinstance(le, str) else repr(float(le))
+        lines.append(f"{name}_bucket{_fmt_labels(tuple(labels) + (('le', le_label),))} {cum}")
+    lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+    lines.append(f"{name}_count{_fmt_labels(labels)} {cum}")
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition (version 0.0.4)"""
+    from src.models.registry import get_registry
+
+    counters, histograms, memory = _merge_worker_snapshots()
+    by_name: Dict[str, List[str]] = {name: [] for name in _HELP}
+
+    for (name, labels), v in sorted(counters.items()):
+        by_name.setdefault(name, []).append(f"{name}{_fmt_labels(labels)} {v}")
+
+    for (name, labels), (buckets, total) in sorted(histograms.items()):
+        _render_histogram(by_name.setdefault(name, []), name, labels, buckets, LATENCY_BUCKETS, total)
+
+    registry = get_registry()
+    for version in registry.versions():
+        lm = registry.get(version)
+        if lm is None:
+            continue
+        by_name["churn_model_load_seconds"].append(
+            f"churn_model_load_seconds{_fmt_labels((('version', version),))} {lm.load_seconds}"
+        )
+        active = 1 if version == registry.active_version else 0
+        by_name["churn_model_active"].append(f"churn_model_active{_fmt_labels((('version', version),))} {active}")
+
+    # Skor histogramı monitoring'in (worker'lar arası birleştirilmiş) istatistiklerinden
+    stats = get_global_stats()
+    hist = stats.get("histogram") or {}
+    if hist.get("counts"):
+        n_bins = hist["bins"]
+        bounds = [(i + 1) / n_bins for i in range(n_bins - 1)]
+        _render_histogram(by_name["churn_prediction_score"], "churn_prediction_score", (),
+                          hist["counts"], bounds, stats.get("sum", 0.0))
+
+    for worker, mem in sorted(memory.items()):
+        labels = _fmt_labels((("worker", worker),))
+        if "rss" in mem:
+            by_name["churn_process_resident_memory_bytes"].append(
+                f"churn_process_resident_memory_bytes{labels} {mem['rss']}"
+            )
+        if "pss" in mem:
+            by_name["churn_process_proportional_memory_bytes"].append(
+                f"churn_process_proportional_memory_bytes{labels} {mem['pss']}"
+            )
+
+    lines: List[str] = []
+    for name, samples in by_name.items():
+        if not samples:
+            continue
+        kind, help_text = _HELP.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
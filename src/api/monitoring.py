@@ -2,14 +2,26 @@
 Monitoring ve logging modülü
 Prediction request'leri ve probability dağılımlarını kaydeder
 """
+import atexit
+import gzip
 import json
 import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional
 import numpy as np
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.api.monitoring_store import get_monitoring_store
+
 # Logging yapılandırması
 logging.basicConfig(
     level=logging.INFO,
@@ -21,18 +33,256 @@ logger = logging.getLogger(__name__)
 MONITORING_DIR = Path("monitoring")
 PREDICTIONS_LOG = MONITORING_DIR / "predictions.log"
 PROBABILITY_STATS = MONITORING_DIR / "probability_stats.json"
+STATS_SNAPSHOT_DIR = MONITORING_DIR / "stats"
+
+# Worker'a özel kimlik (çoklu uvicorn worker'da snapshot dosyaları ayrışsın)
+WORKER_ID = f"{os.getpid()}-{int(time.time())}"
+
+# Log writer ayarları
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_FLUSH_SIZE = int(os.getenv("LOG_FLUSH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+LOG_MAX_SEGMENTS = int(os.getenv("LOG_MAX_SEGMENTS", "30"))
+LOG_SEGMENT_GLOB = "predictions-*.log.gz"
+
+# Probability istatistik ayarları
+STATS_SNAPSHOT_INTERVAL = float(os.getenv("STATS_SNAPSHOT_INTERVAL", "5.0"))
+HISTOGRAM_BINS = 20
+# Ölü worker snapshot'larının compacted dosyaya katlanma aralığı (sn)
+SNAPSHOT_COMPACT_INTERVAL = float(os.getenv("SNAPSHOT_COMPACT_INTERVAL", "60"))
 
 # Monitoring klasörünü oluştur
 MONITORING_DIR.mkdir(exist_ok=True)
 
 
-def log_prediction(request_data: Dict[str, Any], response_data: Dict[str, Any]):
+class PredictionLogWriter:
+    """
+    Arka planda çalışan, buffer'lı prediction log yazıcısı.
+
+    Request path sadece kuyruğa ekler; worker thread kayıtları toplar ve
+    boyut (flush_size) ya da süre (flush_interval) eşiğinde tek write ile
+    dosyaya basar. Kuyruk doluysa kayıt bekletilmeden düşürülür.
+
+    Kuyruk elemanları kayıt listeleridir: batch endpoint'lerinin satırları
+    (submit_many) tek eleman olarak girer, büyük bir batch kuyruğu doldurup
+    tekil prediction'ları düşürtmez.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_queue: int = LOG_QUEUE_SIZE,
+        flush_size: int = LOG_FLUSH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        max_bytes: int = LOG_MAX_BYTES,
+        max_segments: int = LOG_MAX_SEGMENTS,
+    ):
+        self.path = Path(path)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.write_errors = 0
+        self.rotations = 0
+        self.last_flush_at: Optional[str] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Kaydı kuyruğa ekler; kuyruk doluysa False döner (drop)"""
+        return self.submit_many([entry])
+
+    def submit_many(self, entries: List[Dict[str, Any]]) -> bool:
+        """Kayıtları tek kuyruk elemanı olarak ekler; kuyruk doluysa hepsi düşer"""
+        if not entries:
+            return True
+        try:
+            self._queue.put_nowait(entries)
+        except queue.Full:
+            self.dropped += len(entries)
+            return False
+        self.submitted += len(entries)
+        return True
+
+    def _drain(self, batch: List[Dict[str, Any]]):
+        while len(batch) < self.flush_size:
+            try:
+                batch.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def _open(self):
+        """
+        Dosya başka bir worker tarafından rotate edildiyse (inode değişti)
+        yeniden açar.
+        """
+        if self._file is not None:
+            try:
+                if os.fstat(self._file.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return self._file
+            except FileNotFoundError:
+                pass
+            self._file.close()
+        self._file = open(self.path, "a")
+        return self._file
+
+    def _rotate(self):
+        """
+        Aktif log'u zaman damgalı bir segment olarak gzip'ler ve
+        en eski segmentleri max_segments'a kadar siler.
+        """
+        self._file.close()
+        self._file = None
+
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        rotated = self.path.with_name(f"predictions-{stamp}.log")
+        os.replace(self.path, rotated)
+
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+        self.rotations += 1
+
+        segments = sorted(self.path.parent.glob(LOG_SEGMENT_GLOB))
+        for old in segments[:-self.max_segments] if self.max_segments > 0 else []:
+            old.unlink(missing_ok=True)
+
+        logger.info(f"Prediction log rotated: {rotated.name}.gz")
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        try:
+            f = self._open()
+            f.write("".join(json.dumps(e) + "\n" for e in batch))
+            f.flush()
+            self.written += len(batch)
+            self.flushes += 1
+            self.last_flush_at = datetime.now().isoformat()
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Prediction log write failed ({len(batch)} entries lost): {e}")
+            return
+
+        # Aynı batch zaman indeksli store'a (ham satır + rollup'lar)
+        store = get_monitoring_store(WORKER_ID)
+        if store is not None:
+            store.write_batch(batch)
+
+        if self.max_bytes > 0 and f.tell() >= self.max_bytes:
+            try:
+                self._rotate()
+            except Exception as e:
+                logger.error(f"Prediction log rotation failed: {e}")
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while not self._stop.is_set():
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.extend(self._queue.get(timeout=timeout))
+                self._drain(batch)
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.flush_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+        # Kapanış: kuyrukta kalan her şeyi yaz
+        while True:
+            self._drain(batch)
+            if not batch:
+                break
+            self._write(batch)
+            batch = []
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 5.0):
+        """Worker'ı durdurur ve kalan kayıtları diske yazar"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "write_errors": self.write_errors,
+            "rotations": self.rotations,
+            "last_flush_at": self.last_flush_at,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+_log_writer: Optional[PredictionLogWriter] = None
+_log_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> PredictionLogWriter:
+    """Process başına tek writer (ilk kullanımda başlatılır)"""
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                writer = PredictionLogWriter(PREDICTIONS_LOG)
+                writer.start()
+                _log_writer = writer
+    return _log_writer
+
+
+def shutdown_monitoring():
+    """Buffer'daki monitoring verisini diske yazar (shutdown/atexit)"""
+    global _log_writer, _stats_accumulator
+    if _log_writer is not None:
+        _log_writer.close()
+        _log_writer = None
+    if _stats_accumulator is not None:
+        _stats_accumulator.close()
+        _stats_accumulator = None
+
+
+atexit.register(shutdown_monitoring)
+
+
+def log_prediction(request_data: Dict[str, Any], response_data: Dict[str, Any]) -> bool:
     """
-    Prediction request ve response'u logla
+    Prediction request ve response'u log kuyruğuna ekle
+    (dosyaya yazma arka plandaki PredictionLogWriter'da yapılır)
     
     Args:
         request_data: API'ye gelen request verisi
         response_data: API'den dönen response verisi
+
+    Returns:
+        bool: Kayıt kuyruğa alındı mı? (kuyruk doluysa False)
     """
     log_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -42,60 +292,712 @@ def log_prediction(request_data: Dict[str, Any], response_data: Dict[str, Any]):
         "response": {
             "pred_label": response_data.get("pred_label"),
             "pred_proba_yes": response_data.get("pred_proba_yes"),
+            "model_version": response_data.get("model_version"),
         }
     }
     
-    # JSON formatında log dosyasına yaz
-    with open(PREDICTIONS_LOG, "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    accepted = get_log_writer().submit(log_entry)
     
-    logger.info(f"Prediction logged: {response_data.get('pred_label')} (prob: {response_data.get('pred_proba_yes'):.4f})")
+    logger.debug(f"Prediction queued: {response_data.get('pred_label')} (prob: {response_data.get('pred_proba_yes'):.4f})")
+    return accepted
 
 
-def update_probability_stats(probability: float):
+def log_predictions_batch(labels, probas, model_version: str, features_count: int) -> bool:
     """
-    Probability istatistiklerini güncelle
+    Batch endpoint'lerinin prediction'larını log kuyruğuna ekler
+    (log_prediction ile aynı kayıt formatı; tek kuyruk elemanı olarak)
+
+    Args:
+        labels: Skorlanan satırların label'ları
+        probas: Skorlanan satırların "Yes" olasılıkları
+        model_version: Skorlayan model versiyonu
+        features_count: Satır başına feature sayısı
+
+    Returns:
+        bool: Kayıtlar kuyruğa alındı mı? (kuyruk doluysa False)
+    """
+    timestamp = datetime.now().isoformat()
+    request = {"features_count": features_count}
+    entries = [
+        {
+            "timestamp": timestamp,
+            "request": request,
+            "response": {"pred_label": label, "pred_proba_yes": proba, "model_version": model_version},
+        }
+        for label, proba in zip(np.asarray(labels).tolist(), np.asarray(probas, dtype=float).tolist())
+    ]
+    return get_log_writer().submit_many(entries)
+
+
+class ProbabilityStats:
+    """
+    Streaming probability istatistikleri (tek geçişli, O(1) bellek)
+
+    count/sum/min/max, Welford ile mean/variance ve [0, 1] aralığında
+    sabit binli histogram (quantile tahmini için) tutar. İki örnek
+    Chan formülü ile birleştirilebilir (worker snapshot'larını toplamak için).
+    """
+
+    def __init__(self, bins: int = None):
+        self.bins = bins or HISTOGRAM_BINS
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = 1.0
+        self.max = 0.0
+        self.histogram = [0] * self.bins
+        self.updated_at: Optional[str] = None
+
+    def _bin(self, p: float) -> int:
+        return min(max(int(p * self.bins), 0), self.bins - 1)
+
+    @staticmethod
+    def _check(p: float) -> float:
+        p = float(p)
+        # NaN karşılaştırmaların hepsinde False döner, burada elenir
+        if not 0.0 <= p <= 1.0:
+            raise ValueError(f"Probability must be a finite value in [0, 1], got {p!r}")
+        return p
+
+    def update(self, p: float):
+        # Önce doğrulama: geçersiz değer state'i yarım güncellemesin
+        p = self._check(p)
+        self.count += 1
+        self.sum += p
+        delta = p - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (p - self.mean)
+        self.min = min(self.min, p)
+        self.max = max(self.max, p)
+        self.histogram[self._bin(p)] += 1
+        self.updated_at = datetime.now().isoformat()
+
+    def update_many(self, ps):
+        ps = np.asarray(ps, dtype=float)
+        if ps.size == 0:
+            return
+        if not ((ps >= 0.0) & (ps <= 1.0)).all():
+            raise ValueError("Probabilities must be finite values in [0, 1]")
+        other = ProbabilityStats(self.bins)
+        other.count = int(ps.size)
+        other.sum = float(ps.sum())
+        other.mean = float(ps.mean())
+        other.m2 = float(((ps - other.mean) ** 2).sum())
+        other.min = float(ps.min())
+        other.max = float(ps.max())
+        idx = np.clip((ps * self.bins).astype(int), 0, self.bins - 1)
+        other.histogram = np.bincount(idx, minlength=self.bins).tolist()
+        other.updated_at = datetime.now().isoformat()
+        self.merge(other)
+
+    def merge(self, other: "ProbabilityStats"):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.sum, self.mean, self.m2 = other.count, other.sum, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+        else:
+            n = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / n
+            self.m2 += other.m2 + delta * delta * self.count * other.count / n
+            self.count = n
+            self.sum += other.sum
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        if other.bins == self.bins:
+            self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        if other.updated_at and (self.updated_at is None or other.updated_at > self.updated_at):
+            self.updated_at = other.updated_at
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Histogramdan (bin içi lineer interpolasyon) quantile tahmini"""
+        total = sum(self.histogram)
+        if total == 0:
+            return None
+        target = q * total
+        cum = 0
+        for i, c in enumerate(self.histogram):
+            if c and cum + c >= target:
+                lo = i / self.bins
+                value = lo + (target - cum) / c / self.bins
+                return float(min(max(value, self.min), self.max))
+            cum += c
+        return float(self.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "variance": variance,
+            "std": variance ** 0.5,
+            "min": self.min,
+            "max": self.max,
+            "m2": self.m2,
+            "quantiles": {f"p{int(q * 100)}": self.quantile(q) for q in (0.5, 0.9, 0.95, 0.99)},
+            "histogram": {"bins": self.bins, "counts": list(self.histogram)},
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ProbabilityStats":
+        """Snapshot'tan yükler (eski formattaki probability_stats.json da okunur)"""
+        hist = d.get("histogram") or {}
+        stats = cls(hist.get("bins"))
+        stats.count = int(d.get("count", 0))
+        stats.sum = float(d.get("sum", 0.0))
+        stats.mean = float(d.get("mean", stats.sum / stats.count if stats.count else 0.0))
+        stats.m2 = float(d.get("m2", 0.0))
+        stats.min = float(d.get("min", 1.0))
+        stats.max = float(d.get("max", 0.0))
+        if hist.get("counts"):
+            stats.histogram = list(hist["counts"])
+        stats.updated_at = d.get("updated_at")
+        return stats
+
+
+def _atomic_write_json(path: Path, data: Any):
+    """Geçici dosyaya yazıp os.replace ile atomik olarak yerine koyar"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    """Dosya yoksa None (compaction sırasında silinmiş olabilir)"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def pid_alive(pid: int) -> bool:
+    """PID yaşıyor mu (POSIX dışında bilinemez, yaşıyor kabul edilir)"""
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def compacted_snapshot_path(directory: Path, prefix: str) -> Path:
+    return Path(directory) / f"{prefix}_compacted.json"
+
+
+def read_worker_snapshots(directory: Path, prefix: str, own: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """
+    <prefix>_compacted.json + worker'a özel <prefix>_<worker>.json snapshot'ları
+    (own hariç). Compacted dosyaya katlanmış ama henüz silinmemiş worker
+    dosyaları atlanır (çift sayım olmasın).
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+
+    out = []
+    folded = set()
+    compacted = compacted_snapshot_path(directory, prefix)
+    try:
+        data = _read_json(compacted)
+    except Exception as e:
+        logger.warning(f"Skipping unreadable snapshot {compacted}: {e}")
+        data = None
+    if data is not None:
+        folded = set(data.get("folded_workers") or [])
+        out.append(data)
+
+    for path in sorted(directory.glob(f"{prefix}_*.json")):
+        if path == compacted or path == own or path.stem[len(prefix) + 1:] in folded:
+            continue
+        try:
+            data = _read_json(path)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable snapshot {path}: {e}")
+            continue
+        if data is not None:
+            out.append(data)
+    return out
+
+
+def compact_worker_snapshots(directory: Path, prefix: str,
+                             fold: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]) -> int:
+    """
+    PID'i artık yaşamayan worker'ların <prefix>_<pid>-<ts>.json snapshot'larını
+    <prefix>_compacted.json'a katlar ve siler; worker yeniden başlatmalarıyla
+    dosya sayısı büyümez.
+
+    fold(compacted, snapshot) -> compacted. Aynı anda tek process compact eder
+    (flock); fcntl olmayan platformlarda atlanır. Katlanan worker'lar
+    compacted dosyada "folded_workers" olarak tutulur: silme yarıda kalırsa
+    okuyucular ve sonraki compaction o dosyaları tekrar saymaz.
+
+    Returns:
+        int: katlanan snapshot sayısı
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return 0
+
+    directory = Path(directory)
+    if not directory.exists():
+        return 0
+
+    with open(directory / f".{prefix}.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return 0
+
+        path_c = compacted_snapshot_path(directory, prefix)
+        compacted = _read_json(path_c) or {}
+        already = set(compacted.get("folded_workers") or [])
+
+        dead = []
+        for path in directory.glob(f"{prefix}_*.json"):
+            worker = path.stem[len(prefix) + 1:]
+            pid = worker.split("-", 1)[0]
+            if not pid.isdigit() or pid_alive(int(pid)):
+                continue
+            if worker in already:
+                path.unlink(missing_ok=True)
+            else:
+                dead.append((worker, path))
+
+        folded = []
+        for worker, path in dead:
+            try:
+                data = _read_json(path)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable snapshot {path}: {e}")
+                continue
+            if data is not None:
+                compacted = fold(compacted, data)
+                folded.append((worker, path))
+        if not folded:
+            return 0
+
+        compacted["folded_workers"] = [w for w, _ in folded]
+        compacted["compacted_at"] = datetime.now().isoformat()
+        _atomic_write_json(path_c, compacted)
+        for _, path in folded:
+            path.unlink(missing_ok=True)
+        return len(folded)
+
+
+def _fold_probability_stats(compacted: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    stats = ProbabilityStats.from_dict(compacted) if compacted.get("count") else ProbabilityStats()
+    stats.merge(ProbabilityStats.from_dict(data))
+    return stats.to_dict()
+
+
+def _fold_shadow_stats(compacted: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    stats = ShadowStats()
+    stats.merge_dict(compacted)
+    stats.merge_dict(data)
+    return stats.to_dict()
+
+
+class StatsAccumulator:
+    """
+    Process içi probability accumulator.
+
+    Request path sadece bellekteki ProbabilityStats'ı günceller; arka plan
+    thread'i snapshot_interval'da bir (değişiklik varsa) worker'a özel
+    snapshot dosyasını atomik olarak yazar.
+    """
+
+    def __init__(self, snapshot_dir: Path, snapshot_interval: float = STATS_SNAPSHOT_INTERVAL):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_path = self.snapshot_dir / f"probability_stats_{WORKER_ID}.json"
+        self.stats = ProbabilityStats()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="probability-stats-snapshot", daemon=True)
+        self._thread.start()
+
+    def update(self, p: float):
+        with self._lock:
+            self.stats.update(p)
+            self._dirty = True
+
+    def update_many(self, ps):
+        with self._lock:
+            self.stats.update_many(ps)
+            self._dirty = True
+
+    def local(self) -> ProbabilityStats:
+        with self._lock:
+            return ProbabilityStats.from_dict(self.stats.to_dict())
+
+    def snapshot(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = self.stats.to_dict()
+            self._dirty = False
+        data["worker_id"] = WORKER_ID
+        try:
+            _atomic_write_json(self.snapshot_path, data)
+        except Exception as e:
+            logger.error(f"Probability stats snapshot failed: {e}")
+
+    def compact(self) -> int:
+        """Ölü worker'ların probability/shadow snapshot'larını katlar"""
+        try:
+            return (compact_worker_snapshots(self.snapshot_dir, "probability_stats", _fold_probability_stats)
+                    + compact_worker_snapshots(self.snapshot_dir, "shadow_stats", _fold_shadow_stats))
+        except Exception as e:
+            logger.error(f"Stats snapshot compaction failed: {e}")
+            return 0
+
+    def _run(self):
+        last_compact = 0.0
+        while not self._stop.wait(self.snapshot_interval):
+            self.snapshot()
+            if _shadow_stats is not None:
+                _shadow_stats.snapshot()
+            if time.monotonic() - last_compact >= SNAPSHOT_COMPACT_INTERVAL:
+                self.compact()
+                last_compact = time.monotonic()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.snapshot()
+        if _shadow_stats is not None:
+            _shadow_stats.snapshot()
+
+
+_stats_accumulator: Optional[StatsAccumulator] = None
+_stats_lock = threading.Lock()
+
+
+def get_stats_accumulator() -> StatsAccumulator:
+    global _stats_accumulator
+    if _stats_accumulator is None:
+        with _stats_lock:
+            if _stats_accumulator is None:
+                acc = StatsAccumulator(STATS_SNAPSHOT_DIR)
+                acc.start()
+                _stats_accumulator = acc
+    return _stats_accumulator
+
+
+def update_probability_stats(probability: float) -> ProbabilityStats:
+    """
+    Probability istatistiklerini bellekte güncelle
+    (diske yazma periyodik snapshot ile yapılır)
     
     Args:
         probability: Tahmin olasılığı (0-1 arası)
     """
-    # Mevcut istatistikleri yükle
+    acc = get_stats_accumulator()
+    acc.update(probability)
+    return acc.stats
+
+
+def update_probability_stats_batch(probabilities) -> ProbabilityStats:
+    """Batch skorlama için vektörize güncelleme"""
+    acc = get_stats_accumulator()
+    acc.update_many(probabilities)
+    return acc.stats
+
+
+def get_global_stats() -> Dict[str, Any]:
+    """
+    Tüm worker'ların snapshot'larını birleştirerek global görünümü döndürür.
+    Bu process'in kendi payı snapshot yerine canlı bellekten alınır.
+    """
+    merged = ProbabilityStats()
+    sources = 0
+
+    own = _stats_accumulator.snapshot_path if _stats_accumulator is not None else None
+    for data in read_worker_snapshots(STATS_SNAPSHOT_DIR, "probability_stats", own):
+        merged.merge(ProbabilityStats.from_dict(data))
+        sources += 1
+
+    # Eski (tek dosyalı) formattaki istatistikler de dahil edilir
     if PROBABILITY_STATS.exists():
         try:
             with open(PROBABILITY_STATS, "r") as f:
-                stats = json.load(f)
-        except Exception:
-            stats = {
-                "count": 0,
-                "sum": 0.0,
-                "mean": 0.0,
-                "min": 1.0,
-                "max": 0.0,
-                "updated_at": None
-            }
-    else:
-        stats = {
-            "count": 0,
-            "sum": 0.0,
-            "mean": 0.0,
-            "min": 1.0,
-            "max": 0.0,
-            "updated_at": None
+                merged.merge(ProbabilityStats.from_dict(json.load(f)))
+            sources += 1
+        except Exception as e:
+            logger.warning(f"Skipping unreadable stats snapshot {PROBABILITY_STATS}: {e}")
+
+    if _stats_accumulator is not None:
+        merged.merge(_stats_accumulator.local())
+        sources += 1
+
+    out = merged.to_dict()
+    out["sources"] = sources
+    return out
+
+
+# Latency histogramı için bucket üst sınırları (ms)
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyStats:
+    """Sabit bucket'lı latency histogramı (birleştirilebilir, O(1) bellek)"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def update(self, seconds: float):
+        ms = seconds * 1000.0
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        i = 0
+        while i < len(LATENCY_BUCKETS_MS) and ms > LATENCY_BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+
+    def merge(self, other: "LatencyStats"):
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket üst sınırı olarak (tahmini) quantile"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cum = 0
+        for i, c in enumerate(self.buckets):
+            cum += c
+            if c and cum >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": self.sum_ms / self.count if self.count else None,
+            "max_ms": self.max_ms,
+            "sum_ms": self.sum_ms,
+            "quantiles_ms": {f"p{int(q * 100)}": self.quantile(q) for q in (0.5, 0.95, 0.99)},
+            "buckets": {"le_ms": list(LATENCY_BUCKETS_MS), "counts": list(self.buckets)},
         }
-    
-    # İstatistikleri güncelle
-    stats["count"] += 1
-    stats["sum"] += probability
-    stats["mean"] = stats["sum"] / stats["count"]
-    stats["min"] = min(stats["min"], probability)
-    stats["max"] = max(stats["max"], probability)
-    stats["updated_at"] = datetime.now().isoformat()
-    
-    # Kaydet
-    with open(PROBABILITY_STATS, "w") as f:
-        json.dump(stats, f, indent=2)
-    
-    return stats
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "LatencyStats":
+        stats = cls()
+        stats.count = int(d.get("count", 0))
+        stats.sum_ms = float(d.get("sum_ms", 0.0))
+        stats.max_ms = float(d.get("max_ms", 0.0))
+        counts = (d.get("buckets") or {}).get("counts")
+        if counts and len(counts) == len(stats.buckets):
+            stats.buckets = list(counts)
+        return stats
+
+
+class ShadowComparison:
+    """Bir aday (shadow) versiyonun primary modelle karşılaştırması"""
+
+    def __init__(self):
+        self.count = 0
+        self.agree = 0
+        self.errors = 0
+        self.shed = 0
+        self.delta_sum = 0.0
+        # |p_shadow - p_primary| dağılımı ([0, 1] aralığında)
+        self.abs_delta = ProbabilityStats()
+        self.latency = LatencyStats()
+
+    def merge(self, other: "ShadowComparison"):
+        self.count += other.count
+        self.agree += other.agree
+        self.errors += other.errors
+        self.shed += other.shed
+        self.delta_sum += other.delta_sum
+        self.abs_delta.merge(other.abs_delta)
+        self.latency.merge(other.latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "agree": self.agree,
+            "agreement_rate": self.agree / self.count if self.count else None,
+            "mean_delta": self.delta_sum / self.count if self.count else None,
+            "delta_sum": self.delta_sum,
+            "abs_delta": self.abs_delta.to_dict(),
+            "latency": self.latency.to_dict(),
+            "errors": self.errors,
+            "shed": self.shed,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ShadowComparison":
+        c = cls()
+        c.count = int(d.get("count", 0))
+        c.agree = int(d.get("agree", 0))
+        c.errors = int(d.get("errors", 0))
+        c.shed = int(d.get("shed", 0))
+        c.delta_sum = float(d.get("delta_sum", 0.0))
+        c.abs_delta = ProbabilityStats.from_dict(d.get("abs_delta") or {})
+        c.latency = LatencyStats.from_dict(d.get("latency") or {})
+        return c
+
+
+class ShadowStats:
+    """
+    Shadow / canary karşılaştırma istatistikleri (process içi).
+
+    pairs: "primary->shadow" anahtarıyla ShadowComparison
+    latency: versiyon bazlı skorlama süresi (primary ve shadow)
+    Snapshot'ları StatsAccumulator thread'i worker'a özel dosyaya yazar.
+    """
+
+    def __init__(self, snapshot_dir: Path = STATS_SNAPSHOT_DIR):
+        self.snapshot_path = Path(snapshot_dir) / f"shadow_stats_{WORKER_ID}.json"
+        self.pairs: Dict[str, ShadowComparison] = {}
+        self.latency: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def pair_key(primary: str, shadow: str) -> str:
+        return f"{primary}->{shadow}"
+
+    def _pair(self, primary: str, shadow: str) -> ShadowComparison:
+        key = self.pair_key(primary, shadow)
+        pair = self.pairs.get(key)
+        if pair is None:
+            pair = self.pairs[key] = ShadowComparison()
+        return pair
+
+    def record_latency(self, version: str, seconds: float):
+        with self._lock:
+            stats = self.latency.get(version)
+            if stats is None:
+                stats = self.latency[version] = LatencyStats()
+            stats.update(seconds)
+            self._dirty = True
+
+    def record_comparison(self, primary: str, shadow: str, primary_label, primary_proba: float,
+                          shadow_label, shadow_proba: float, seconds: float):
+        delta = shadow_proba - primary_proba
+        with self._lock:
+            pair = self._pair(primary, shadow)
+            # abs_delta.update geçersiz değerde raise eder; sayaçlardan önce
+            pair.abs_delta.update(abs(delta))
+            pair.count += 1
+            pair.agree += int(shadow_label == primary_label)
+            pair.delta_sum += delta
+            pair.latency.update(seconds)
+            self._dirty = True
+
+    def record_error(self, primary: str, shadow: str):
+        with self._lock:
+            self._pair(primary, shadow).errors += 1
+            self._dirty = True
+
+    def record_shed(self, primary: str, shadow: str):
+        with self._lock:
+            self._pair(primary, shadow).shed += 1
+            self._dirty = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pairs": {k: v.to_dict() for k, v in self.pairs.items()},
+                "latency": {k: v.to_dict() for k, v in self.latency.items()},
+            }
+
+    def merge_dict(self, d: Dict[str, Any]):
+        """Başka bir worker'ın snapshot'ını bu örneğe ekler"""
+        for key, pair in (d.get("pairs") or {}).items():
+            if key not in self.pairs:
+                self.pairs[key] = ShadowComparison()
+            self.pairs[key].merge(ShadowComparison.from_dict(pair))
+        for version, lat in (d.get("latency") or {}).items():
+            if version not in self.latency:
+                self.latency[version] = LatencyStats()
+            self.latency[version].merge(LatencyStats.from_dict(lat))
+
+    def snapshot(self):
+        if not self._dirty:
+            return
+        data = self.to_dict()
+        self._dirty = False
+        data["worker_id"] = WORKER_ID
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write_json(self.snapshot_path, data)
+        except Exception as e:
+            logger.error(f"Shadow stats snapshot failed: {e}")
+
+
+_shadow_stats: Optional[ShadowStats] = None
+
+
+def get_shadow_stats() -> ShadowStats:
+    global _shadow_stats
+    if _shadow_stats is None:
+        with _stats_lock:
+            if _shadow_stats is None:
+                _shadow_stats = ShadowStats()
+        # Snapshot thread'i StatsAccumulator'da çalışır
+        get_stats_accumulator()
+    return _shadow_stats
+
+
+def get_global_shadow_stats() -> Dict[str, Any]:
+    """Tüm worker'ların shadow snapshot'ları + bu process'in canlı verisi"""
+    merged = ShadowStats()
+    own = _shadow_stats.snapshot_path if _shadow_stats is not None else None
+    for data in read_worker_snapshots(STATS_SNAPSHOT_DIR, "shadow_stats", own):
+        merged.merge_dict(data)
+
+    if _shadow_stats is not None:
+        merged.merge_dict(_shadow_stats.to_dict())
+
+    return merged.to_dict()
+
+
+def _reset_after_fork():
+    """
+    Fork edilen worker (serve.py) parent'ın writer/snapshot thread'lerini
+    devralmaz; kendi kimliği ve singleton'ları ile ilk kullanımda başlar.
+    """
+    global WORKER_ID, _log_writer, _log_writer_lock, _stats_accumulator, _stats_lock, _shadow_stats
+    WORKER_ID = f"{os.getpid()}-{int(time.time())}"
+    _log_writer = None
+    _log_writer_lock = threading.Lock()
+    _stats_accumulator = None
+    _stats_lock = threading.Lock()
+    _shadow_stats = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def check_drift(reference_mean: float = None, threshold: float = 0.1):
@@ -110,12 +1012,10 @@ def check_drift(reference_mean: float = None, threshold: float = 0.1):
         bool: Drift tespit edildi mi?
         dict: Drift bilgileri
     """
-    if not PROBABILITY_STATS.exists():
+    stats = get_global_stats()
+    if stats["count"] == 0:
         return False, {"error": "İstatistik bulunamadı"}
     
-    with open(PROBABILITY_STATS, "r") as f:
-        stats = json.load(f)
-    
     current_mean = stats.get("mean", 0.0)
     
     # Referans mean yoksa drift kontrolü yapılamaz
@@ -144,7 +1044,53 @@ def check_drift(reference_mean: float = None, threshold: float = 0.1):
     return is_drift, drift_info
 
 
-def get_recent_predictions(n: int = 100) -> pd.DataFrame:
+def _tail_lines(path: Path, n: int, block_size: int = 64 * 1024) -> List[bytes]:
+    """
+    Dosyanın sonundan geriye doğru blok blok okuyarak son N tam satırı döndürür.
+    Maliyet dosya boyutundan bağımsız, O(N).
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        blocks: List[bytes] = []
+        newlines = 0
+
+        # N tam satır için N+1 satır sonu gerekir (ilk satır yarım olabilir)
+        while pos > 0 and newlines <= n:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    lines = b"".join(reversed(blocks)).splitlines()
+    if pos > 0:
+        lines = lines[1:]
+    return lines[-n:]
+
+
+def _read_recent_lines(n: int) -> List[bytes]:
+    """
+    Son N log satırı (eskiden yeniye). Aktif dosya yetmezse en yeni
+    sıkıştırılmış segmentlerden tamamlanır.
+    """
+    lines: List[bytes] = []
+    if PREDICTIONS_LOG.exists():
+        lines = _tail_lines(PREDICTIONS_LOG, n)
+
+    for segment in sorted(MONITORING_DIR.glob(LOG_SEGMENT_GLOB), reverse=True):
+        if len(lines) >= n:
+            break
+        # Segment satır satır açılır; bellekte sadece gereken son satırlar kalır
+        with gzip.open(segment, "rb") as f:
+            older = deque((line.rstrip(b"\r\n") for line in f), maxlen=n - len(lines))
+        lines = list(older) + lines
+
+    return lines
+
+
+def get_recent_predictions(n: int = 100) -> "pd.DataFrame":
     """
     Son N prediction'ı pandas DataFrame olarak döndür
     
@@ -154,20 +1100,21 @@ def get_recent_predictions(n: int = 100) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Prediction logları
     """
-    if not PREDICTIONS_LOG.exists():
+    # pandas sadece bu fonksiyonda kullanılır; API import'unu yavaşlatmasın
+    import pandas as pd
+
+    if n <= 0:
         return pd.DataFrame()
     
-    # Log dosyasından son N satırı oku
+    # Log dosyasının sonundan N satır oku (tüm dosya belleğe alınmaz)
     predictions = []
     try:
-        with open(PREDICTIONS_LOG, "r") as f:
-            lines = f.readlines()
-            for line in lines[-n:]:
-                try:
-                    pred = json.loads(line.strip())
-                    predictions.append(pred)
-                except json.JSONDecodeError:
-                    continue
+        for line in _read_recent_lines(n):
+            try:
+                pred = json.loads(line.strip())
+                predictions.append(pred)
+            except json.JSONDecodeError:
+                continue
         
         if predictions:
             df = pd.json_normalize(predictions)
@@ -176,4 +1123,3 @@ def get_recent_predictions(n: int = 100) -> pd.DataFrame:
         logger.error(f"Error reading predictions log: {e}")
     
     return pd.DataFrame()
-
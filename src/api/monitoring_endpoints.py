@@ -1,30 +1,54 @@
 """
 Monitoring için API endpoints
 """
-from fastapi import APIRouter
-from src.api.monitoring import get_recent_predictions, check_drift, PROBABILITY_STATS
-import json
-from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from src.api.monitoring import (
+    WORKER_ID,
+    check_drift,
+    get_global_shadow_stats,
+    get_global_stats,
+    get_log_writer,
+    get_recent_predictions,
+)
+from src.api.drift import get_drift_monitor
+from src.api.shadow import get_traffic_splitter
+from src.api.prediction_cache import get_prediction_cache
+from src.api.batching import get_micro_batcher
+from src.data.feature_store import get_feature_store
+from src.api.monitoring_store import BUCKETS, get_monitoring_store
+from src.api.feature_capture import FEATURE_CAPTURE_DIR, capture_summary, get_feature_capture
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 
 @router.get("/stats")
 def get_stats():
-    """Probability istatistiklerini döndür"""
-    if not PROBABILITY_STATS.exists():
+    """Probability istatistiklerini döndür (tüm worker'lar birleştirilmiş)"""
+    stats = get_global_stats()
+    if stats["count"] == 0:
         return {"error": "İstatistik bulunamadı", "count": 0}
     
-    with open(PROBABILITY_STATS, "r") as f:
-        stats = json.load(f)
-    
     return stats
 
 
 @router.get("/drift")
-def check_drift_endpoint(reference_mean: float = None, threshold: float = 0.1):
-    """Drift kontrolü yap"""
+def check_drift_endpoint(reference_mean: float = None, threshold: float = 0.1, window_minutes: int = None):
+    """
+    Drift kontrolü yap
+    - reference_mean verilirse: lifetime ortalama karşılaştırması
+    - Referans profil varsa: pencere bazlı PSI / KS / chi-square (feature bazlı)
+    """
     is_drift, drift_info = check_drift(reference_mean=reference_mean, threshold=threshold)
+
+    monitor = get_drift_monitor()
+    if monitor is None:
+        drift_info["distribution"] = {"status": "profile_not_loaded"}
+    else:
+        drift_info["distribution"] = monitor.report(window_minutes=window_minutes)
+
     return drift_info
 
 
@@ -44,3 +68,110 @@ def get_predictions(limit: int = 100):
         "count": len(predictions)
     }
 
+
+
+@router.get("/logger")
+def get_logger_stats():
+    """Prediction log writer kuyruk ve sayaç bilgileri"""
+    return get_log_writer().stats()
+
+
+@router.get("/shadow")
+def get_shadow_stats_endpoint():
+    """Shadow / canary karşılaştırmaları (uyum oranı, probability farkı, versiyon bazlı latency)"""
+    stats = get_global_shadow_stats()
+    stats["config"] = get_traffic_splitter().status()
+    return stats
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Prediction cache hit/miss/eviction sayaçları"""
+    return get_prediction_cache().stats()
+
+
+@router.get("/batching")
+def get_batching_stats():
+    """/predict micro-batching: batch boyutu histogramı ve kuyruk durumu"""
+    return get_micro_batcher().stats()
+
+
+@router.get("/feature-store")
+def get_feature_store_stats():
+    """Customer ID feature tablosu: satır sayısı, kaynak ve lookup sayaçları"""
+    store = get_feature_store()
+    if store is None:
+        return {"available": False}
+    return {"available": True, **store.stats()}
+
+
+@router.get("/capture")
+def get_capture_stats(hours: float = 24):
+    """Feature capture: bu worker'ın writer sayaçları + son `hours` saatin segment özeti"""
+    writer = get_feature_capture(WORKER_ID)
+    start = datetime.now() - timedelta(hours=hours)
+    return {
+        "enabled": writer is not None,
+        "writer": writer.stats() if writer is not None else None,
+        "segments": capture_summary(FEATURE_CAPTURE_DIR, start=start),
+    }
+
+
+def _require_store():
+    # Singleton'u ilk çağıran oluşturur; ham satırların worker kolonu buna bağlı
+    store = get_monitoring_store(WORKER_ID)
+    if store is None:
+        raise HTTPException(status_code=503, detail="Monitoring store disabled (MONITORING_STORE_ENABLED=false).")
+    return store
+
+
+def _time_range(start: Optional[datetime], end: Optional[datetime], default: timedelta):
+    end_ts = (end or datetime.now()).timestamp()
+    start_ts = start.timestamp() if start is not None else end_ts - default.total_seconds()
+    if start_ts >= end_ts:
+        raise HTTPException(status_code=422, detail="'start' must be before 'end'.")
+    return start_ts, end_ts
+
+
+@router.get("/timeseries")
+def get_timeseries(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "hour",
+    model_version: Optional[str] = None,
+    by_version: bool = False,
+):
+    """
+    Bucket bazlı tahmin sayısı / churn oranı / probability istatistikleri
+    (örn. son 7 günün saatlik churn oranı). Varsayılan aralık: son 7 gün.
+    """
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=422, detail=f"bucket must be one of {list(BUCKETS)}")
+    start_ts, end_ts = _time_range(start, end, timedelta(days=7))
+    series = _require_store().aggregate(start_ts, end_ts, bucket, model_version, by_version)
+    return {"bucket": bucket, "count": len(series), "series": series}
+
+
+@router.get("/predictions/range")
+def get_predictions_range(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    model_version: Optional[str] = None,
+    limit: int = 1000,
+):
+    """Zaman aralığındaki ham prediction'lar (ts indeksi). Varsayılan aralık: son 1 saat."""
+    start_ts, end_ts = _time_range(start, end, timedelta(hours=1))
+    rows = _require_store().query_range(start_ts, end_ts, model_version, limit)
+    return {"predictions": rows, "count": len(rows)}
+
+
+@router.get("/store")
+def get_store_stats():
+    """Monitoring store boyutu, satır / bucket sayıları ve retention ayarları"""
+    return _require_store().stats()
+
+
+@router.post("/store/compact")
+def compact_store():
+    """Retention'ı hemen uygula (normalde writer thread'de periyodik çalışır)"""
+    return _require_store().compact()
@@ -0,0 +1,367 @@
+"""
+Prediction'lar için zaman indeksli monitoring store (SQLite, WAL)
+
+predictions.log sadece "son N" sorusuna cevap verebiliyor. PredictionLogWriter
+her flush'ta aynı batch'i buraya da yazar:
+
+    predictions      ham satırlar (ts indeksli), RAW_RETENTION_DAYS kadar tutulur
+    rollup_minute    dakika x model_version toplamları, MINUTE_RETENTION_DAYS
+    rollup_hour      saat x model_version toplamları, HOUR_RETENTION_DAYS
+
+Rollup'lar her batch'te artımlı güncellenir (INSERT .. ON CONFLICT DO UPDATE
+ile toplama); toplamlar additive olduğu için birden fazla worker process aynı
+dosyaya güvenle yazar. Aggregate sorgular ham tabloyu taramaz, sadece ilgili
+rollup aralığını okur.
+
+Ayarlar:
+    MONITORING_STORE_ENABLED=true
+    MONITORING_STORE_PATH=monitoring/monitoring.db
+    RAW_RETENTION_DAYS=7  MINUTE_RETENTION_DAYS=30  HOUR_RETENTION_DAYS=365
+    MONITORING_COMPACT_INTERVAL=3600   (sn; writer thread'de retention/compaction)
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MONITORING_STORE_ENABLED = os.getenv("MONITORING_STORE_ENABLED", "true").lower() == "true"
+MONITORING_STORE_PATH = Path(os.getenv("MONITORING_STORE_PATH", "monitoring/monitoring.db"))
+RAW_RETENTION_DAYS = float(os.getenv("RAW_RETENTION_DAYS", "7"))
+MINUTE_RETENTION_DAYS = float(os.getenv("MINUTE_RETENTION_DAYS", "30"))
+HOUR_RETENTION_DAYS = float(os.getenv("HOUR_RETENTION_DAYS", "365"))
+MONITORING_COMPACT_INTERVAL = float(os.getenv("MONITORING_COMPACT_INTERVAL", "3600"))
+
+POSITIVE_LABEL = "Yes"
+DAY = 86400
+# bucket adı -> (rollup tablosu, tablonun bucket genişliği, istenen genişlik) (sn)
+BUCKETS = {
+    "minute": ("rollup_minute", 60, 60),
+    "hour": ("rollup_hour", 3600, 3600),
+    "day": ("rollup_hour", 3600, DAY),
+}
+RAW_QUERY_LIMIT = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    ts REAL NOT NULL,
+    model_version TEXT,
+    pred_label TEXT,
+    pred_proba_yes REAL,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+"""
+
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    bucket INTEGER NOT NULL,
+    model_version TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    positives INTEGER NOT NULL,
+    proba_sum REAL NOT NULL,
+    proba_sq_sum REAL NOT NULL,
+    proba_min REAL NOT NULL,
+    proba_max REAL NOT NULL,
+    PRIMARY KEY (bucket, model_version)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO {table} (bucket, model_version, count, positives, proba_sum, proba_sq_sum, proba_min, proba_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bucket, model_version) DO UPDATE SET
+    count = count + excluded.count,
+    positives = positives + excluded.positives,
+    proba_sum = proba_sum + excluded.proba_sum,
+    proba_sq_sum = proba_sq_sum + excluded.proba_sq_sum,
+    proba_min = MIN(proba_min, excluded.proba_min),
+    proba_max = MAX(proba_max, excluded.proba_max)
+"""
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _entry_row(entry: Dict[str, Any], worker: str) -> Optional[tuple]:
+    """
+    Log kaydı -> (ts, model_version, pred_label, pred_proba_yes, worker)
+
+    Rollup kolonları NOT NULL olduğundan geçersiz kayıtlar (proba yok, sayı
+    değil, NaN/inf ya da [0, 1] dışında; model_version yok) None döner ve
+    yazılmaz; aksi halde tek kayıt bütün batch'in transaction'ını düşürür.
+    """
+    response = entry.get("response") if isinstance(entry, dict) else None
+    if not isinstance(response, dict):
+        return None
+    version = response.get("model_version")
+    try:
+        proba = float(response.get("pred_proba_yes"))
+    except (TypeError, ValueError):
+        return None
+    if version is None or not 0.0 <= proba <= 1.0:  # NaN karşılaştırmada False
+        return None
+    label = response.get("pred_label")
+    try:
+        ts = datetime.fromisoformat(entry["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        ts = time.time()
+    return ts, str(version), None if label is None else str(label), proba, worker
+
+
+def _rollup(rows: List[tuple], width: int) -> List[tuple]:
+    acc: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0, 1.0, 0.0])
+    for ts, version, label, p, _ in rows:
+        a = acc[(int(ts // width) * width, version)]
+        a[0] += 1
+        a[1] += label == POSITIVE_LABEL
+        a[2] += p
+        a[3] += p * p
+        a[4] = min(a[4], p)
+        a[5] = max(a[5], p)
+    return [(bucket, version, *a) for (bucket, version), a in acc.items()]
+
+
+class MonitoringStore:
+    """
+    Yazma PredictionLogWriter thread'inden (write_batch), okuma API
+    thread'lerinden yapılır; sqlite3 bağlantıları thread başına açılır.
+    """
+
+    def __init__(self, path: Path = MONITORING_STORE_PATH, worker_id: str = ""):
+        self.path = Path(path)
+        self.worker_id = worker_id
+        self._local = threading.local()
+        self._last_compact = time.monotonic()
+
+        self.batches = 0
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.write_errors = 0
+        self.compactions = 0
+        self.last_compaction: Optional[Dict[str, Any]] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # auto_vacuum tablolar oluşturulmadan ve WAL'a geçmeden önce ayarlanmalı
+        # (silinen sayfalar incremental_vacuum ile dosyadan geri verilebilsin)
+        conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=10.0)
+        try:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.executescript(_SCHEMA)
+            for table in ("rollup_minute", "rollup_hour"):
+                conn.executescript(_ROLLUP_SCHEMA.format(table=table))
+        finally:
+            conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -------------------------
+    # Yazma (writer thread)
+    # -------------------------
+    def write_batch(self, entries: List[Dict[str, Any]]):
+        """Ham satırlar + dakika/saat rollup'ları tek transaction'da"""
+        rows = [r for r in (_entry_row(e, self.worker_id) for e in entries) if r is not None]
+        rejected = len(entries) - len(rows)
+        if rejected:
+            self.rows_rejected += rejected
+            logger.warning(f"Monitoring store skipped {rejected} invalid entries")
+        if not rows:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO predictions (ts, model_version, pred_label, pred_proba_yes, worker) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(_ROLLUP_UPSERT.format(table="rollup_minute"), _rollup(rows, 60))
+            conn.executemany(_ROLLUP_UPSERT.format(table="rollup_hour"), _rollup(rows, 3600))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.write_errors += 1
+            logger.error(f"Monitoring store write failed ({len(rows)} rows lost): {e}")
+            return
+        self.batches += 1
+        self.rows_written += len(rows)
+
+        if MONITORING_COMPACT_INTERVAL > 0 and time.monotonic() - self._last_compact >= MONITORING_COMPACT_INTERVAL:
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Monitoring store compaction failed: {e}")
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Retention: eski ham satırları ve rollup'ları siler, boş sayfaları geri verir"""
+        now = time.time() if now is None else now
+        self._last_compact = time.monotonic()
+        conn = self._conn()
+        t0 = time.perf_counter()
+        deleted = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted["predictions"] = conn.execute(
+                "DELETE FROM predictions WHERE ts < ?", (now - RAW_RETENTION_DAYS * DAY,)
+            ).rowcount
+            deleted["rollup_minute"] = conn.execute(
+                "DELETE FROM rollup_minute WHERE bucket < ?", (now - MINUTE_RETENTION_DAYS * DAY,)
+            ).rowcount
+            deleted["rollup_hour"] = conn.execute(
+                "DELETE FROM rollup_hour WHERE bucket < ?", (now - HOUR_RETENTION_DAYS * DAY,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        self.compactions += 1
+        self.last_compaction = {
+            "at": _iso(now),
+            "deleted": deleted,
+            "seconds": time.perf_counter() - t0,
+        }
+        if any(deleted.values()):
+            logger.info(f"Monitoring store compacted: {deleted}")
+        return self.last_compaction
+
+    # -------------------------
+    # Okuma (API)
+    # -------------------------
+    def query_range(self, start: float, end: float, model_version: Optional[str] = None,
+                    limit: int = RAW_QUERY_LIMIT) -> List[Dict[str, Any]]:
+        """[start, end) aralığındaki ham prediction'lar (ts indeksi üzerinden)"""
+        sql = "SELECT ts, model_version, pred_label, pred_proba_yes, worker FROM predictions WHERE ts >= ? AND ts < ?"
+        params: List[Any] = [start, end]
+        if model_version is not None:
+            sql += " AND model_version = ?"
+            params.append(model_version)
+        sql += " ORDER BY ts LIMIT ?"
+        params.append(max(1, min(limit, RAW_QUERY_LIMIT)))
+        return [
+            {"timestamp": _iso(ts), "model_version": v, "pred_label": label, "pred_proba_yes": p, "worker": w}
+            for ts, v, label, p, w in self._conn().execute(sql, params)
+        ]
+
+    def aggregate(self, start: float, end: float, bucket: str = "hour", model_version: Optional[str] = None,
+                  by_version: bool = False) -> List[Dict[str, Any]]:
+        """
+        Bucket bazlı toplamlar (rollup tablolarından)
+
+        Args:
+            bucket: minute | hour | day (day bucket'ları UTC gün sınırında)
+            by_version: True ise her bucket model_version'a göre ayrılır
+
+        Returns:
+            [{"bucket", ["model_version"], "count", "churn_rate", "mean_proba", "std_proba", "min_proba", "max_proba"}]
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {list(BUCKETS)}")
+        table, rollup_width, width = BUCKETS[bucket]
+        group = f"(bucket / {width}) * {width}"
+        keys = f"{group}, model_version" if by_version else group
+
+        # start bir rollup bucket'ının ortasına denk gelebilir; o bucket dahil edilir
+        sql = (
+            f"SELECT {group} AS b, {'model_version' if by_version else 'NULL'}, SUM(count), SUM(positives), "
+            f"SUM(proba_sum), SUM(proba_sq_sum), MIN(proba_min), MAX(proba_max) FROM {table} "
+            "WHERE bucket >= ? AND bucket < ?"
+        )
+        params: List[Any] = [int(start // rollup_width) * rollup_width, end]
+        if model_version is not None:
+            sql += " AND model_version = ?"
+            params.append(model_version)
+        sql += f" GROUP BY {keys} ORDER BY b"
+
+        out = []
+        for b, version, n, pos, s, sq, lo, hi in self._conn().execute(sql, params):
+            mean = s / n
+            row = {"bucket": _iso(b)}
+            if by_version:
+                row["model_version"] = version
+            row.update({
+                "count": n,
+                "churn_rate": pos / n,
+                "mean_proba": mean,
+                "std_proba": max(sq / n - mean * mean, 0.0) ** 0.5,
+                "min_proba": lo,
+                "max_proba": hi,
+            })
+            out.append(row)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        raw = conn.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM predictions").fetchone()
+        size = sum(p.stat().st_size for p in self.path.parent.glob(f"{self.path.name}*") if p.is_file())
+        return {
+            "path": str(self.path),
+            "size_bytes": size,
+            "raw_rows": raw[0],
+            "oldest": _iso(raw[1]) if raw[1] is not None else None,
+            "newest": _iso(raw[2]) if raw[2] is not None else None,
+            "minute_buckets": conn.execute("SELECT COUNT(*) FROM rollup_minute").fetchone()[0],
+            "hour_buckets": conn.execute("SELECT COUNT(*) FROM rollup_hour").fetchone()[0],
+            "retention_days": {
+                "raw": RAW_RETENTION_DAYS,
+                "minute": MINUTE_RETENTION_DAYS,
+                "hour": HOUR_RETENTION_DAYS,
+            },
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rows_rejected": self.rows_rejected,
+            "write_errors": self.write_errors,
+            "compactions": self.compactions,
+            "last_compaction": self.last_compaction,
+        }
+
+
+_store: Optional[MonitoringStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_monitoring_store(worker_id: str = "") -> Optional[MonitoringStore]:
+    """
+    Process başına tek store; kapalıysa veya açılamadıysa None.
+    Store worker_id'siz oluşturulduysa ilk verilen worker_id benimsenir.
+    """
+    global _store, _store_failed
+    if _store is None and MONITORING_STORE_ENABLED and not _store_failed:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    _store = MonitoringStore(MONITORING_STORE_PATH, worker_id)
+                except sqlite3.Error as e:
+                    _store_failed = True
+                    logger.error(f"Monitoring store unavailable, disabled for this process: {e}")
+    if _store is not None and worker_id and not _store.worker_id:
+        _store.worker_id = worker_id
+    return _store
+
+
+def _reset_after_fork():
+    global _store, _store_failed, _store_lock
+    _store = None
+    _store_failed = False
+    _store_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,121 @@
+"""
+Prediction sonuç cache'i (LRU + TTL)
+
+Anahtar: (model versiyonu, default'larla doldurulmuş ve tipleri çevrilmiş
+satırın hash'i). Aynı müşteri aynı feature'larla tekrar skorlandığında model
+çalıştırılmaz. Her kayıt onu üreten LoadedModel'i de tutar; versiyon yeniden
+yüklenince eski kayıtlar hiç dönmez ve registry listener'ı ile silinir.
+
+Ayarlar:
+    PREDICTION_CACHE_SIZE=10000   en fazla kayıt (0: kapalı)
+    PREDICTION_CACHE_TTL=300      kayıt ömrü (saniye)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+
+
+def row_digest(row: Dict[str, Any], columns) -> bytes:
+    """Kolon sırasına göre satırın 16 byte'lık hash'i"""
+    payload = repr(tuple(row[c] for c in columns)).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache
+
+    Args:
+        max_entries: Kayıt üst sınırı (aşılınca en eski kullanılan atılır)
+        ttl_seconds: Kayıt ömrü
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, ttl_seconds: float = PREDICTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (version, digest) -> (expires_at, LoadedModel, label, proba)
+        self._data: "OrderedDict[Tuple[str, bytes], Tuple[float, Any, Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, lm, digest: bytes) -> Optional[Tuple[Any, float]]:
+        """lm: request'in skorlanacağı LoadedModel; başka bir yüklemeden gelen kayıt miss sayılır"""
+        key = (lm.version, digest)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] is not lm:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, lm, digest: bytes, label, proba: float):
+        key = (lm.version, digest)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, lm, label, proba)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _drop(self, predicate) -> int:
+        with self._lock:
+            stale = [k for k, entry in self._data.items() if predicate(k[0], entry[1])]
+            for k in stale:
+                del self._data[k]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate(self, version: Optional[str] = None) -> int:
+        """Bir versiyonun (None: tümünün) kayıtlarını siler"""
+        return self._drop(lambda v, lm: version is None or v == version)
+
+    def on_registry_change(self, registry):
+        """Yeniden yüklenen veya kaldırılan versiyonların kayıtlarını sil"""
+        return self._drop(lambda v, lm: registry.get(v) is not lm)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: Optional[PredictionCache] = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Process başına tek cache"""
+    global _cache
+    if _cache is None:
+        _cache = PredictionCache()
+    return _cache
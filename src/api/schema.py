@@ -0,0 +1,118 @@
+"""
+Eğitilmiş pipeline'dan üretilen /predict request şeması
+
+Model yüklenirken ColumnTransformer'dan tipli bir pydantic TypeAdapter
+oluşturulur: sayısal kolonlar float, kategorik kolonlar encoder'ın
+öğrendiği kategorilerden oluşan Literal. String değerler doğrulamadan önce
+strip edilir (sadece boşluktan oluşan değer boş sayılır). Sayısal alanlar
+sonlu olmalıdır (NaN / inf, "NaN" / "inf" string'leri 422 alır). Request
+gövdesi tek seferde
+pydantic-core (Rust) ile JSON'dan doğrulanır; satır üretimi
+sadece boş değerlere default atamaktır.
+
+İki payload formatı:
+    {"features": {"Age": 29, "Gender": "Male", ...}}
+    {"values": [29, "Male", ...]}          (expected_cols sırasında)
+"""
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from pydantic import BeforeValidator, FiniteFloat, TypeAdapter
+from typing_extensions import Annotated, TypedDict
+
+from src.inference.engine import _is_missing, _unwrap
+
+# Boş string eski davranıştaki gibi "eksik" sayılır (default ile doldurulur);
+# kategorik alanlarda Literal'e, sayısal alanlarda float'a alternatif olarak eklenir
+_BLANK = Literal[""]
+
+
+def _strip(v: Any) -> Any:
+    return v.strip() if isinstance(v, str) else v
+
+
+# Literal / float kontrolünden önce: "  " eski build_row'daki gibi boş sayılır
+_STRIPPED = BeforeValidator(_strip)
+
+
+def _is_blank(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and v.strip() == "")
+
+
+def categories_from_pipeline(model) -> Dict[str, List[Any]]:
+    """{kategorik kolon: encoder kategorileri} (eksik değer kategorisi hariç)"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
+    pre = model.steps[0][1]
+    out: Dict[str, List[Any]] = {}
+    if not isinstance(pre, ColumnTransformer):
+        return out
+    for _, trans, cols in pre.transformers_:
+        est = _unwrap(trans)
+        if isinstance(est, OneHotEncoder) and isinstance(cols, list):
+            for col, cats in zip(cols, est.categories_):
+                out[col] = [c for c in cats.tolist() if not _is_missing(c)]
+    return out
+
+
+def _field_type(col: str, categories: Dict[str, List[Any]], defaults: Dict[str, Any]):
+    if col in categories:
+        cats = categories[col]
+        # Literal sadece str kategorilerle; karışık tiplerde serbest bırak
+        if cats and all(isinstance(c, str) for c in cats):
+            return Optional[Annotated[Literal[tuple(cats) + ("",)], _STRIPPED]]
+        return Optional[Annotated[Union[str, FiniteFloat], _STRIPPED]]
+    if isinstance(defaults.get(col), float):
+        return Optional[Annotated[Union[FiniteFloat, _BLANK], _STRIPPED]]
+    return Optional[Any]
+
+
+class RequestSchema:
+    """
+    Bir model versiyonuna ait request doğrulayıcı
+
+    Args:
+        expected_cols: Modelin beklediği kolonlar (values sırası)
+        categories: {kategorik kolon: izin verilen değerler}
+        defaults: Eksik değerler için default'lar
+    """
+
+    def __init__(self, expected_cols: List[str], categories: Dict[str, List[Any]], defaults: Dict[str, Any]):
+        self.expected_cols = list(expected_cols)
+        self.defaults = dict(defaults)
+        self.categories = categories
+
+        types = {c: _field_type(c, categories, defaults) for c in self.expected_cols}
+        features = TypedDict("Features", types, total=False)
+        values = Tuple[tuple(types[c] for c in self.expected_cols)]
+        envelope = TypedDict("PredictPayload", {
+            "features": features,
+            "values": values,
+            "model_version": Optional[str],
+        }, total=False)
+        self.adapter = TypeAdapter(envelope)
+
+    @classmethod
+    def from_pipeline(cls, model, meta: Dict[str, Any]) -> "RequestSchema":
+        return cls(meta["expected_cols"], categories_from_pipeline(model), meta["defaults"])
+
+    def validate_json(self, body: bytes) -> Dict[str, Any]:
+        """Geçersiz gövdede pydantic.ValidationError fırlatır"""
+        return self.adapter.validate_json(body)
+
+    def build_row(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Doğrulanmış payload -> modelin beklediği satır (boşlar default ile)"""
+        d = self.defaults
+        if "values" in payload:
+            items = zip(self.expected_cols, payload["values"])
+            return {c: (d.get(c) if _is_blank(v) else v) for c, v in items}
+
+        features = payload.get("features") or {}
+        row = {}
+        for c in self.expected_cols:
+            v = features.get(c)
+            row[c] = d.get(c) if _is_blank(v) else v
+        return row
+
+    def json_schema(self) -> Dict[str, Any]:
+        return self.adapter.json_schema()
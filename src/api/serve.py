@@ -0,0 +1,294 @@
+"""
+Çok process'li serving (pre-fork)
+
+`uvicorn --workers N` her worker'da modeli ve meta'yı ayrı ayrı yükler.
+Bu launcher modelleri parent process'te bir kez yükler, gc.freeze() ile
+GC'nin bu nesnelere yazmasını (copy-on-write sayfa kopyalanmasını) engeller
+ve aynı soketi dinleyen N worker fork eder. Worker'lar model sayfalarını
+parent ile paylaşır; her worker'ın başlama süresi ve RSS/PSS değerleri
+raporlanır. MODEL_MMAP=true ile modelin NumPy dizileri dosyadan map edilir.
+
+--profile-startup modu sunucuyu başlatmaz: temiz bir process'te
+(python -X importtime) app'i import eder ve warm-up'ı çalıştırır, modül
+bazlı import sürelerini ve aşama sürelerini raporlar.
+
+Kullanım:
+    python -m src.api.serve --workers 4 --port 8000
+    python -m src.api.serve --profile-startup --top 20
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import uvicorn
+
+from src.models.registry import memory_usage
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class _WorkerServer(uvicorn.Server):
+    """Startup bitince parent'a pipe üzerinden haber veren uvicorn server"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int, forked_at: float):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        self.forked_at = forked_at
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        msg = {"pid": os.getpid(), "startup_seconds": time.time() - self.forked_at}
+        try:
+            os.write(self.ready_fd, (json.dumps(msg) + "\n").encode())
+        except OSError:
+            pass
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, ready_fd: int, log_level: str):
+    forked_at = time.time()
+    # Parent'ın sinyal handler'ları yerine uvicorn'unkiler kullanılır
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    server = _WorkerServer(config, ready_fd, forked_at)
+    server.run(sockets=[sock])
+
+
+def _format_memory(pid: int) -> str:
+    mem = memory_usage(pid)
+    if not mem:
+        return "n/a"
+    return (
+        f"rss={mem.get('rss', 0) / MB:.1f}MB pss={mem.get('pss', 0) / MB:.1f}MB "
+        f"shared={mem.get('shared', 0) / MB:.1f}MB private={mem.get('private', 0) / MB:.1f}MB"
+    )
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 2, log_level: str = "info",
+          restart: bool = True):
+    from src.api import app as app_module
+
+    t0 = time.perf_counter()
+    app_module.preload_models(background=False)
+    # Parent'ta oluşan nesneler kalıcı nesil'e taşınır; worker'larda GC bunların
+    # header'larına yazıp paylaşılan sayfaları kopyalamaz
+    gc.collect()
+    gc.freeze()
+    preload_seconds = time.perf_counter() - t0
+
+    active = app_module.registry.active
+    logger.info(
+        f"Preloaded {app_module.registry.versions()} in {preload_seconds:.2f}s "
+        f"(active: {active.version if active else None}) | parent {_format_memory(os.getpid())}"
+    )
+
+    sock = _bind_socket(host, port)
+    ready_r, ready_w = os.pipe()
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            try:
+                _run_worker(app_module.app, sock, ready_w, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.time()
+        return pid
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    logger.info(f"Serving on {host}:{port} with {workers} workers: {sorted(children)}")
+
+    buffer = b""
+    while children:
+        try:
+            readable, _, _ = select.select([ready_r], [], [], 1.0)
+        except InterruptedError:
+            readable = []
+        if readable:
+            buffer += os.read(ready_r, 65536)
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                msg = json.loads(line)
+                logger.info(
+                    f"Worker {msg['pid']} ready in {msg['startup_seconds']:.2f}s | {_format_memory(msg['pid'])}"
+                )
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                break
+            children.pop(pid, None)
+            if not stopping:
+                logger.warning(f"Worker {pid} exited (status {status})" + ("; restarting" if restart else ""))
+                if restart:
+                    spawn()
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+# App import'u ile warm-up sırasında yapılan import'lar stderr'deki bu satırla ayrılır
+_PROFILE_MARKER = "startup-profile: app imported"
+_PROFILE_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import src.api.app as app_module
+t1 = time.perf_counter()
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+app_module.warm_up()
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_app": t1 - t0,
+    "warm_up": t2 - t1,
+    "warm_up_phases": app_module.STARTUP_PHASES,
+    "active_version": app_module.registry.active_version,
+}}))
+"""
+
+
+def _parse_importtime(lines: List[str]) -> List[Dict[str, Any]]:
+    """'import time: self | cumulative | name' satırları (mikrosaniye -> sn)"""
+    out = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        out.append({
+            "module": name.strip(),
+            "package": name.strip().split(".")[0],
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self": int(parts[0]) / 1e6,
+            "cumulative": int(parts[1]) / 1e6,
+        })
+    return out
+
+
+def profile_startup(top: int = 15) -> Dict[str, Any]:
+    """
+    App import'u ve warm-up'ı ayrı bir process'te ölçer
+
+    Returns:
+        dict: wall_seconds, import_app, warm_up, warm_up_phases,
+              phases: {import|warm_up: {seconds, modules, packages, top_modules}}
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT.format(marker=_PROFILE_MARKER)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.getenv("PYTHONPATH")]))},
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup profile failed:\n{proc.stderr[-2000:]}")
+
+    stderr = proc.stderr.splitlines()
+    split = stderr.index(_PROFILE_MARKER) if _PROFILE_MARKER in stderr else len(stderr)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_seconds"] = wall
+    result["phases"] = {}
+
+    for phase, lines in (("import", stderr[:split]), ("warm_up", stderr[split + 1:])):
+        entries = _parse_importtime(lines)
+        packages: Dict[str, float] = defaultdict(float)
+        for e in entries:
+            packages[e["package"]] += e["self"]
+        result["phases"][phase] = {
+            "seconds": sum(e["self"] for e in entries),
+            "modules": len(entries),
+            "packages": dict(sorted(packages.items(), key=lambda kv: -kv[1])[:top]),
+            "top_modules": sorted(entries, key=lambda e: -e["self"])[:top],
+        }
+    return result
+
+
+def _print_startup_profile(profile: Dict[str, Any]):
+    print(f"🚀 Startup profili (toplam {profile['wall_seconds']:.2f} sn, interpreter dahil)")
+    print(f"   app import : {profile['import_app']:.3f} sn")
+    print(f"   warm-up    : {profile['warm_up']:.3f} sn (aktif: {profile['active_version']})")
+    for name, seconds in profile["warm_up_phases"].items():
+        print(f"     {name:<16} {seconds:.3f} sn")
+
+    for phase, info in profile["phases"].items():
+        print(f"\n📦 {phase}: {info['modules']} modül, import süresi {info['seconds']:.3f} sn")
+        print("   Paket bazında (self süre toplamı):")
+        for pkg, seconds in info["packages"].items():
+            print(f"     {pkg:<28} {seconds * 1000:8.1f} ms")
+        print("   En yavaş modüller (self / cumulative):")
+        for e in info["top_modules"]:
+            print(f"     {e['module']:<44} {e['self'] * 1000:8.1f} ms {e['cumulative'] * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn API pre-fork server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-restart", action="store_true", help="Çöken worker'ı yeniden başlatma")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Sunucuyu başlatma; import ve startup aşamalarının süresini raporla")
+    parser.add_argument("--top", type=int, default=15, help="--profile-startup: listelenecek modül/paket sayısı")
+    parser.add_argument("--output", help="--profile-startup: sonucu JSON olarak da yaz")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        profile = profile_startup(args.top)
+        _print_startup_profile(profile)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(profile, f, indent=2)
+            print(f"\n✅ {args.output}")
+        sys.exit(0)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    serve(args.host, args.port, args.workers, args.log_level, restart=not args.no_restart)
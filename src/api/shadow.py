@@ -0,0 +1,195 @@
+"""
+Shadow ve canary skorlama
+
+Shadow: primary model cevabı döndürürken aday versiyonlar aynı satırı arka
+plandaki sınırlı bir thread pool'da skorlar; sonuçlar (label uyumu,
+probability farkı, latency) monitoring.ShadowStats'a yazılır. Pool doluysa
+iş kuyruğa alınmaz, atlanır (shed) — primary response hiç beklemez.
+
+Canary: model_version belirtilmemiş request'lerin bir kısmı ağırlıklara göre
+aday versiyona yönlendirilir.
+
+Ayarlar:
+    SHADOW_VERSIONS="2,3"        shadow skorlanacak versiyonlar
+    CANARY_WEIGHTS="2:0.1"       request'lerin %10'u v2'ye
+    SHADOW_WORKERS=1             shadow thread sayısı
+    SHADOW_MAX_PENDING=64        aynı anda bekleyen en fazla shadow işi
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from src.api.monitoring import get_shadow_stats
+
+logger = logging.getLogger(__name__)
+
+SHADOW_VERSIONS = os.getenv("SHADOW_VERSIONS", "")
+CANARY_WEIGHTS = os.getenv("CANARY_WEIGHTS", "")
+SHADOW_WORKERS = int(os.getenv("SHADOW_WORKERS", "1"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "64"))
+
+
+def parse_versions(spec: str) -> List[str]:
+    """"2, 3" -> ["2", "3"]"""
+    return [v.strip() for v in (spec or "").split(",") if v.strip()]
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"2:0.1,3:0.05" -> {"2": 0.1, "3": 0.05}"""
+    weights = {}
+    for part in parse_versions(spec):
+        version, _, weight = part.partition(":")
+        w = float(weight)
+        if w < 0:
+            raise ValueError(f"Canary weight must be >= 0: {part}")
+        weights[version.strip()] = w
+    if sum(weights.values()) > 1.0:
+        raise ValueError(f"Canary weights sum to more than 1: {spec}")
+    return weights
+
+
+class TrafficSplitter:
+    """
+    Canary yönlendirmesi + shadow skorlama
+
+    Args:
+        registry: ModelRegistry (versiyonlar request anında buradan okunur)
+        shadow_versions: Shadow skorlanacak versiyonlar
+        canary_weights: {versiyon: trafik oranı}
+        workers: Shadow thread sayısı
+        max_pending: Çalışan + bekleyen shadow işi üst sınırı
+    """
+
+    def __init__(self, registry, shadow_versions: Optional[List[str]] = None,
+                 canary_weights: Optional[Dict[str, float]] = None,
+                 workers: int = SHADOW_WORKERS, max_pending: int = SHADOW_MAX_PENDING):
+        self.registry = registry
+        self.shadow_versions: List[str] = list(shadow_versions or [])
+        self.canary_weights: Dict[str, float] = dict(canary_weights or {})
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._random = random.Random()
+
+    def configure(self, shadow_versions: Optional[List[str]] = None,
+                  canary_weights: Optional[Dict[str, float]] = None):
+        """Çalışırken shadow / canary ayarlarını değiştirir (atomik referans değişimi)"""
+        if shadow_versions is not None:
+            self.shadow_versions = list(shadow_versions)
+        if canary_weights is not None:
+            self.canary_weights = dict(canary_weights)
+
+    def required_versions(self) -> List[str]:
+        """Bellekte olması gereken aday versiyonlar"""
+        return sorted(set(self.shadow_versions) | set(self.canary_weights))
+
+    # ---- canary ----
+
+    def choose_version(self, requested: Optional[str] = None) -> Optional[str]:
+        """
+        Request'in skorlanacağı versiyon. None -> aktif model.
+        Canary versiyonu henüz yüklenmediyse aktif modele düşülür.
+        """
+        if requested is not None or not self.canary_weights:
+            return requested
+        r = self._random.random()
+        cum = 0.0
+        for version, weight in self.canary_weights.items():
+            cum += weight
+            if r < cum:
+                return version if self.registry.get(version) is not None else None
+        return None
+
+    # ---- shadow ----
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shadow")
+        return self._pool
+
+    def submit(self, features: Dict[str, Any], primary_version: str, primary_label, primary_proba: float) -> int:
+        """
+        Shadow versiyonlarını arka plana gönderir, hiç beklemez.
+
+        Returns:
+            int: Kuyruğa alınan shadow iş sayısı
+        """
+        versions = self.shadow_versions
+        if not versions:
+            return 0
+
+        stats = get_shadow_stats()
+        submitted = 0
+        for version in versions:
+            if version == primary_version:
+                continue
+            lm = self.registry.get(version)
+            if lm is None:
+                continue
+            if not self._slots.acquire(blocking=False):
+                stats.record_shed(primary_version, version)
+                continue
+            try:
+                future = self._get_pool().submit(self._score, lm, features, primary_version, primary_label, primary_proba)
+            except RuntimeError:
+                # pool kapatıldı (shutdown)
+                self._slots.release()
+                continue
+            # Slot iş bitince ya da iş hiç çalışmadan iptal edilince
+            # (close -> cancel_futures) bırakılır
+            future.add_done_callback(self._release_slot)
+            submitted += 1
+        return submitted
+
+    def _release_slot(self, _future):
+        self._slots.release()
+
+    def _score(self, lm, features: Dict[str, Any], primary_version: str, primary_label, primary_proba: float):
+        stats = get_shadow_stats()
+        try:
+            t0 = time.perf_counter()
+            label, proba = lm.engine.predict_row(lm.build_row(features))
+            elapsed = time.perf_counter() - t0
+            stats.record_comparison(primary_version, lm.version, primary_label, primary_proba, label, proba, elapsed)
+            stats.record_latency(lm.version, elapsed)
+        except Exception as e:
+            stats.record_error(primary_version, lm.version)
+            logger.debug(f"Shadow scoring failed for v{lm.version}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "shadow_versions": self.shadow_versions,
+            "canary_weights": self.canary_weights,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "loaded": {v: self.registry.get(v) is not None for v in self.required_versions()},
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_splitter: Optional[TrafficSplitter] = None
+
+
+def get_traffic_splitter() -> TrafficSplitter:
+    """Process başına tek splitter (ayarlar env'den)"""
+    global _splitter
+    if _splitter is None:
+        from src.models.registry import get_registry
+        _splitter = TrafficSplitter(
+            get_registry(),
+            shadow_versions=parse_versions(SHADOW_VERSIONS),
+            canary_weights=parse_weights(CANARY_WEIGHTS),
+        )
+    return _splitter
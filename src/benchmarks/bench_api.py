@@ -0,0 +1,514 @@
+"""
+API yük testi / latency benchmark'ı
+
+İki mod:
+    inprocess: FastAPI app'i aynı process'te, HTTP katmanı olmadan doğrudan
+               ASGI üzerinden çağırır (app + model maliyeti)
+    http:      Çalışan bir uvicorn'a keep-alive HTTP/1.1 bağlantılarıyla yük
+               verir (uçtan uca)
+
+Ölçüm, API /ready ile model warm-up'ının bittiğini bildirdikten sonra başlar.
+Payload'lar make_sample.py'deki gibi veri setinden örneklenir. Her
+(concurrency, batch_size) senaryosu için RPS ve p50/p95/p99 latency, /metrics
+farkından da predict aşamalarının (input_assembly, transform, classifier,
+compiled_score, monitoring) dağılımı raporlanır. Latency ve RPS sadece 2xx
+cevaplardan hesaplanır; hata cevabı alan senaryo varsa çalıştırma exit code 1
+ile biter. Sonuçlar JSON'a yazılır; --compare ile önceki bir sonuçla
+karşılaştırılıp regresyonda da exit code 1 döner.
+
+Kullanım:
+    python -m src.benchmarks.bench_api --mode inprocess --concurrency 1,8,32 --batch-sizes 1,100
+    python -m src.benchmarks.bench_api --mode http --url http://127.0.0.1:8000 --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+DEFAULT_DATA_PATH = "data/raw/telco.csv"
+RESULTS_DIR = Path("benchmarks/results")
+STAGE_METRIC = "churn_predict_stage_duration_seconds"
+READY_TIMEOUT = 120.0
+
+
+# -------------------------
+# Payload'lar
+# -------------------------
+def load_payload_rows(data_path: str = DEFAULT_DATA_PATH, n: int = 1000, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Veri setinden JSON uyumlu örnek satırlar (NaN -> None). data_path bir
+    klasörse feature capture segmentleri okunur (production trafiği replay).
+    """
+    from src.data.cache import load_dataset
+    from src.models.meta import _clean_row
+
+    if os.path.isdir(data_path):
+        from src.api.feature_capture import RESERVED_COLUMNS, load_capture
+        X = load_capture(directory=data_path)
+        X = X.drop(columns=[c for c in RESERVED_COLUMNS if c in X.columns])
+        if X.empty:
+            raise SystemExit(f"No captured rows under {data_path}")
+    else:
+        X, _, _, _ = load_dataset(data_path)
+    sample = X.sample(min(n, len(X)), random_state=seed)
+    return [_clean_row(r, {}) for r in sample.to_dict(orient="records")]
+
+
+def build_requests(rows: List[Dict[str, Any]], batch_size: int, count: int = 200) -> List[Tuple[str, bytes]]:
+    """(path, body) listesi; batch_size 1 ise /predict, değilse /predict/batch"""
+    out = []
+    for i in range(count):
+        if batch_size == 1:
+            body = {"features": rows[i % len(rows)]}
+            path = "/predict"
+        else:
+            start = (i * batch_size) % len(rows)
+            chunk = [rows[(start + j) % len(rows)] for j in range(batch_size)]
+            body = {"rows": chunk}
+            path = "/predict/batch"
+        out.append((path, json.dumps(body).encode()))
+    return out
+
+
+# -------------------------
+# Sürücüler
+# -------------------------
+class InProcessDriver:
+    """HTTP katmanı olmadan ASGI çağrısı (lifespan startup/shutdown dahil)"""
+
+    def __init__(self):
+        from src.api.app import app
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_in: Optional[asyncio.Queue] = None
+        self._lifespan_out: Optional[asyncio.Queue] = None
+
+    async def start(self):
+        self._lifespan_in, self._lifespan_out = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(
+            self.app(scope, self._lifespan_in.get, self._lifespan_out.put)
+        )
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        msg = await self._lifespan_out.get()
+        if msg["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"App startup failed: {msg}")
+
+    async def stop(self):
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        await self._lifespan_out.get()
+        await self._lifespan_task
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+            "state": {},
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()
+
+        status = 0
+        chunks: List[bytes] = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+    async def connection(self):
+        return self
+
+
+class _HttpConnection:
+    """Tek keep-alive bağlantı (HTTP/1.1, Content-Length ile)"""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        self.writer.write(head + body)
+        raw = await self.reader.readuntil(b"\r\n\r\n")
+        lines = raw.split(b"\r\n")
+        status = int(lines[0].split()[1])
+        length = 0
+        for line in lines[1:]:
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class HttpDriver:
+    """Çalışan bir uvicorn'a karşı"""
+
+    def __init__(self, url: str):
+        u = urlparse(url)
+        self.host, self.port = u.hostname or "127.0.0.1", u.port or 80
+        self._control: Optional[_HttpConnection] = None
+
+    async def start(self):
+        self._control = await _HttpConnection(self.host, self.port).open()
+
+    async def stop(self):
+        self._control.close()
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        return await self._control.request(method, path, body)
+
+    async def connection(self):
+        return await _HttpConnection(self.host, self.port).open()
+
+
+async def wait_ready(driver, timeout: float = READY_TIMEOUT) -> Dict[str, Any]:
+    """
+    /ready 200 dönene kadar yoklar. Warm-up arka planda sürerken predict
+    istekleri 503 alır; ölçüm ancak model hazır olunca başlamalı.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status, body = await driver.request("GET", "/ready")
+        try:
+            info = json.loads(body) if body else {}
+        except ValueError:
+            info = {}
+        if status == 200:
+            return info
+        if info.get("status") == "no_model":
+            raise RuntimeError(f"API has no active model: {info.get('warmup_error')}")
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"API not ready after {timeout:.0f}s (status {status}: {info.get('status')})")
+        await asyncio.sleep(0.1)
+
+
+# -------------------------
+# /metrics aşama histogramları
+# -------------------------
+def parse_stage_histograms(text: str) -> Dict[str, Dict[str, Any]]:
+    """{stage: {"buckets": {le: kümülatif sayı}, "sum": s, "count": n}}"""
+    stages: Dict[str, Dict[str, Any]] = {}
+    for line in text.splitlines():
+        if not line.startswith(STAGE_METRIC):
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        labels = dict(
+            kv.split("=", 1) for kv in name_labels[name_labels.index("{") + 1:-1].split(",")
+        )
+        stage = labels["stage"].strip('"')
+        entry = stages.setdefault(stage, {"buckets": {}, "sum": 0.0, "count": 0})
+        if name_labels.startswith(f"{STAGE_METRIC}_bucket"):
+            entry["buckets"][labels["le"].strip('"')] = float(value)
+        elif name_labels.startswith(f"{STAGE_METRIC}_sum"):
+            entry["sum"] = float(value)
+        elif name_labels.startswith(f"{STAGE_METRIC}_count"):
+            entry["count"] = int(float(value))
+    return stages
+
+
+def _histogram_quantile(q: float, bounds: List[Tuple[float, float]]) -> Optional[float]:
+    """Prometheus histogram_quantile ile aynı (bucket içi lineer)"""
+    total = bounds[-1][1] if bounds else 0
+    if total <= 0:
+        return None
+    target = q * total
+    prev_le, prev_cum = 0.0, 0.0
+    for le, cum in bounds:
+        if cum >= target:
+            if le == float("inf"):
+                return prev_le
+            span = cum - prev_cum
+            return prev_le + (le - prev_le) * ((target - prev_cum) / span if span else 0.0)
+        prev_le, prev_cum = le, cum
+    return prev_le
+
+
+def stage_breakdown(before: Dict[str, Dict], after: Dict[str, Dict]) -> Dict[str, Dict[str, Any]]:
+    """İki /metrics okuması arasındaki aşama dağılımı (ms)"""
+    out = {}
+    for stage, a in after.items():
+        b = before.get(stage, {"buckets": {}, "sum": 0.0, "count": 0})
+        count = a["count"] - b["count"]
+        if count <= 0:
+            continue
+        bounds = sorted(
+            (float(le), cum - b["buckets"].get(le, 0.0)) for le, cum in a["buckets"].items()
+        )
+        out[stage] = {
+            "count": count,
+            "mean_ms": (a["sum"] - b["sum"]) / count * 1000.0,
+            **{f"p{int(q * 100)}_ms": (v * 1000.0 if v is not None else None)
+               for q, v in ((q, _histogram_quantile(q, bounds)) for q in (0.5, 0.95, 0.99))},
+        }
+    return out
+
+
+# -------------------------
+# Senaryo
+# -------------------------
+async def run_scenario(driver, requests: List[Tuple[str, bytes]], concurrency: int,
+                       n_requests: int, warmup: int) -> Dict[str, Any]:
+    """
+    Kapalı döngü: her worker bir cevap gelince sıradaki isteği gönderir.
+    2xx olmayan cevaplar (ör. 503 warming up, 422) latency/RPS'e girmez,
+    errors ve error_statuses'ta sayılır.
+    """
+    _, metrics_before = await driver.request("GET", "/metrics")
+
+    latencies: List[float] = []
+    errors = 0
+    error_statuses: Dict[str, int] = {}
+    counter = {"next": 0}
+    total = warmup + n_requests
+
+    async def worker():
+        nonlocal errors
+        conn = await driver.connection()
+        try:
+            while True:
+                i = counter["next"]
+                if i >= total:
+                    return
+                counter["next"] = i + 1
+                path, body = requests[i % len(requests)]
+                t0 = time.perf_counter()
+                status, _ = await conn.request("POST", path, body)
+                elapsed = time.perf_counter() - t0
+                if i < warmup:
+                    continue
+                if 200 <= status < 300:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+                    error_statuses[str(status)] = error_statuses.get(str(status), 0) + 1
+        finally:
+            if conn is not driver:
+                conn.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - t0
+
+    _, metrics_after = await driver.request("GET", "/metrics")
+
+    lat = np.asarray(latencies) * 1000.0
+    # warmup dahil duvar süresi yerine sadece ölçülen isteklerin oranı
+    measured_wall = wall * n_requests / total if total else wall
+    return {
+        "requests": n_requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "error_statuses": error_statuses,
+        "wall_seconds": wall,
+        "rps": len(latencies) / measured_wall if measured_wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": float(lat.mean()) if lat.size else None,
+            "p50": float(np.percentile(lat, 50)) if lat.size else None,
+            "p95": float(np.percentile(lat, 95)) if lat.size else None,
+            "p99": float(np.percentile(lat, 99)) if lat.size else None,
+            "max": float(lat.max()) if lat.size else None,
+        },
+        "stages": stage_breakdown(
+            parse_stage_histograms(metrics_before.decode()), parse_stage_histograms(metrics_after.decode())
+        ),
+    }
+
+
+def _ms(v: Optional[float]) -> str:
+    return f"{v:.2f}ms" if v is not None else "n/a"
+
+
+async def run_benchmark(driver, rows, concurrency_levels: List[int], batch_sizes: List[int],
+                        n_requests: int, warmup: int, ready_timeout: float = READY_TIMEOUT) -> List[Dict[str, Any]]:
+    results = []
+    await driver.start()
+    try:
+        t0 = time.perf_counter()
+        info = await wait_ready(driver, ready_timeout)
+        print(f"API ready in {time.perf_counter() - t0:.2f}s (active: v{info.get('active_version')})", file=sys.stderr)
+        for batch_size in batch_sizes:
+            requests = build_requests(rows, batch_size)
+            for concurrency in concurrency_levels:
+                r = await run_scenario(driver, requests, concurrency, n_requests, warmup)
+                r.update({"batch_size": batch_size, "concurrency": concurrency,
+                          "rows_per_sec": r["rps"] * batch_size})
+                results.append(r)
+                lat = r["latency_ms"]
+                print(
+                    f"batch={batch_size:<5} conc={concurrency:<4} {r['rps']:>9,.0f} req/s "
+                    f"{r['rows_per_sec']:>10,.0f} rows/s  p50={_ms(lat['p50'])} p95={_ms(lat['p95'])} "
+                    f"p99={_ms(lat['p99'])} errors={r['errors']}"
+                    + (f" {r['error_statuses']}" if r["errors"] else ""),
+                    file=sys.stderr,
+                )
+    finally:
+        await driver.stop()
+    return results
+
+
+# -------------------------
+# Kayıt ve karşılaştırma
+# -------------------------
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def scenario_key(r: Dict[str, Any]) -> str:
+    return f"batch={r['batch_size']},conc={r['concurrency']}"
+
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Ortak senaryolarda RPS düşüşü veya p99 artışı max_regression oranını
+    aşarsa regresyon mesajları döner. Hata cevabı içeren senaryolar
+    (yeni ya da referans sonuçta) karşılaştırılamaz, onlar da mesaj üretir.
+    """
+    old_by_key = {scenario_key(r): r for r in old.get("results", [])}
+    regressions = []
+    print(f"\nKarşılaştırma: {old.get('meta', {}).get('git_commit')} -> {new['meta'].get('git_commit')}", file=sys.stderr)
+    for r in new["results"]:
+        key = scenario_key(r)
+        if r.get("errors"):
+            regressions.append(f"{key}: {r['errors']} error responses {r.get('error_statuses', {})}")
+            continue
+        o = old_by_key.get(key)
+        if o is None:
+            continue
+        if o.get("errors"):
+            regressions.append(f"{key}: baseline has {o['errors']} error responses; re-record it")
+            continue
+        rps_change = (r["rps"] - o["rps"]) / o["rps"] if o["rps"] else 0.0
+        p99_old, p99_new = o["latency_ms"]["p99"], r["latency_ms"]["p99"]
+        p99_change = (p99_new - p99_old) / p99_old if p99_old else 0.0
+        print(f"  {key:<22} rps {rps_change:+.1%}  p99 {p99_change:+.1%}", file=sys.stderr)
+        if rps_change < -max_regression:
+            regressions.append(f"{key}: rps {o['rps']:.0f} -> {r['rps']:.0f} ({rps_change:+.1%})")
+        if p99_change > max_regression:
+            regressions.append(f"{key}: p99 {p99_old:.2f}ms -> {p99_new:.2f}ms ({p99_change:+.1%})")
+    return regressions
+
+
+def _int_list(spec: str) -> List[int]:
+    return [int(x) for x in spec.split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn API benchmark")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="http modu için API adresi")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Payload'ların örnekleneceği veri seti (veya feature capture klasörü)")
+    parser.add_argument("--sample-rows", type=int, default=1000, help="Farklı payload satırı sayısı")
+    parser.add_argument("--concurrency", default="1,8,32", help="Virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--batch-sizes", default="1,100", help="1: /predict, >1: /predict/batch satır sayısı")
+    parser.add_argument("--requests", type=int, default=2000, help="Senaryo başına ölçülen istek")
+    parser.add_argument("--warmup", type=int, default=200, help="Senaryo başına ısınma isteği")
+    parser.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT,
+                        help="API'nin /ready ile hazır olmasını bekleme süresi (sn)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="inprocess modunda prediction cache'i kapat (model maliyetini ölçmek için)")
+    parser.add_argument("--output", default=None, help="Sonuç JSON dosyası (varsayılan benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="Karşılaştırılacak önceki sonuç JSON'u")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="İzin verilen regresyon oranı")
+    args = parser.parse_args()
+
+    if args.mode == "inprocess" and args.no_cache:
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    rows = load_payload_rows(args.data, n=args.sample_rows)
+    driver = InProcessDriver() if args.mode == "inprocess" else HttpDriver(args.url)
+
+    results = asyncio.run(run_benchmark(
+        driver, rows, _int_list(args.concurrency), _int_list(args.batch_sizes), args.requests, args.warmup,
+        ready_timeout=args.ready_timeout,
+    ))
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": commit,
+            "mode": args.mode,
+            "url": args.url if args.mode == "http" else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_scenario": args.requests,
+            "warmup": args.warmup,
+            "sample_rows": len(rows),
+            "prediction_cache": os.getenv("PREDICTION_CACHE_SIZE", "default") if args.mode == "inprocess" else None,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"bench-{args.mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Sonuçlar kaydedildi: {output}")
+
+    failed = False
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+        regressions = compare_results(previous, report, args.max_regression)
+        if regressions:
+            print("❌ Regresyon:\n  " + "\n  ".join(regressions))
+            failed = True
+        else:
+            print("✅ Regresyon yok")
+    else:
+        errored = [f"{scenario_key(r)}: {r['errors']} {r['error_statuses']}" for r in results if r["errors"]]
+        if errored:
+            print("❌ Hata cevabı alan senaryolar:\n  " + "\n  ".join(errored))
+            failed = True
+    if failed:
+        sys.exit(1)
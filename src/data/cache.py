@@ -0,0 +1,214 @@
+"""
+Preprocess edilmiş veri seti cache'i
+
+pd.read_csv + preprocess çıktısı (X, y, kategorik/sayısal kolon listeleri)
+kolon bazlı bir .npz dosyasına yazılır: sayısal kolonlar kendi dtype'ları ile,
+kategorik kolonlar integer code + kategori listesi olarak.
+Cache anahtarı CSV içeriğinin hash'i + DROP_COLUMNS + TARGET'tır; biri
+değişince cache otomatik olarak yeniden üretilir.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.preprocess import preprocess, DROP_COLUMNS, TARGET
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", "data/cache"))
+CACHE_FORMAT_VERSION = 2
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Dosyanın sha256'sı (chunk chunk okunur; model artifact anahtarı olarak da kullanılır)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest_path(csv_path: Path) -> Path:
+    return CACHE_DIR / f"{csv_path.stem}.manifest.json"
+
+
+def _read_manifest(csv_path: Path) -> dict:
+    path = _manifest_path(csv_path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _csv_sha256(csv_path: Path, manifest: dict) -> str:
+    """Boyut ve mtime değişmediyse önceki hash tekrar hesaplanmaz"""
+    st = csv_path.stat()
+    if manifest.get("csv_size") == st.st_size and manifest.get("csv_mtime_ns") == st.st_mtime_ns:
+        return manifest["csv_sha256"]
+    return file_sha256(csv_path)
+
+
+def cache_key(csv_sha256: str) -> str:
+    payload = json.dumps({
+        "csv_sha256": csv_sha256,
+        "drop_columns": DROP_COLUMNS,
+        "target": TARGET,
+        "format_version": CACHE_FORMAT_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def dataset_hash(path: str = "data/raw/telco.csv") -> str:
+    """Veri seti + preprocess ayarlarının hash'i (diğer cache'ler için anahtar)"""
+    csv_path = Path(path)
+    return cache_key(_csv_sha256(csv_path, _read_manifest(csv_path)))
+
+
+def _write_cache(data_path: Path, X: pd.DataFrame, y: pd.Series):
+    """
+    Aynı dtype'taki sayısal kolonlar tek bir 2D dizide, kategorik kolonların
+    code'ları tek bir int32 dizide, kategori değerleri ise offset'li tek bir
+    string dizide tutulur (az sayıda npz üyesi -> hızlı okuma).
+    """
+    arrays = {}
+    by_dtype = {}
+    cat_pos, cat_codes, cat_values, cat_offsets = [], [], [], [0]
+
+    for i, c in enumerate(X.columns):
+        col = X[c]
+        if col.dtype == object:
+            codes, values = pd.factorize(col, sort=True)
+            cat_pos.append(i)
+            cat_codes.append(codes.astype(np.int32))
+            cat_values.extend(str(v) for v in values)
+            cat_offsets.append(len(cat_values))
+        else:
+            by_dtype.setdefault(col.dtype.str, []).append(i)
+
+    for dtype, positions in by_dtype.items():
+        name = dtype.replace("<", "").replace(">", "").replace("|", "")
+        arrays[f"num_{name}_pos"] = np.asarray(positions, dtype=np.int32)
+        arrays[f"num_{name}"] = np.stack([X.iloc[:, i].to_numpy() for i in positions])
+
+    arrays["cat_pos"] = np.asarray(cat_pos, dtype=np.int32)
+    arrays["cat_codes"] = np.stack(cat_codes) if cat_codes else np.empty((0, len(X)), dtype=np.int32)
+    arrays["cat_values"] = np.asarray(cat_values, dtype=str)
+    arrays["cat_offsets"] = np.asarray(cat_offsets, dtype=np.int64)
+
+    codes, values = pd.factorize(y, sort=True)
+    arrays["y_codes"] = codes.astype(np.int32)
+    arrays["y_values"] = np.asarray(values, dtype=str)
+
+    tmp = data_path.with_name(f".{data_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, data_path)
+
+
+def _decode(codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """code -> object dizi; -1 (eksik) NaN olur"""
+    lookup = np.empty(len(values) + 1, dtype=object)
+    lookup[:-1] = values.tolist()
+    lookup[-1] = np.nan
+    return lookup[codes]
+
+
+def _read_cache(data_path: Path, manifest: dict):
+    columns = manifest["columns"]
+    data = [None] * len(columns)
+
+    with np.load(data_path, allow_pickle=False) as npz:
+        for key in npz.files:
+            if key.startswith("num_") and not key.endswith("_pos"):
+                block = npz[key]
+                for row, i in enumerate(npz[f"{key}_pos"]):
+                    data[i] = block[row]
+
+        codes = npz["cat_codes"]
+        values = npz["cat_values"]
+        offsets = npz["cat_offsets"]
+        for row, i in enumerate(npz["cat_pos"]):
+            data[i] = _decode(codes[row], values[offsets[row]:offsets[row + 1]])
+
+        y = pd.Series(_decode(npz["y_codes"], npz["y_values"]), name=TARGET)
+
+    X = pd.DataFrame(dict(zip(columns, data)), columns=columns)
+    return X, y, list(manifest["cat_cols"]), list(manifest["num_cols"])
+
+
+def load_dataset(path: str = "data/raw/telco.csv", use_cache: bool = True) -> Tuple[pd.DataFrame, pd.Series, List[str], List[str]]:
+    """
+    preprocess(pd.read_csv(path)) ile aynı çıktıyı döndürür, mümkünse cache'ten
+
+    Returns:
+        X, y, categorical_cols, numerical_cols
+    """
+    csv_path = Path(path)
+    if not use_cache:
+        return preprocess(pd.read_csv(csv_path))
+
+    manifest = _read_manifest(csv_path)
+    csv_sha = _csv_sha256(csv_path, manifest)
+    key = cache_key(csv_sha)
+    data_path = CACHE_DIR / f"{csv_path.stem}-{key[:16]}.npz"
+
+    if manifest.get("key") == key and data_path.exists():
+        try:
+            return _read_cache(data_path, manifest)
+        except Exception as e:
+            logger.warning(f"Dataset cache unreadable, rebuilding: {e}")
+
+    X, y, cat_cols, num_cols = preprocess(pd.read_csv(csv_path))
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _write_cache(data_path, X, y)
+        st = csv_path.stat()
+        manifest = {
+            "key": key,
+            "csv_path": str(csv_path),
+            "csv_sha256": csv_sha,
+            "csv_size": st.st_size,
+            "csv_mtime_ns": st.st_mtime_ns,
+            "columns": list(X.columns),
+            "cat_cols": cat_cols,
+            "num_cols": num_cols,
+            "rows": len(X),
+        }
+        with open(_manifest_path(csv_path), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Eski anahtarlara ait cache dosyalarını temizle
+        for old in CACHE_DIR.glob(f"{csv_path.stem}-*.npz"):
+            if old != data_path:
+                old.unlink(missing_ok=True)
+        logger.info(f"Dataset cache written: {data_path}")
+    except Exception as e:
+        logger.warning(f"Dataset cache write failed (non-blocking): {e}")
+
+    return X, y, cat_cols, num_cols
+
+
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    X, y, cat_cols, num_cols = load_dataset()
+    print(f"Loaded {X.shape} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    t0 = time.perf_counter()
+    X_ref, y_ref, _, _ = load_dataset(use_cache=False)
+    print(f"CSV + preprocess: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    pd.testing.assert_frame_equal(X, X_ref)
+    pd.testing.assert_series_equal(y, y_ref, check_names=False)
+    print("✅ Cache çıktısı preprocess ile aynı")
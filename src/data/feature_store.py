@@ -0,0 +1,308 @@
+"""
+Customer ID indeksli feature tablosu (SQLite)
+
+preprocess "Customer ID"yi düşürdüğü için /predict çağıranlar her seferinde
+tüm feature'ları göndermek zorunda. Bu modül veri setini (preprocess
+sonrası kolonlar + Customer ID) bir SQLite tablosuna yazar; customer_id
+PRIMARY KEY'dir (WITHOUT ROWID -> B-tree üzerinde doğrudan satır), yani
+ID ile lookup müşteri sayısından bağımsız olarak birkaç B-tree sayfası okur.
+
+Veritabanı WAL modunda açılır: ingest (upsert) sürerken API okumaya devam
+eder ve commit edilen satırları hemen görür. API tarafı her thread için
+ayrı bir salt okunur bağlantı kullanır.
+
+Ayarlar:
+    FEATURE_STORE_PATH=data/features.db
+
+Kullanım:
+    python -m src.data.feature_store data/raw/telco.csv          # ingest (upsert)
+    python -m src.data.feature_store --lookup 0000-ABCDE 0001-ABCDE
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH", "data/features.db")
+ID_COLUMN = "Customer ID"
+TABLE = "features"
+# SQLite'ın parametre limiti (eski sürümlerde 999) altında kalan IN (...) boyutu
+LOOKUP_CHUNK = 900
+INGEST_CHUNK = 50000
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    import pandas as pd
+
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _connect(path, readonly: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def _read_meta(conn: sqlite3.Connection) -> Dict[str, Any]:
+    try:
+        rows = conn.execute("SELECT key, value FROM store_meta").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {k: json.loads(v) for k, v in rows}
+
+
+def _write_meta(conn: sqlite3.Connection, meta: Dict[str, Any]):
+    conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany(
+        "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+        [(k, json.dumps(v)) for k, v in meta.items()],
+    )
+
+
+def _ensure_table(conn: sqlite3.Connection, X: "pd.DataFrame") -> List[str]:
+    """Tabloyu oluşturur; yeni gelen kolonlar ALTER TABLE ile eklenir"""
+    existing = [r[1] for r in conn.execute(f"PRAGMA table_info({TABLE})").fetchall()]
+    if not existing:
+        cols = ", ".join(f"{_quote(c)} {_sql_type(X[c].dtype)}" for c in X.columns)
+        conn.execute(f"CREATE TABLE {TABLE} (customer_id TEXT PRIMARY KEY, {cols}) WITHOUT ROWID")
+        return list(X.columns)
+
+    columns = [c for c in existing if c != "customer_id"]
+    for c in X.columns:
+        if c not in columns:
+            conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(c)} {_sql_type(X[c].dtype)}")
+            columns.append(c)
+    return columns
+
+
+def _records(ids: "pd.Series", X: "pd.DataFrame", columns: List[str]):
+    """NaN -> NULL, numpy skalerleri -> Python tipleri"""
+    import pandas as pd
+
+    data = [ids.astype(str).tolist()]
+    for c in columns:
+        if c not in X.columns:
+            data.append([None] * len(X))
+            continue
+        s = X[c]
+        values = s.astype(object).where(s.notna(), None).tolist()
+        if pd.api.types.is_integer_dtype(s.dtype):
+            values = [int(v) for v in values]
+        elif pd.api.types.is_float_dtype(s.dtype):
+            values = [None if v is None else float(v) for v in values]
+        data.append(values)
+    return zip(*data)
+
+
+def ingest(csv_path: str, db_path: str = FEATURE_STORE_PATH, chunk_size: int = INGEST_CHUNK) -> Dict[str, Any]:
+    """
+    CSV'yi feature tablosuna upsert eder (aynı Customer ID güncellenir)
+
+    Returns:
+        {"rows", "total_rows", "seconds", ...}
+    """
+    # Ingest tarafı (pandas + preprocess) API'nin lookup yolunda gerekmez
+    import pandas as pd
+    from src.data.cache import dataset_hash
+    from src.data.preprocess import preprocess
+
+    t0 = time.perf_counter()
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect(db_path)
+    rows = 0
+    try:
+        for df in pd.read_csv(csv_path, chunksize=chunk_size):
+            if ID_COLUMN not in df.columns:
+                raise ValueError(f"{csv_path} has no '{ID_COLUMN}' column")
+            df = df[df[ID_COLUMN].notna()]
+            X, _, _, _ = preprocess(df)
+            columns = _ensure_table(conn, X)
+            placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+            names = ", ".join(["customer_id"] + [_quote(c) for c in columns])
+
+            # Chunk başına tek transaction
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {TABLE} ({names}) VALUES ({placeholders})",
+                    _records(df[ID_COLUMN], X, columns),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            rows += len(df)
+
+        total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+        meta = {
+            "columns": [r[1] for r in conn.execute(f"PRAGMA table_info({TABLE})").fetchall()][1:],
+            "source": str(csv_path),
+            "source_hash": dataset_hash(csv_path),
+            "ingested_at": datetime.now().isoformat(),
+            "rows": total,
+        }
+        _write_meta(conn, meta)
+    finally:
+        conn.close()
+
+    out = {"rows": rows, "total_rows": total, "seconds": time.perf_counter() - t0, "path": str(db_path)}
+    logger.info(f"Feature store ingest: {rows} rows from {csv_path} in {out['seconds']:.2f}s (total {total})")
+    return out
+
+
+class FeatureStore:
+    """
+    Salt okunur lookup tarafı. sqlite3 bağlantıları thread'ler arasında
+    paylaşılmaz; her thread ilk kullanımda kendi bağlantısını açar.
+    """
+
+    def __init__(self, path: str = FEATURE_STORE_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        meta = _read_meta(self._conn())
+        self.columns: List[str] = meta.get("columns", [])
+        self.meta = meta
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.path, readonly=True)
+            self._local.conn = conn
+        return conn
+
+    def lookup_columns(self, ids: Sequence[str], columns: Sequence[str]) -> Tuple[List[int], Dict[str, List[Any]], List[int]]:
+        """
+        ID'lere karşılık gelen satırları kolon bazlı döndürür (vektörize skorlama için)
+
+        Args:
+            ids: Customer ID listesi (tekrar edebilir)
+            columns: İstenen kolonlar; tabloda olmayanlar None döner
+
+        Returns:
+            found: Bulunan ID'lerin ids içindeki indeksleri
+            data: {kolon: found sırasında değerler}
+            missing: Bulunamayan ID'lerin indeksleri
+        """
+        if not self.columns:
+            # Store ingest bitmeden açıldıysa meta sonradan yazılmış olabilir
+            self.meta = _read_meta(self._conn())
+            self.columns = self.meta.get("columns", [])
+        present = [c for c in columns if c in self.columns]
+        select = ", ".join(["customer_id"] + [_quote(c) for c in present])
+        conn = self._conn()
+
+        unique = list(dict.fromkeys(str(i) for i in ids))
+        by_id: Dict[str, tuple] = {}
+        for start in range(0, len(unique), LOOKUP_CHUNK):
+            chunk = unique[start:start + LOOKUP_CHUNK]
+            sql = f"SELECT {select} FROM {TABLE} WHERE customer_id IN ({', '.join('?' for _ in chunk)})"
+            for row in conn.execute(sql, chunk):
+                by_id[row[0]] = row[1:]
+
+        found, missing, rows = [], [], []
+        for i, cid in enumerate(ids):
+            row = by_id.get(str(cid))
+            if row is None:
+                missing.append(i)
+            else:
+                found.append(i)
+                rows.append(row)
+
+        data: Dict[str, List[Any]] = {c: [None] * len(rows) for c in columns}
+        for j, c in enumerate(present):
+            data[c] = [r[j] for r in rows]
+
+        self.lookups += 1
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, data, missing
+
+    def get(self, customer_id: str, columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """Tek müşterinin feature'ları (yoksa None)"""
+        columns = list(columns or self.columns)
+        found, data, _ = self.lookup_columns([customer_id], columns)
+        if not found:
+            return None
+        return {c: data[c][0] for c in columns}
+
+    def count(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "rows": self.count(),
+            "columns": len(self.columns),
+            "source": self.meta.get("source"),
+            "ingested_at": self.meta.get("ingested_at"),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_store: Optional[FeatureStore] = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """Process başına tek store; veritabanı henüz yoksa None"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None and os.path.exists(FEATURE_STORE_PATH):
+                try:
+                    _store = FeatureStore(FEATURE_STORE_PATH)
+                except sqlite3.Error as e:
+                    logger.warning(f"Feature store unavailable: {e}")
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Customer ID indeksli feature tablosu")
+    parser.add_argument("csv", nargs="?", help="Ingest edilecek CSV (telco.csv formatında)")
+    parser.add_argument("--db", default=FEATURE_STORE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK)
+    parser.add_argument("--lookup", nargs="*", help="Bu ID'leri getir ve lookup süresini ölç")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.csv:
+        result = ingest(args.csv, args.db, args.chunk_size)
+        print(f"✅ {result['rows']} satır yazıldı ({result['seconds']:.2f}s), tabloda {result['total_rows']} müşteri")
+
+    if args.lookup:
+        store = FeatureStore(args.db)
+        t0 = time.perf_counter()
+        found, data, missing = store.lookup_columns(args.lookup, store.columns)
+        elapsed = (time.perf_counter() - t0) * 1000
+        for j, i in enumerate(found):
+            print(args.lookup[i], {c: data[c][j] for c in store.columns})
+        for i in missing:
+            print(f"❌ {args.lookup[i]} bulunamadı")
+        print(f"⏱️ {len(args.lookup)} ID, {elapsed:.2f} ms")
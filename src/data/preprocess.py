@@ -13,8 +13,9 @@ DROP_COLUMNS = [
 def preprocess(df: pd.DataFrame):
     df = df.copy()
 
-    y = df[TARGET]
-    X = df.drop(columns=[TARGET] + DROP_COLUMNS)
+    # Skorlanacak (etiketsiz) dosyalarda TARGET olmayabilir
+    y = df[TARGET] if TARGET in df.columns else None
+    X = df.drop(columns=[TARGET] + DROP_COLUMNS, errors="ignore")
 
     categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
     numerical_cols = X.select_dtypes(exclude=["object"]).columns.tolist()
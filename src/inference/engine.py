@@ -0,0 +1,319 @@
+"""
+Inference engine
+Pipeline'ı tek geçişte çalıştırır: preprocessor bir kez transform eder,
+olasılıklar bir kez hesaplanır, label ise classifier'ın classes_ değeri
+ve threshold üzerinden türetilir (model.predict ayrıca çağrılmaz).
+
+StandardScaler + OneHotEncoder + LogisticRegression pipeline'ları ayrıca
+düz bir NumPy scorer'a derlenir; bu yol pandas/sklearn overhead'ini atlar.
+
+pandas ve sklearn modül seviyesinde import edilmez (API cold start'ında
+~1.5 sn); ilk model yüklemesinde / DataFrame yolunda yüklenirler.
+"""
+import math
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+POSITIVE_LABEL = "Yes"
+
+# Aşama süreleri için opsiyonel callback: observer(stage, seconds)
+# (API /metrics için bağlar; batch CLI'da None kalır)
+_stage_observer: Optional[Callable[[str, float], None]] = None
+
+
+def set_stage_observer(observer: Optional[Callable[[str, float], None]]):
+    global _stage_observer
+    _stage_observer = observer
+
+
+def _is_missing(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+def _unwrap(transformer):
+    """Tek adımlı Pipeline'ları içindeki estimator'a indirger"""
+    from sklearn.pipeline import Pipeline
+
+    while isinstance(transformer, Pipeline):
+        if len(transformer.steps) != 1:
+            return None
+        transformer = transformer.steps[0][1]
+    return transformer
+
+
+class FlatScorer:
+    """
+    Fitted pipeline parametrelerinden derlenmiş lineer scorer.
+
+    decision = sum(x_num * w_num) + sum(lut[col][x_cat]) + bias
+    Scaler'ın mean/scale değerleri ağırlıklara ve bias'a gömülür,
+    OneHotEncoder kategorileri ise kolon başına {kategori: ağırlık} tablosuna dönüşür.
+    """
+
+    def __init__(self, num_cols, num_weights, cat_luts, bias):
+        self.num_cols = list(num_cols)
+        self.num_weights = np.asarray(num_weights, dtype=float)
+        # {col: (lut, nan_weight)}
+        self.cat_luts = cat_luts
+        self.bias = float(bias)
+
+    @classmethod
+    def from_pipeline(cls, model) -> Optional["FlatScorer"]:
+        """
+        Desteklenmeyen bir yapı görülürse None döner
+        (engine bu durumda sklearn yoluna düşer).
+        """
+        from sklearn.compose import ColumnTransformer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if not isinstance(model, Pipeline) or len(model.steps) != 2:
+            return None
+
+        pre, clf = model.steps[0][1], model.steps[1][1]
+        if not isinstance(pre, ColumnTransformer) or not isinstance(clf, LogisticRegression):
+            return None
+        if clf.coef_.shape[0] != 1:
+            return None
+
+        coef = clf.coef_[0]
+        bias = float(clf.intercept_[0])
+        num_cols, num_weights, cat_luts = [], [], {}
+
+        for name, trans, cols in pre.transformers_:
+            out = pre.output_indices_[name]
+            if trans == "drop" or out.stop == out.start:
+                continue
+            est = _unwrap(trans)
+            w = coef[out]
+
+            if isinstance(est, StandardScaler):
+                scale = est.scale_ if est.scale_ is not None else np.ones(len(cols))
+                mean = est.mean_ if est.mean_ is not None else np.zeros(len(cols))
+                eff = w / scale
+                num_cols.extend(cols)
+                num_weights.extend(eff.tolist())
+                bias -= float(np.dot(mean, eff))
+
+            elif isinstance(est, OneHotEncoder):
+                if est.handle_unknown != "ignore" or est.drop_idx_ is not None:
+                    return None
+                if getattr(est, "_infrequent_enabled", False):
+                    return None
+                pos = 0
+                for col, cats in zip(cols, est.categories_):
+                    lut, nan_w = {}, 0.0
+                    for cat, cw in zip(cats, w[pos:pos + len(cats)]):
+                        if _is_missing(cat):
+                            nan_w = float(cw)
+                        else:
+                            lut[cat] = float(cw)
+                    cat_luts[col] = (lut, nan_w)
+                    pos += len(cats)
+
+            else:
+                return None
+
+        return cls(num_cols, num_weights, cat_luts, bias)
+
+    def decision(self, columns: Mapping[str, Sequence], n_rows: int) -> np.ndarray:
+        z = np.full(n_rows, self.bias)
+
+        if self.num_cols:
+            Xn = np.column_stack([np.asarray(columns[c], dtype=float) for c in self.num_cols])
+            # sklearn yolu (LogisticRegression) NaN/inf'te ValueError verir;
+            # burada da aynı davranış: NaN olasılık sessizce "No" label'ına dönmez
+            finite = np.isfinite(Xn)
+            if not finite.all():
+                bad = [c for c, ok in zip(self.num_cols, finite.all(axis=0)) if not ok]
+                raise ValueError(f"Input contains NaN or infinity in numeric columns: {bad}")
+            z += Xn @ self.num_weights
+
+        for col, (lut, nan_w) in self.cat_luts.items():
+            get = lut.get
+            z += np.fromiter(
+                (nan_w if _is_missing(v) else get(v, 0.0) for v in columns[col]),
+                dtype=float,
+                count=n_rows,
+            )
+
+        return z
+
+    def proba(self, columns: Mapping[str, Sequence], n_rows: int) -> np.ndarray:
+        """classes_[1] olasılığı (LogisticRegression ile aynı: expit(decision))"""
+        return 1.0 / (1.0 + np.exp(-self.decision(columns, n_rows)))
+
+
+class InferenceEngine:
+    """
+    Tek geçişli skorlama
+
+    Args:
+        model: Eğitilmiş sklearn Pipeline (preprocess + classifier)
+        threshold: Pozitif sınıf için karar eşiği
+        compile: True ise FlatScorer derlenmeye çalışılır
+    """
+
+    def __init__(self, model, threshold: float = 0.5, compile: bool = True):
+        from sklearn.preprocessing import OneHotEncoder
+
+        self.model = model
+        self.preprocessor = model[:-1]
+        self.classifier = model[-1]
+        self.classes_ = self.classifier.classes_
+        self.threshold = threshold
+
+        classes = list(self.classes_)
+        self.pos_index = classes.index(POSITIVE_LABEL) if POSITIVE_LABEL in classes else len(classes) - 1
+        self.feature_names = list(getattr(model, "feature_names_in_", []))
+        self.categorical_cols = self._columns_of(OneHotEncoder)
+
+        self.scorer = FlatScorer.from_pipeline(model) if compile else None
+
+    def _columns_of(self, kind) -> list:
+        from sklearn.compose import ColumnTransformer
+
+        pre = self.model.steps[0][1]
+        cols = []
+        if isinstance(pre, ColumnTransformer):
+            for _, trans, col_list in pre.transformers_:
+                if isinstance(_unwrap(trans), kind) and isinstance(col_list, list):
+                    cols.extend(col_list)
+        return cols
+
+    @property
+    def compiled(self) -> bool:
+        return self.scorer is not None
+
+    def coerce_frame(self, X: "pd.DataFrame") -> "pd.DataFrame":
+        """
+        Dışarıdan gelen bir frame'i modelin beklediği şekle getirir:
+        kolon sırası, kategorik kolonlar object, diğerleri sayısal.
+        (Chunk'larda tamamı boş bir kategorik kolon float gelebilir.)
+        """
+        import pandas as pd
+
+        X = X.reindex(columns=self.feature_names)
+        cat = set(self.categorical_cols)
+        for c in self.feature_names:
+            if c in cat:
+                if X[c].dtype != object:
+                    X[c] = X[c].astype(object)
+            elif X[c].dtype == object:
+                X[c] = pd.to_numeric(X[c], errors="coerce")
+        return X
+
+    def _labels(self, proba_pos: np.ndarray, proba_all: Optional[np.ndarray] = None) -> np.ndarray:
+        if len(self.classes_) == 2:
+            pos = self.classes_[self.pos_index]
+            neg = self.classes_[1 - self.pos_index]
+            return np.where(proba_pos > self.threshold, pos, neg).astype(object)
+        return self.classes_[proba_all.argmax(axis=1)]
+
+    def _sklearn_proba(self, X: "pd.DataFrame") -> Tuple[np.ndarray, np.ndarray]:
+        observer = _stage_observer
+        if observer is None:
+            Xt = self.preprocessor.transform(X)
+            proba_all = self.classifier.predict_proba(Xt)
+            return proba_all[:, self.pos_index], proba_all
+
+        t0 = time.perf_counter()
+        Xt = self.preprocessor.transform(X)
+        t1 = time.perf_counter()
+        proba_all = self.classifier.predict_proba(Xt)
+        observer("transform", t1 - t0)
+        observer("classifier", time.perf_counter() - t1)
+        return proba_all[:, self.pos_index], proba_all
+
+    def _flat_proba(self, columns: Mapping[str, Sequence], n_rows: int) -> np.ndarray:
+        # Derlenmiş scorer'da transform ve classifier tek geçiştir
+        observer = _stage_observer
+        t0 = time.perf_counter() if observer is not None else 0.0
+        p1 = self.scorer.proba(columns, n_rows)
+        if observer is not None:
+            observer("compiled_score", time.perf_counter() - t0)
+        return p1 if self.pos_index == 1 else 1.0 - p1
+
+    def predict_frame(self, X: "pd.DataFrame", use_compiled: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            labels: np.ndarray (object)
+            proba_yes: np.ndarray (float)
+        """
+        if use_compiled and self.scorer is not None:
+            p = self._flat_proba({c: X[c].to_numpy() for c in X.columns}, len(X))
+            return self._labels(p), p
+
+        p, proba_all = self._sklearn_proba(X)
+        return self._labels(p, proba_all), p
+
+    def predict_columns(self, columns: Mapping[str, Sequence], n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Kolon bazlı girdi: {col: [değerler]}"""
+        if self.scorer is not None:
+            p = self._flat_proba(columns, n_rows)
+            return self._labels(p), p
+
+        import pandas as pd
+
+        X = pd.DataFrame({c: columns[c] for c in self.feature_names}, columns=self.feature_names)
+        p, proba_all = self._sklearn_proba(X)
+        return self._labels(p, proba_all), p
+
+    def predict_row(self, row: Dict[str, Any]) -> Tuple[Any, float]:
+        labels, p = self.predict_columns({c: [v] for c, v in row.items()}, 1)
+        return labels[0], float(p[0])
+
+    def check_parity(self, X: "pd.DataFrame") -> Dict[str, Any]:
+        """
+        FlatScorer ile sklearn pipeline'ını aynı veride karşılaştırır.
+
+        Returns:
+            dict: max_abs_diff, label_mismatches
+        """
+        if self.scorer is None:
+            return {"compiled": False}
+
+        labels_flat, p_flat = self.predict_frame(X, use_compiled=True)
+        p_ref = self.model.predict_proba(X)[:, self.pos_index]
+        labels_ref = self.model.predict(X)
+
+        return {
+            "compiled": True,
+            "rows": len(X),
+            "max_abs_diff": float(np.max(np.abs(p_flat - p_ref))) if len(X) else 0.0,
+            "label_mismatches": int(np.sum(labels_flat != labels_ref)),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+    import joblib
+    import pandas
+    from src.data.preprocess import preprocess
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "artifacts/churn_model.joblib"
+    model = joblib.load(model_path)
+    engine = InferenceEngine(model)
+
+    df = pandas.read_csv("data/raw/telco.csv")
+    X, _, _, _ = preprocess(df)
+
+    print(f"Compiled scorer: {engine.compiled}")
+    print("Parity:", engine.check_parity(X))
+
+    row = X.iloc[0].to_dict()
+    for name, fn in [
+        ("sklearn predict + predict_proba", lambda: (model.predict(X.iloc[:1]), model.predict_proba(X.iloc[:1]))),
+        ("engine (single row)", lambda: engine.predict_row(row)),
+    ]:
+        t0 = time.perf_counter()
+        for _ in range(200):
+            fn()
+        print(f"{name}: {(time.perf_counter() - t0) / 200 * 1000:.3f} ms/row")
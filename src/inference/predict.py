@@ -1,27 +1,231 @@
-import pandas as pd
+"""
+Batch scoring CLI
+
+Büyük CSV dosyalarını belleğe almadan skorlar: girdi pd.read_csv(chunksize=...)
+ile okunur, her chunk preprocess + InferenceEngine ile skorlanır (istenirse
+process pool'da; model her worker'da bir kez yüklenir) ve sonuç girdi
+sırası korunarak CSV/Parquet'e artımlı yazılır.
+
+Eksik/boş sayısal değerler API'deki gibi model meta'sındaki default'larla
+doldurulur; yine de skorlanamayan satırlar (inf, meta'sız artifact'ta eksik
+sayısal değer) boş label ve NaN olasılıkla yazılır ve özetle raporlanır.
+
+Kullanım:
+    python -m src.inference.predict --input data/raw/telco.csv --output data/scored/predictions.csv --n-jobs 4
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
 import joblib
+import numpy as np
+import pandas as pd
+
 from src.data.preprocess import preprocess
+from src.inference.engine import InferenceEngine
+from src.models.meta import load_ui_meta, meta_path_for
 
-if __name__ == "__main__":
-    # Load trained model
-    model = joblib.load("artifacts/churn_model.joblib")
+DEFAULT_MODEL_PATH = "artifacts/churn_model.joblib"
+DEFAULT_ID_COLUMN = "Customer ID"
+
+# Worker process başına bir kez yüklenen engine ve default'lar
+_engine = None
+_defaults = None
 
-    # Load raw data
-    df = pd.read_csv("data/raw/telco.csv")
 
-    # Apply same preprocessing as training
-    X, _, _, _ = preprocess(df)
+def load_defaults(model_path: str) -> Optional[Dict[str, Any]]:
+    """Model meta'sındaki default değerler (meta yoksa None)"""
+    meta = load_ui_meta(meta_path_for(model_path))
+    return meta["defaults"] if meta else None
 
-    # Take a random sample
-    sample = X.sample(10, random_state=42)
 
-    # Run inference
-    preds = model.predict(sample)
-    proba = model.predict_proba(sample)[:, 1]
+def _init_worker(model_path: str):
+    global _engine, _defaults
+    _engine = InferenceEngine(joblib.load(model_path))
+    _defaults = load_defaults(model_path)
 
-    # Show results
-    out = sample.copy()
-    out["pred_label"] = preds
+
+def fill_missing(engine: InferenceEngine, X: pd.DataFrame,
+                 defaults: Optional[Dict[str, Any]]) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Frame'i modelin şekline getirir ve eksik sayısal değerleri API'deki
+    LoadedModel.build_row gibi default'larla doldurur (sayıya çevrilemeyen
+    değerler coerce_frame'de NaN olur, onlar da). Kategorik NaN'lar
+    dokunulmadan kalır: OneHotEncoder eğitimde onları ayrı bir kategori
+    olarak öğrenir (ör. Offer / Internet Type boş = "yok").
+
+    Returns:
+        X: Doldurulmuş frame
+        valid: Skorlanabilir satırlar (tüm sayısal değerler sonlu)
+    """
+    X = engine.coerce_frame(X)
+    cat = set(engine.categorical_cols)
+    num = [c for c in X.columns if c not in cat]
+    if defaults:
+        fill = {c: defaults[c] for c in num if c in defaults and X[c].hasnans}
+        if fill:
+            X = X.fillna(fill)
+
+    if not num:
+        return X, np.ones(len(X), dtype=bool)
+    return X, np.isfinite(X[num].to_numpy(dtype=float)).all(axis=1)
+
+
+def score_chunk(chunk: pd.DataFrame, id_column: str = DEFAULT_ID_COLUMN, engine: InferenceEngine = None,
+                defaults: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Ham CSV chunk'ını preprocess edip skorlar
+
+    Returns:
+        pd.DataFrame: [id_column (varsa)], pred_label, pred_proba_yes
+        (skorlanamayan satırlarda pred_label boş, pred_proba_yes NaN)
+    """
+    if engine is None:
+        engine, defaults = _engine, _defaults
+    X, _, _, _ = preprocess(chunk)
+    X, valid = fill_missing(engine, X, defaults)
+
+    if valid.all():
+        labels, proba = engine.predict_frame(X)
+    else:
+        labels = np.full(len(X), None, dtype=object)
+        proba = np.full(len(X), np.nan)
+        idx = np.flatnonzero(valid)
+        if len(idx):
+            labels[idx], proba[idx] = engine.predict_frame(X.iloc[idx])
+
+    out = pd.DataFrame(index=chunk.index)
+    if id_column and id_column in chunk.columns:
+        out[id_column] = chunk[id_column].to_numpy()
+    out["pred_label"] = labels
     out["pred_proba_yes"] = proba
+    return out
+
+
+class ResultWriter:
+    """Sonuçları chunk chunk CSV veya Parquet'e yazar"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._pq_writer = None
+        self._first = True
+
+        if self.parquet and importlib.util.find_spec("pyarrow") is None:
+            raise SystemExit("Parquet çıktısı için pyarrow gerekli: pip install pyarrow")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self.path, table.schema)
+            self._pq_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+
+
+def score_file(input_path: str, output_path: str, model_path: str = DEFAULT_MODEL_PATH,
+               chunksize: int = 50_000, n_jobs: int = 1, id_column: str = DEFAULT_ID_COLUMN) -> dict:
+    """
+    CSV dosyasını chunk'lar halinde skorlar, girdi sırasını koruyarak yazar
+
+    Returns:
+        dict: rows, chunks, invalid_rows (skorlanamayan), seconds, rows_per_sec
+    """
+    writer = ResultWriter(output_path)
+    reader = pd.read_csv(input_path, chunksize=chunksize)
+
+    rows = chunks = invalid = 0
+    t0 = time.perf_counter()
+
+    def _report(done_rows):
+        elapsed = time.perf_counter() - t0
+        rate = done_rows / elapsed if elapsed > 0 else 0.0
+        print(f"  {done_rows:,} satır | {rate:,.0f} satır/sn", file=sys.stderr)
+
+    try:
+        if n_jobs <= 1:
+            engine = InferenceEngine(joblib.load(model_path))
+            defaults = load_defaults(model_path)
+            for chunk in reader:
+                out = score_chunk(chunk, id_column, engine=engine, defaults=defaults)
+                writer.write(out)
+                rows += len(out)
+                invalid += int(out["pred_label"].isna().sum())
+                chunks += 1
+                _report(rows)
+        else:
+            # Bellek sınırlı kalsın diye aynı anda en fazla 2 * n_jobs chunk işlenir
+            max_in_flight = 2 * n_jobs
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(model_path,)) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(score_chunk, chunk, id_column))
+                    if len(pending) >= max_in_flight:
+                        out = pending.popleft().result()
+                        writer.write(out)
+                        rows += len(out)
+                        invalid += int(out["pred_label"].isna().sum())
+                        chunks += 1
+                        _report(rows)
+                while pending:
+                    out = pending.popleft().result()
+                    writer.write(out)
+                    rows += len(out)
+                    invalid += int(out["pred_label"].isna().sum())
+                    chunks += 1
+                    _report(rows)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - t0
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "invalid_rows": invalid,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Churn batch scoring")
+    parser.add_argument("--input", default="data/raw/telco.csv", help="Girdi CSV dosyası")
+    parser.add_argument("--output", default="data/scored/predictions.csv", help="Çıktı (.csv veya .parquet)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model artifact'ı")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Chunk başına satır")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Paralel worker process sayısı")
+    parser.add_argument("--id-column", default=DEFAULT_ID_COLUMN, help="Çıktıya taşınacak ID kolonu")
+    args = parser.parse_args()
 
-    print(out[["pred_label", "pred_proba_yes"]])
+    summary = score_file(
+        args.input,
+        args.output,
+        model_path=args.model,
+        chunksize=args.chunksize,
+        n_jobs=args.n_jobs,
+        id_column=args.id_column,
+    )
+    print(
+        f"✅ {summary['rows']:,} satır skorlandı ({summary['chunks']} chunk) "
+        f"{summary['seconds']:.1f} sn, {summary['rows_per_sec']:,.0f} satır/sn -> {args.output}"
+    )
+    if summary["invalid_rows"]:
+        print(f"⚠️ {summary['invalid_rows']:,} satır skorlanamadı (sonlu olmayan / eksik sayısal değer)")
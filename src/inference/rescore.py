@@ -0,0 +1,266 @@
+"""
+Artımlı yeniden skorlama
+
+Gece çalışan tam skorlama yerine: her müşterinin (preprocess sonrası)
+feature satırı pd.util.hash_pandas_object ile 64-bit fingerprint'e çevrilir
+ve SQLite index'te (fingerprint, son skor, model anahtarı) saklanır. Sonraki
+çalıştırmalarda sadece fingerprint'i değişen, yeni gelen veya farklı bir
+modelle skorlanmış satırlar skorlanır; geri kalanı index'ten okunur.
+
+Model anahtarı artifact dosyasının sha256'sıdır (versiyon etiketi aynı kalıp
+dosya değişse bile eski skorlar stale sayılır).
+
+Eksik sayısal değerler predict.py'deki gibi model default'larıyla doldurulur
+(fingerprint doldurulmuş satırdan alınır). Yine de skorlanamayan satırlar
+index'e yazılmaz; her çalıştırmada tekrar denenir ve invalid_rows olarak
+raporlanır. Index'te olasılığı olmayan (eski sürümün NaN) kayıtlar stale sayılır.
+
+Kullanım:
+    python -m src.inference.rescore --input data/raw/telco.csv --model artifacts/churn_model_v2.joblib
+    python -m src.inference.rescore --input data/raw/telco.csv --output data/scored/predictions.csv
+    python -m src.inference.rescore --input data/raw/telco.csv --full      # index'i yok say
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.data.cache import file_sha256
+from src.data.preprocess import preprocess
+from src.inference.engine import InferenceEngine
+from src.inference.predict import DEFAULT_ID_COLUMN, DEFAULT_MODEL_PATH, ResultWriter, fill_missing, load_defaults
+from src.models.registry import DEFAULT_VERSION, version_of
+
+RESCORE_INDEX_PATH = os.getenv("RESCORE_INDEX_PATH", "data/scored/rescore_index.db")
+# SQLite parametre limiti altında kalan IN (...) boyutu
+LOOKUP_CHUNK = 900
+
+
+def row_fingerprints(engine: InferenceEngine, X: pd.DataFrame) -> np.ndarray:
+    """
+    Satır başına 64-bit fingerprint (int64 olarak; SQLite INTEGER'a sığar)
+
+    Chunk'tan chunk'a dtype değişse de (NaN'lı int kolonu float gelir) aynı
+    değerler aynı hash'i üretsin diye sayısal kolonlar float64'e çevrilir;
+    kategorikler coerce_frame sonrası zaten object (eksikler NaN).
+    """
+    X = engine.coerce_frame(X)
+    cat = set(engine.categorical_cols)
+    norm = {c: X[c] if c in cat else X[c].astype(np.float64) for c in X.columns}
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(norm, columns=X.columns), index=False)
+    return hashes.to_numpy().view(np.int64)
+
+
+class RescoreIndex:
+    """customer_id -> (fingerprint, model_key, skor) + çalıştırma geçmişi"""
+
+    def __init__(self, path: str = RESCORE_INDEX_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "customer_id TEXT PRIMARY KEY, fingerprint INTEGER NOT NULL, model_key TEXT NOT NULL, "
+            "model_version TEXT, pred_label TEXT, pred_proba_yes REAL, scored_at TEXT) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_at TEXT, input TEXT, model_version TEXT, model_key TEXT, rows INTEGER, scored INTEGER, "
+            "skipped INTEGER, new_rows INTEGER, changed_rows INTEGER, stale_rows INTEGER, "
+            "seconds REAL, score_seconds REAL)"
+        )
+
+    def fetch(self, ids: List[str]) -> Dict[str, tuple]:
+        """{customer_id: (fingerprint, model_key, pred_label, pred_proba_yes)}"""
+        out = {}
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            chunk = ids[start:start + LOOKUP_CHUNK]
+            sql = (
+                "SELECT customer_id, fingerprint, model_key, pred_label, pred_proba_yes FROM scores "
+                f"WHERE customer_id IN ({', '.join('?' for _ in chunk)})"
+            )
+            for row in self.conn.execute(sql, chunk):
+                out[row[0]] = row[1:]
+        return out
+
+    def upsert(self, records):
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scores "
+                "(customer_id, fingerprint, model_key, model_version, pred_label, pred_proba_yes, scored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def record_run(self, summary: Dict[str, Any]):
+        self.conn.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                summary["run_at"], summary["input"], summary["model_version"], summary["model_key"],
+                summary["rows"], summary["scored"], summary["skipped"], summary["new_rows"],
+                summary["changed_rows"], summary["stale_rows"], summary["seconds"], summary["score_seconds"],
+            ),
+        )
+
+    def scoring_totals(self) -> Tuple[float, int]:
+        """Geçmiş çalıştırmaların toplam (skorlama süresi, skorlanan satır) değeri"""
+        row = self.conn.execute("SELECT SUM(score_seconds), SUM(scored) FROM runs").fetchone()
+        return (row[0] or 0.0, row[1] or 0) if row else (0.0, 0)
+
+    def close(self):
+        self.conn.close()
+
+
+def rescore(input_path: str, model_path: str = DEFAULT_MODEL_PATH, index_path: str = RESCORE_INDEX_PATH,
+            output_path: Optional[str] = None, chunksize: int = 50_000, id_column: str = DEFAULT_ID_COLUMN,
+            full: bool = False) -> Dict[str, Any]:
+    """
+    Sadece değişen / yeni / stale satırları skorlar
+
+    Args:
+        output_path: Verilirse tüm müşteri tabanının güncel skorları yazılır
+                     (değişmeyenler index'ten)
+        full: True ise index yok sayılır, her satır skorlanır (index yine güncellenir)
+
+    Returns:
+        dict: rows, scored, skipped, new_rows, changed_rows, stale_rows, invalid_rows, seconds,
+              score_seconds, estimated_full_seconds (tüm satırları skorlama tahmini),
+              saved_seconds (atlanan satırlar için harcanmayan skorlama süresi)
+    """
+    t0 = time.perf_counter()
+    model_key = file_sha256(Path(model_path))
+    model_version = version_of(model_path) or DEFAULT_VERSION
+    engine = InferenceEngine(joblib.load(model_path))
+    defaults = load_defaults(model_path)
+
+    index = RescoreIndex(index_path)
+    prior_seconds, prior_rows = index.scoring_totals()
+    writer = ResultWriter(output_path) if output_path else None
+
+    counts = {"rows": 0, "scored": 0, "skipped": 0, "new_rows": 0, "changed_rows": 0, "stale_rows": 0,
+              "invalid_rows": 0}
+    score_seconds = 0.0
+    try:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            if id_column not in chunk.columns:
+                raise ValueError(f"{input_path} has no '{id_column}' column")
+            ids = chunk[id_column].astype(str).tolist()
+            X, _, _, _ = preprocess(chunk)
+            X, valid = fill_missing(engine, X, defaults)
+            fps = row_fingerprints(engine, X)
+
+            labels = np.full(len(ids), None, dtype=object)
+            probas = np.full(len(ids), np.nan)
+            todo = np.full(len(ids), full)
+            known = {} if full else index.fetch(ids)
+            for i, cid in enumerate(ids if not full else ()):
+                prev = known.get(cid)
+                if prev is None:
+                    counts["new_rows"] += 1
+                    todo[i] = True
+                elif prev[0] != fps[i]:
+                    counts["changed_rows"] += 1
+                    todo[i] = True
+                elif prev[1] != model_key or prev[3] is None or math.isnan(prev[3]):
+                    counts["stale_rows"] += 1
+                    todo[i] = True
+                else:
+                    labels[i], probas[i] = prev[2], prev[3]
+
+            counts["invalid_rows"] += int((~valid).sum())
+            idx = np.flatnonzero(todo & valid)
+            if len(idx):
+                ts = time.perf_counter()
+                labels[idx], probas[idx] = engine.predict_frame(X.iloc[idx])
+                score_seconds += time.perf_counter() - ts
+
+                now = datetime.now().isoformat()
+                index.upsert(
+                    (ids[i], int(fps[i]), model_key, model_version, labels[i], float(probas[i]), now)
+                    for i in idx
+                )
+
+            counts["rows"] += len(ids)
+            counts["scored"] += len(idx)
+            counts["skipped"] += int((~todo).sum())
+
+            if writer is not None:
+                writer.write(pd.DataFrame({id_column: ids, "pred_label": labels, "pred_proba_yes": probas}))
+            print(f"  {counts['rows']:,} satır | {counts['scored']:,} skorlandı, {counts['skipped']:,} atlandı",
+                  file=sys.stderr)
+
+        seconds = time.perf_counter() - t0
+        # Atlanan satırlar için harcanmayan skorlama süresi; satır başı maliyet
+        # bu ve önceki çalıştırmaların toplamından (küçük delta'larda sabit
+        # maliyet tahmini şişirmesin)
+        total_rows = prior_rows + counts["scored"]
+        cost = (prior_seconds + score_seconds) / total_rows if total_rows else None
+        estimated_full = counts["rows"] * cost if cost is not None else None
+        summary = {
+            "run_at": datetime.now().isoformat(),
+            "input": str(input_path),
+            "model_version": model_version,
+            "model_key": model_key,
+            **counts,
+            "seconds": seconds,
+            "score_seconds": score_seconds,
+            "estimated_full_seconds": estimated_full,
+            "saved_seconds": max(estimated_full - score_seconds, 0.0) if estimated_full is not None else None,
+        }
+        index.record_run(summary)
+    finally:
+        if writer is not None:
+            writer.close()
+        index.close()
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sadece değişen satırları yeniden skorla")
+    parser.add_argument("--input", default="data/raw/telco.csv", help="Girdi CSV dosyası")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Model artifact'ı")
+    parser.add_argument("--index", default=RESCORE_INDEX_PATH, help="Fingerprint/skor index'i (SQLite)")
+    parser.add_argument("--output", help="Tüm müşterilerin güncel skorları (.csv veya .parquet)")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Chunk başına satır")
+    parser.add_argument("--id-column", default=DEFAULT_ID_COLUMN, help="Müşteri ID kolonu")
+    parser.add_argument("--full", action="store_true", help="Index'i yok say, her satırı skorla")
+    args = parser.parse_args()
+
+    s = rescore(
+        args.input,
+        model_path=args.model,
+        index_path=args.index,
+        output_path=args.output,
+        chunksize=args.chunksize,
+        id_column=args.id_column,
+        full=args.full,
+    )
+    print(
+        f"✅ {s['rows']:,} satır: {s['scored']:,} skorlandı "
+        f"(yeni {s['new_rows']:,}, değişen {s['changed_rows']:,}, stale {s['stale_rows']:,}), "
+        f"{s['skipped']:,} atlandı | {s['seconds']:.2f} sn"
+    )
+    if s["invalid_rows"]:
+        print(f"⚠️ {s['invalid_rows']:,} satır skorlanamadı (sonlu olmayan / eksik sayısal değer), index'e yazılmadı")
+    if s["saved_seconds"] is not None:
+        print(
+            f"⏱️ Skorlama {s['score_seconds']:.2f} sn; tüm satırlar skorlansaydı ~{s['estimated_full_seconds']:.2f} sn "
+            f"(kazanç {s['saved_seconds']:.2f} sn)"
+        )
@@ -0,0 +1,287 @@
+"""
+Model versiyonlarının karşılaştırmalı değerlendirmesi
+
+Registry'deki her churn_model_v*.joblib aynı holdout set üzerinde skorlanır
+(train() ile aynı split: test_size=0.2, random_state=42, stratify). Her model
+ayrı bir process'te değerlendirilir; fit edilmiş preprocessor'ı aynı olan
+(joblib.hash) modeller için holdout bir kez transform edilip paylaşılır.
+
+Metrikler: ROC-AUC, PR-AUC, Brier, log loss, 0.5 eşiğinde accuracy/F1,
+kalibrasyon eğrisi, decile bazında lift/gain ve satır başına latency
+(batch ve tek satır).
+
+Sonuçlar (model dosyası hash'i, veri seti hash'i) anahtarıyla
+data/cache/eval altında saklanır; değişmeyen modeller tekrar skorlanmaz.
+
+Kullanım:
+    python -m src.models.evaluate
+    python -m src.models.evaluate --versions 1 2 --holdout-file data/raw/holdout.csv --output reports/eval.json
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, brier_score_loss, f1_score, log_loss, roc_auc_score,
+)
+from sklearn.model_selection import train_test_split
+
+from src.data.cache import CACHE_DIR, file_sha256, dataset_hash, load_dataset
+from src.data.preprocess import preprocess
+from src.inference.engine import InferenceEngine
+from src.models.registry import ARTIFACTS_DIR, discover_versions
+
+POSITIVE_LABEL = "Yes"
+EVAL_CACHE_DIR = Path(os.getenv("EVAL_CACHE_DIR", str(CACHE_DIR / "eval")))
+EVAL_FORMAT_VERSION = 1
+CALIBRATION_BINS = 10
+LATENCY_SINGLE_ROWS = 200
+
+
+def load_holdout(data_path: str = "data/raw/telco.csv", holdout_file: Optional[str] = None):
+    """
+    Returns:
+        X_test, y_test, veri anahtarı (cache için)
+    """
+    if holdout_file:
+        X, y, _, _ = preprocess(pd.read_csv(holdout_file))
+        if y is None:
+            raise ValueError(f"{holdout_file} has no label column")
+        key = {"holdout_file": dataset_hash(holdout_file)}
+        return X.reset_index(drop=True), y.reset_index(drop=True), _key_of(key)
+
+    X, y, _, _ = load_dataset(data_path)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    key = {"dataset": dataset_hash(data_path), "test_size": 0.2, "random_state": 42}
+    return X_test.reset_index(drop=True), y_test.reset_index(drop=True), _key_of(key)
+
+
+def _key_of(payload: Dict[str, Any]) -> str:
+    payload = {**payload, "format_version": EVAL_FORMAT_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_path(model_sha: str, data_key: str) -> Path:
+    return EVAL_CACHE_DIR / f"{model_sha[:16]}-{data_key[:16]}.json"
+
+
+def _read_cached(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_cached(path: Path, result: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp, path)
+
+
+def lift_table(y_true: np.ndarray, scores: np.ndarray, n_bins: int = 10) -> List[Dict[str, float]]:
+    """Skora göre azalan sıralı decile'lar: yakalanan pozitif oranı (gain) ve lift"""
+    order = np.argsort(-scores, kind="stable")
+    y_sorted = y_true[order]
+    total_pos = max(int(y_sorted.sum()), 1)
+    base_rate = y_sorted.mean() if len(y_sorted) else 0.0
+
+    rows = []
+    captured = 0
+    for k, part in enumerate(np.array_split(y_sorted, n_bins), start=1):
+        captured += int(part.sum())
+        rate = part.mean() if len(part) else 0.0
+        rows.append({
+            "decile": k,
+            "rows": int(len(part)),
+            "positives": int(part.sum()),
+            "response_rate": float(rate),
+            "lift": float(rate / base_rate) if base_rate else 0.0,
+            "cumulative_gain": captured / total_pos,
+            "cumulative_lift": float((captured / total_pos) / (k / n_bins)),
+        })
+    return rows
+
+
+def score_metrics(y_true: np.ndarray, scores: np.ndarray, threshold: float = 0.5) -> Dict[str, Any]:
+    pred = scores >= threshold
+    prob_true, prob_pred = calibration_curve(y_true, scores, n_bins=CALIBRATION_BINS, strategy="quantile")
+    return {
+        "roc_auc": float(roc_auc_score(y_true, scores)),
+        "pr_auc": float(average_precision_score(y_true, scores)),
+        "brier": float(brier_score_loss(y_true, scores)),
+        "log_loss": float(log_loss(y_true, np.clip(scores, 1e-15, 1 - 1e-15), labels=[0, 1])),
+        "accuracy": float(accuracy_score(y_true, pred)),
+        "f1_score": float(f1_score(y_true, pred, zero_division=0)),
+        "calibration": {"mean_predicted": prob_pred.tolist(), "fraction_positive": prob_true.tolist()},
+        "lift": lift_table(y_true, scores),
+    }
+
+
+def _measure_latency(model, X: pd.DataFrame) -> Dict[str, float]:
+    """Uçtan uca (ham satır -> olasılık) latency; engine API'deki yolun aynısı"""
+    engine = InferenceEngine(model)
+    t0 = time.perf_counter()
+    engine.predict_frame(X)
+    batch = time.perf_counter() - t0
+
+    records = X.head(LATENCY_SINGLE_ROWS).to_dict(orient="records")
+    times = []
+    for row in records:
+        t0 = time.perf_counter()
+        engine.predict_row(row)
+        times.append(time.perf_counter() - t0)
+    return {
+        "batch_ms_per_row": batch * 1000.0 / max(len(X), 1),
+        "single_row_p50_ms": float(np.percentile(times, 50) * 1000.0) if times else None,
+        "single_row_p95_ms": float(np.percentile(times, 95) * 1000.0) if times else None,
+        "compiled_scorer": engine.compiled,
+    }
+
+
+def evaluate_model(version: str, path: str, X: pd.DataFrame, y_true: np.ndarray, Xt=None) -> Dict[str, Any]:
+    """
+    Tek bir modeli değerlendirir (worker process'te çalışır)
+
+    Args:
+        Xt: Preprocessor çıktısı; verilirse sadece classifier skorlanır
+    """
+    model = joblib.load(path)
+    clf = model.steps[-1][1]
+    pos = list(clf.classes_).index(POSITIVE_LABEL)
+
+    t0 = time.perf_counter()
+    if Xt is None:
+        scores = model.predict_proba(X)[:, pos]
+    else:
+        scores = clf.predict_proba(Xt)[:, pos]
+    score_seconds = time.perf_counter() - t0
+
+    return {
+        "version": version,
+        "model_type": type(clf).__name__,
+        "rows": int(len(y_true)),
+        "positive_rate": float(y_true.mean()),
+        "shared_transform": Xt is not None,
+        "score_seconds": score_seconds,
+        **score_metrics(y_true, scores),
+        "latency": _measure_latency(model, X),
+    }
+
+
+def evaluate_versions(versions: Optional[List[str]] = None, data_path: str = "data/raw/telco.csv",
+                      holdout_file: Optional[str] = None, n_jobs: int = -1, use_cache: bool = True,
+                      artifacts_dir: str = ARTIFACTS_DIR) -> Dict[str, Any]:
+    """
+    Returns:
+        {"data_key", "rows", "models": {versiyon: sonuç}, "cache_hits", ...}
+    """
+    available = discover_versions(artifacts_dir)
+    versions = versions or list(available)
+    unknown = [v for v in versions if v not in available]
+    if unknown:
+        raise ValueError(f"Unknown versions: {unknown} (available: {list(available)})")
+
+    X, y, data_key = load_holdout(data_path, holdout_file)
+    y_true = (y.to_numpy() == POSITIVE_LABEL).astype(int)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for v in versions:
+        sha = file_sha256(available[v])
+        cached = _read_cached(_cache_path(sha, data_key)) if use_cache else None
+        if cached is not None:
+            results[v] = {**cached, "cached": True}
+        else:
+            pending.append((v, available[v], sha))
+
+    # Aynı fit edilmiş preprocessor'a sahip modeller holdout transform'unu paylaşır
+    shared: Dict[str, Any] = {}
+    jobs = []
+    t0 = time.perf_counter()
+    for v, path, sha in pending:
+        pre = joblib.load(path).steps[0][1]
+        fp = joblib.hash(pre)
+        if fp not in shared:
+            shared[fp] = pre.transform(X)
+        jobs.append((v, path, sha, fp))
+    transform_seconds = time.perf_counter() - t0
+
+    if jobs:
+        n_workers = len(jobs) if n_jobs == -1 else max(1, min(n_jobs, len(jobs)))
+        print(f"🔍 {len(jobs)} model değerlendiriliyor ({len(shared)} ortak transform, n_jobs={n_workers})")
+        outputs = Parallel(n_jobs=n_workers)(
+            delayed(evaluate_model)(v, str(path), X, y_true, shared[fp]) for v, path, _, fp in jobs
+        )
+        for (v, _, sha, fp), out in zip(jobs, outputs):
+            out.update({"model_sha256": sha, "preprocessor_hash": fp, "evaluated_at": datetime.now().isoformat()})
+            if use_cache:
+                _write_cached(_cache_path(sha, data_key), out)
+            results[v] = {**out, "cached": False}
+
+    return {
+        "data_key": data_key,
+        "holdout": holdout_file or f"{data_path} (test_size=0.2, random_state=42)",
+        "rows": int(len(y_true)),
+        "cache_hits": sum(1 for r in results.values() if r["cached"]),
+        "shared_transforms": len(shared),
+        "transform_seconds": transform_seconds,
+        "models": {v: results[v] for v in versions},
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n" + "="*78)
+    print(f"MODEL DEĞERLENDİRME - {report['rows']} satır, {report['holdout']}")
+    print("="*78)
+    print(f"{'versiyon':<10}{'ROC-AUC':>9}{'PR-AUC':>9}{'Brier':>8}{'F1':>8}{'lift@1':>8}"
+          f"{'gain@3':>8}{'ms/satır':>10}{'p50 ms':>8}  cache")
+    for v, r in report["models"].items():
+        lat = r["latency"]
+        print(f"{v:<10}{r['roc_auc']:>9.4f}{r['pr_auc']:>9.4f}{r['brier']:>8.4f}{r['f1_score']:>8.4f}"
+              f"{r['lift'][0]['lift']:>8.2f}{r['lift'][2]['cumulative_gain']:>8.2f}"
+              f"{lat['batch_ms_per_row']:>10.4f}{lat['single_row_p50_ms']:>8.3f}  {'✓' if r['cached'] else ''}")
+    print("="*78 + "\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Registry'deki model versiyonlarını karşılaştır")
+    parser.add_argument("--versions", nargs="*", help="Değerlendirilecek versiyonlar (varsayılan: hepsi)")
+    parser.add_argument("--data", default="data/raw/telco.csv", help="Split yapılacak veri seti")
+    parser.add_argument("--holdout-file", help="Hazır holdout CSV (verilirse split yapılmaz)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Paralel process sayısı (-1: model başına bir)")
+    parser.add_argument("--no-cache", action="store_true", help="Cache'i yok say ve yeniden hesapla")
+    parser.add_argument("--output", help="Raporun yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    report = evaluate_versions(
+        versions=args.versions,
+        data_path=args.data,
+        holdout_file=args.holdout_file,
+        n_jobs=args.n_jobs,
+        use_cache=not args.no_cache,
+    )
+    print_report(report)
+    print(f"⏱️ {time.perf_counter() - t0:.2f}s ({report['cache_hits']}/{len(report['models'])} cache)")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Rapor kaydedildi: {args.output}")
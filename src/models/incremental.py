@@ -0,0 +1,402 @@
+"""
+Artımlı (warm-start) yeniden eğitim
+
+train() her seferinde tüm telco.csv'yi okuyup sıfırdan fit eder. Bu modül
+yalnızca yeni etiketli veriyi (delta) kullanır: parent versiyonun pipeline'ı
+yüklenir, preprocessor (StandardScaler + OneHotEncoder) yeniden fit edilmez,
+delta chunk'lar halinde okunup bu preprocessor'dan geçirilir ve classifier
+parent'ın katsayılarından başlatılır. Maliyet geçmişle değil delta ile ölçeklenir.
+
+Delta'da encoder'ın görmediği kategoriler varsa categories_ içine sıralı
+konumlarına eklenir ve karşılık gelen katsayılar 0 ile başlatılır (yeni
+kategori eğitimden önce "bilinmeyen" ile aynı skoru üretir).
+
+Modlar:
+    sgd:        (varsayılan) SGDClassifier(log_loss) ile chunk başına
+                partial_fit; delta belleğe alınmaz. Parent katsayılarından
+                küçük adımlarla ilerler, geçmiş veride öğrenileni korur.
+                Sonuç katsayılar parent'ın estimator tipine yazılır (engine'in
+                derlenmiş scorer'ı aynen çalışır)
+    warm_start: LogisticRegression(warm_start=True) delta üzerinde fit edilir
+                (liblinear warm start desteklemediği için saga kullanılır).
+                Parent katsayıları sadece başlangıç noktasıdır; solver
+                yakınsadığında sonuç delta'nın kendi optimumudur, yani bu
+                artımlı güncelleme değil delta ile yeniden eğitimdir
+
+Yeni versiyon registry'ye normal bir artifact olarak yazılır; metadata'da
+parent versiyon ve soy ağacı (lineage) tutulur.
+
+Kullanım:
+    python -m src.models.incremental data/raw/new_labels.csv --parent 2
+    python -m src.models.incremental new.csv --parent 2 --version 4 --mode warm_start --chunk-size 5000
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import classification_report, accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder
+
+from src.api.drift import profile_path_for
+from src.data.cache import dataset_hash
+from src.data.preprocess import preprocess
+from src.inference.engine import _is_missing, _unwrap
+from src.models.meta import MAX_CATEGORICAL_OPTIONS, build_ui_meta, load_ui_meta, meta_path_for, save_ui_meta
+from src.models.registry import ARTIFACTS_DIR, discover_versions
+
+POSITIVE_LABEL = "Yes"
+MODES = ("sgd", "warm_start")
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def metadata_path_for(model_path) -> Path:
+    """artifacts/churn_model_v2.joblib -> artifacts/churn_model_v2_metadata.json"""
+    p = Path(model_path)
+    return p.with_name(f"{p.stem}_metadata.json")
+
+
+def cumulative_train_size(metadata: Dict) -> int:
+    """
+    Modelin katsayılarına yansıyan toplam eğitim satırı: sgd ile türetilen
+    versiyonlarda parent'ın birikimi + delta, diğerlerinde train_size
+    """
+    incremental = metadata.get("incremental") or {}
+    return int(incremental.get("cumulative_train_size") or metadata.get("train_size") or 0)
+
+
+def next_version(artifacts_dir: str = ARTIFACTS_DIR) -> str:
+    numeric = [int(v) for v in discover_versions(artifacts_dir) if v.isdigit()]
+    return str(max(numeric, default=0) + 1)
+
+
+def iter_labeled_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[pd.DataFrame, pd.Series]]:
+    """CSV'yi chunk chunk okuyup preprocess eder; etiketsiz satırlar atlanır"""
+    for df in pd.read_csv(path, chunksize=chunk_size):
+        X, y, _, _ = preprocess(df)
+        if y is None:
+            raise ValueError(f"{path} has no label column; incremental training needs labeled rows")
+        labeled = y.notna().to_numpy()
+        if labeled.any():
+            yield X[labeled].reset_index(drop=True), y[labeled].reset_index(drop=True)
+
+
+def _find_encoder(model) -> Tuple[ColumnTransformer, str, OneHotEncoder, List[str]]:
+    pre = model.steps[0][1]
+    if not isinstance(pre, ColumnTransformer):
+        raise ValueError("Incremental training expects a ColumnTransformer preprocessor")
+    for name, trans, cols in pre.transformers_:
+        est = _unwrap(trans)
+        if isinstance(est, OneHotEncoder) and isinstance(cols, list):
+            if est.drop_idx_ is not None or est._infrequent_enabled:
+                raise ValueError("OneHotEncoder with drop / infrequent categories cannot be extended")
+            return pre, name, est, cols
+    raise ValueError("No OneHotEncoder found in preprocessor")
+
+
+def extend_categories(model, X: pd.DataFrame) -> Dict[str, List[str]]:
+    """
+    X'te görülen yeni kategorileri encoder'a ekler, classifier katsayılarını
+    aynı konumlara 0 ekleyerek genişletir (pipeline yerinde değişir)
+
+    Returns:
+        {kolon: eklenen kategoriler}
+    """
+    pre, name, encoder, cols = _find_encoder(model)
+    clf = model.steps[-1][1]
+
+    added: Dict[str, List[str]] = {}
+    insert_at: List[int] = []
+    # Parent'ın çıktı matrisindeki (genişletmeden önceki) sütun konumu
+    offset = pre.output_indices_[name].start
+    for i, col in enumerate(cols):
+        cats = encoder.categories_[i]
+        known = set(cats.tolist())
+        new = sorted({v for v in X[col].tolist() if not _is_missing(v) and v not in known})
+        if new:
+            # fit() ile aynı düzen: sıralı, eksik değer kategorisi en sonda
+            values = [c for c in cats.tolist() if not _is_missing(c)]
+            missing = [c for c in cats.tolist() if _is_missing(c)]
+            merged = sorted(values + new) + missing
+            positions = {c: j for j, c in enumerate(merged)}
+            # k. yeni kategoriden önce k yeni kategori var; geri kalanı eski sütunlar
+            insert_at.extend(offset + positions[c] - k for k, c in enumerate(new))
+            encoder.categories_[i] = np.asarray(merged, dtype=cats.dtype)
+            added[col] = new
+        offset += len(cats)
+
+    if not added:
+        return added
+
+    encoder._n_features_outs = [len(c) for c in encoder.categories_]
+    # Sonraki transformer'ların çıktı aralıkları kayar
+    start = 0
+    for key, sl in list(pre.output_indices_.items()):
+        width = sl.stop - sl.start
+        if key == name:
+            width = sum(encoder._n_features_outs)
+        pre.output_indices_[key] = slice(start, start + width) if width else slice(0, 0)
+        start += width
+
+    # np.insert indeksleri eski dizi üzerinden yorumlar
+    clf.coef_ = np.insert(clf.coef_, insert_at, 0.0, axis=1)
+    if hasattr(clf, "n_features_in_"):
+        clf.n_features_in_ = clf.coef_.shape[1]
+    return added
+
+
+def _evaluate(model, X: pd.DataFrame, y: pd.Series) -> Dict[str, float]:
+    y_pred = model.predict(X)
+    return {
+        "accuracy": float(accuracy_score(y, y_pred)),
+        "f1_score": float(f1_score(y, y_pred, pos_label=POSITIVE_LABEL, average="binary")),
+        "precision": float(precision_score(y, y_pred, pos_label=POSITIVE_LABEL, average="binary", zero_division=0)),
+        "recall": float(recall_score(y, y_pred, pos_label=POSITIVE_LABEL, average="binary", zero_division=0)),
+    }
+
+
+def _split(X: pd.DataFrame, y: pd.Series, holdout: float):
+    """X_train, X_test, y_train, y_test (holdout=0 -> boş test)"""
+    if holdout <= 0 or len(X) < 2:
+        return X, X.iloc[:0], y, y.iloc[:0]
+    stratify = y if y.value_counts().min() >= 2 else None
+    return train_test_split(X, y, test_size=holdout, random_state=42, stratify=stratify)
+
+
+def _sgd_for(clf, parent_train_size: int, eta0: float) -> SGDClassifier:
+    """LogisticRegression amacına karşılık gelen SGD optimizer'ı (C -> alpha)"""
+    if not hasattr(clf, "coef_"):
+        raise ValueError(f"Incremental training needs a linear classifier, parent has {type(clf).__name__}")
+    penalty = getattr(clf, "penalty", "l2") or None
+    C = float(getattr(clf, "C", 1.0))
+    return SGDClassifier(
+        loss="log_loss",
+        penalty=penalty if penalty in ("l1", "l2", "elasticnet") else None,
+        alpha=1.0 / (C * max(parent_train_size, 1)),
+        learning_rate="constant",
+        eta0=eta0,
+        random_state=42,
+    )
+
+
+def _sgd_step(model, sgd: SGDClassifier, Xt, y, epochs: int):
+    """Pipeline'daki katsayılardan başlayıp bir chunk üzerinde partial_fit"""
+    clf = model.steps[-1][1]
+    sgd.coef_ = clf.coef_.copy()
+    sgd.intercept_ = clf.intercept_.copy()
+    sgd.classes_ = clf.classes_
+    sgd.n_features_in_ = Xt.shape[1]
+    for _ in range(epochs):
+        sgd.partial_fit(Xt, y)
+    clf.coef_ = sgd.coef_.copy()
+    clf.intercept_ = sgd.intercept_.copy()
+
+
+def _warm_start_classifier(clf) -> LogisticRegression:
+    if not isinstance(clf, LogisticRegression):
+        raise ValueError(f"warm_start mode needs LogisticRegression, parent has {type(clf).__name__}; use --mode sgd")
+    params = {"warm_start": True}
+    if clf.solver == "liblinear":
+        params["solver"] = "saga"
+    new = clone(clf).set_params(**params)
+    new.coef_ = clf.coef_.copy()
+    new.intercept_ = clf.intercept_.copy()
+    new.classes_ = clf.classes_
+    return new
+
+
+def incremental_train(data_path: str, parent: Optional[str] = None, version: Optional[str] = None,
+                      mode: str = "sgd", chunk_size: int = DEFAULT_CHUNK_SIZE, holdout: float = 0.2,
+                      epochs: int = 1, eta0: float = 0.01, artifacts_dir: str = ARTIFACTS_DIR):
+    """
+    Parent versiyondan başlayarak yeni etiketli veriyle yeni bir versiyon üretir
+
+    Args:
+        data_path: Yeni etiketli satırlar (telco.csv formatında CSV)
+        parent: Başlangıç versiyonu (None -> registry'deki en son versiyon)
+        version: Yeni versiyon (None -> en büyük numara + 1)
+        mode: "sgd" veya "warm_start" (delta ile yeniden fit)
+        chunk_size: CSV okuma chunk boyutu
+        holdout: Her chunk'tan değerlendirme için ayrılan oran
+        epochs: sgd modunda chunk başına geçiş sayısı
+        eta0: sgd modunda sabit öğrenme oranı
+    """
+    if mode not in MODES:
+        raise ValueError(f"Bilinmeyen mod: {mode} (seçenekler: {list(MODES)})")
+
+    versions = discover_versions(artifacts_dir)
+    if not versions:
+        raise FileNotFoundError(f"No model versions in {artifacts_dir}")
+    parent = parent or list(versions)[-1]
+    if parent not in versions:
+        raise ValueError(f"Unknown parent version: {parent} (available: {list(versions)})")
+    version = version or next_version(artifacts_dir)
+    if version in versions:
+        raise ValueError(f"Version {version} already exists")
+
+    parent_path = versions[parent]
+    parent_metadata = {}
+    if metadata_path_for(parent_path).exists():
+        with open(metadata_path_for(parent_path), "r") as f:
+            parent_metadata = json.load(f)
+
+    parent_model = joblib.load(parent_path)
+    model = joblib.load(parent_path)
+    clf = model.steps[-1][1]
+    parent_train_size = cumulative_train_size(parent_metadata)
+
+    t0 = time.perf_counter()
+    new_categories: Dict[str, List[str]] = {}
+    train_parts, test_parts = [], []
+    meta_sample = None
+    n_chunks = 0
+    sgd = _sgd_for(clf, parent_train_size, eta0) if mode == "sgd" else None
+
+    for X_chunk, y_chunk in iter_labeled_chunks(data_path, chunk_size):
+        n_chunks += 1
+        if meta_sample is None:
+            meta_sample = X_chunk
+        for col, cats in extend_categories(model, X_chunk).items():
+            new_categories.setdefault(col, []).extend(cats)
+
+        X_tr, X_te, y_tr, y_te = _split(X_chunk, y_chunk, holdout)
+        test_parts.append((X_te, y_te))
+        if sgd is not None:
+            # Chunk işlendikten sonra bellekte tutulmaz
+            _sgd_step(model, sgd, model.steps[0][1].transform(X_tr), y_tr.to_numpy(), epochs)
+            train_parts.append((None, y_tr))
+        else:
+            train_parts.append((X_tr, y_tr))
+
+    if not n_chunks:
+        raise ValueError(f"No labeled rows in {data_path}")
+
+    y_train = pd.concat([y for _, y in train_parts], ignore_index=True)
+    X_test = pd.concat([X for X, _ in test_parts], ignore_index=True)
+    y_test = pd.concat([y for _, y in test_parts], ignore_index=True)
+
+    if sgd is None:
+        # Kategoriler tüm chunk'lar görüldükten sonra sabit; transform tek seferde
+        pre = model.steps[0][1]
+        Xt = sparse.vstack([sparse.csr_matrix(pre.transform(X)) for X, _ in train_parts]).tocsr()
+        if y_train.nunique() < 2:
+            raise ValueError("warm_start mode needs both classes in the new data; use --mode sgd")
+        new_clf = _warm_start_classifier(clf)
+        new_clf.fit(Xt, y_train.to_numpy())
+        model.steps[-1] = (model.steps[-1][0], new_clf)
+    train_seconds = time.perf_counter() - t0
+    classifier = model.steps[-1][1]
+
+    metrics = _evaluate(model, X_test, y_test) if len(X_test) else {}
+    parent_metrics = _evaluate(parent_model, X_test, y_test) if len(X_test) else {}
+
+    print("\n" + "="*50)
+    print(f"MODEL V{version} - ARTIMLI EĞİTİM (parent v{parent}, {mode})")
+    print("="*50)
+    print(f"Yeni satır: {len(y_train) + len(y_test)} ({n_chunks} chunk), süre: {train_seconds:.2f}s")
+    if new_categories:
+        print(f"Yeni kategoriler: {new_categories}")
+    if len(X_test):
+        print(classification_report(y_test, model.predict(X_test)))
+        for k in metrics:
+            print(f"{k}: {metrics[k]:.4f} (parent: {parent_metrics[k]:.4f})")
+    print("="*50 + "\n")
+
+    os.makedirs(artifacts_dir, exist_ok=True)
+    model_filename = Path(artifacts_dir) / f"churn_model_v{version}.joblib"
+
+    # Meta/profil model dosyasından önce yazılır: registry watcher joblib'i
+    # gördüğünde yan dosyalar hazır olur
+    ui_meta = load_ui_meta(meta_path_for(parent_path))
+    if ui_meta is None:
+        _, _, cat_cols, num_cols = preprocess(meta_sample)
+        ui_meta = build_ui_meta(model, meta_sample, cat_cols, num_cols)
+    else:
+        for col, cats in new_categories.items():
+            options = sorted(set(ui_meta["categorical_options"].get(col, [])) | {str(c) for c in cats})
+            ui_meta["categorical_options"][col] = options[:MAX_CATEGORICAL_OPTIONS]
+    save_ui_meta(ui_meta, meta_path_for(model_filename))
+
+    # Drift referansı geçmiş dağılımı temsil etmeye devam eder
+    if profile_path_for(parent_path).exists():
+        shutil.copyfile(profile_path_for(parent_path), profile_path_for(model_filename))
+
+    metadata = {
+        "version": version,
+        "training_date": datetime.now().isoformat(),
+        "metrics": metrics,
+        "model_type": type(classifier).__name__,
+        "model_params": {k: v for k, v in classifier.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+        "preprocessor": {
+            "numeric": "StandardScaler",
+            "categorical": "OneHotEncoder"
+        },
+        "train_size": len(y_train),
+        "test_size": len(y_test),
+        "features_count": len(ui_meta["expected_cols"]),
+        "random_state": 42,
+        "parent_version": parent,
+        "lineage": parent_metadata.get("lineage", []) + [parent],
+        "incremental": {
+            "mode": mode,
+            "data_path": str(data_path),
+            "data_hash": dataset_hash(data_path),
+            "new_rows": len(y_train) + len(y_test),
+            "parent_train_size": parent_train_size,
+            # warm_start delta'nın optimumuna yakınsar; parent satırları sayılmaz
+            "cumulative_train_size": parent_train_size + len(y_train) if mode == "sgd" else len(y_train),
+            "chunks": n_chunks,
+            "chunk_size": chunk_size,
+            "train_seconds": train_seconds,
+            "new_categories": new_categories,
+            "parent_metrics": parent_metrics,
+            **({"epochs": epochs, "eta0": eta0} if mode == "sgd" else {}),
+        },
+    }
+    with open(metadata_path_for(model_filename), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    tmp = model_filename.with_name(f".{model_filename.name}.{os.getpid()}.tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, model_filename)
+    print(f"✅ Model kaydedildi: {model_filename} (parent v{parent})")
+
+    return model, metadata
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Yeni etiketli veriyle artımlı eğitim")
+    parser.add_argument("data", help="Yeni etiketli satırlar (CSV)")
+    parser.add_argument("--parent", help="Başlangıç versiyonu (varsayılan: en son versiyon)")
+    parser.add_argument("--version", help="Yeni versiyon (varsayılan: en büyük numara + 1)")
+    parser.add_argument("--mode", choices=MODES, default="sgd",
+                        help="sgd: parent'tan artımlı güncelleme; warm_start: delta ile yeniden fit")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Değerlendirme için ayrılan oran")
+    parser.add_argument("--epochs", type=int, default=1, help="sgd: chunk başına geçiş sayısı")
+    parser.add_argument("--eta0", type=float, default=0.01, help="sgd: öğrenme oranı")
+    args = parser.parse_args()
+
+    incremental_train(
+        args.data,
+        parent=args.parent,
+        version=args.version,
+        mode=args.mode,
+        chunk_size=args.chunk_size,
+        holdout=args.holdout,
+        epochs=args.epochs,
+        eta0=args.eta0,
+    )
@@ -3,18 +3,19 @@ Model registry'deki modelleri listele
 """
 import os
 import json
-import glob
+
+from src.models.registry import ARTIFACTS_DIR, discover_versions
 
 def list_models():
     """Artifacts klasöründeki tüm modelleri listele"""
-    artifacts_dir = "artifacts"
+    artifacts_dir = ARTIFACTS_DIR
     
     if not os.path.exists(artifacts_dir):
         print("❌ artifacts klasörü bulunamadı")
         return
     
     # Model dosyalarını bul
-    model_files = glob.glob(f"{artifacts_dir}/churn_model_v*.joblib")
+    model_files = discover_versions(artifacts_dir)
     
     if not model_files:
         print("📦 Hiç model bulunamadı")
@@ -25,8 +26,8 @@ def list_models():
     print("="*60)
     
     models_info = []
-    for model_file in sorted(model_files):
-        version = model_file.split("_v")[1].replace(".joblib", "")
+    for version, model_file in model_files.items():
+        model_file = str(model_file)
         metadata_file = f"{artifacts_dir}/churn_model_v{version}_metadata.json"
         
         info = {
@@ -0,0 +1,103 @@
+"""
+UI / API meta artifact'ı
+
+train.py her model için churn_model_v{N}_meta.json üretir: beklenen kolonlar,
+default değerler, kategorik seçenekler ve küçük bir örnek satır havuzu.
+API bu dosyayı okuyarak startup'ta veri setine ihtiyaç duymaz.
+"""
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+META_FORMAT_VERSION = 1
+MAX_CATEGORICAL_OPTIONS = 50
+SAMPLE_ROWS = 100
+
+
+def meta_path_for(model_path) -> Path:
+    """artifacts/churn_model_v2.joblib -> artifacts/churn_model_v2_meta.json"""
+    p = Path(model_path)
+    return p.with_name(f"{p.stem}_meta.json")
+
+
+def expected_cols_from_pipeline(m):
+    pre = m.named_steps["preprocess"]  # ColumnTransformer
+    cols = []
+    for _, _, col_list in pre.transformers_:
+        if isinstance(col_list, list):
+            cols.extend(col_list)
+
+    seen = set()
+    out = []
+    for c in cols:
+        if c not in seen:
+            seen.add(c)
+            out.append(c)
+    return out
+
+
+def _clean_row(row: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """NaN -> default, numpy sayıları -> float (JSON uyumlu)"""
+    import pandas as pd
+
+    clean = {}
+    for k, v in row.items():
+        if pd.isna(v):
+            clean[k] = defaults.get(k)
+        elif isinstance(v, (np.integer, np.floating)):
+            clean[k] = float(v)
+        else:
+            clean[k] = v
+    return clean
+
+
+def build_ui_meta(model, X: "pd.DataFrame", cat_cols, num_cols, n_samples: int = SAMPLE_ROWS) -> Dict[str, Any]:
+    """
+    Model + eğitim verisinden UI meta'sı üretir
+
+    defaults: numeric -> median, categorical -> mode
+    sample_rows: random_state=42 ile seçilmiş örnek satırlar (ilk satır /sample)
+    """
+    import pandas as pd
+
+    defaults = {}
+    categorical_options = {}
+
+    for c in num_cols:
+        defaults[c] = float(pd.to_numeric(X[c], errors="coerce").median())
+
+    for c in cat_cols:
+        mode_val = X[c].mode(dropna=True)
+        defaults[c] = str(mode_val.iloc[0]) if len(mode_val) else "Unknown"
+        vals = sorted([str(v) for v in X[c].dropna().unique().tolist()])
+        categorical_options[c] = vals[:MAX_CATEGORICAL_OPTIONS]
+
+    expected_cols = expected_cols_from_pipeline(model)
+    sample = X.sample(min(n_samples, len(X)), random_state=42)
+    sample_rows = [_clean_row(r, defaults) for r in sample[expected_cols].to_dict(orient="records")]
+
+    return {
+        "format_version": META_FORMAT_VERSION,
+        "expected_cols": expected_cols,
+        "defaults": defaults,
+        "categorical_options": categorical_options,
+        "sample_rows": sample_rows,
+    }
+
+
+def save_ui_meta(meta: Dict[str, Any], path) -> None:
+    with open(path, "w") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def load_ui_meta(path) -> Optional[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
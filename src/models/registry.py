@@ -0,0 +1,402 @@
+"""
+Model registry yöneticisi
+
+artifacts/ altındaki churn_model_v{N}.joblib dosyalarını (list_models.py ile
+aynı isimlendirme) bulur, birden fazla versiyonu aynı anda bellekte tutar ve
+aktif versiyonu tek bir referans ataması ile (atomik) değiştirir.
+Yüklemeler arka plandaki tek bir thread'de yapılır; request path sadece
+hazır LoadedModel referansını okur.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.inference.engine import InferenceEngine
+from src.models.meta import build_ui_meta, load_ui_meta, meta_path_for
+from src.api.drift import DriftMonitor, profile_path_for
+from src.api.schema import RequestSchema
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", "artifacts")
+# true ise modelin NumPy dizileri kopyalanmadan dosyadan map edilir
+# (sıkıştırılmamış joblib dump'larında; sayfalar process'ler arasında paylaşılır)
+MODEL_MMAP = os.getenv("MODEL_MMAP", "false").lower() == "true"
+MODEL_GLOB = "churn_model_v*.joblib"
+_VERSION_RE = re.compile(r"churn_model_v([^_/\\]+)\.joblib$")
+
+# MODEL_PATH versiyonlu değilse (churn_model.joblib) kullanılacak etiket
+DEFAULT_VERSION = "default"
+
+
+def version_of(path) -> Optional[str]:
+    """artifacts/churn_model_v3.joblib -> "3" (versiyonsuz isimlerde None)"""
+    m = _VERSION_RE.search(str(path))
+    return m.group(1) if m else None
+
+
+def _version_sort_key(version: str):
+    return (0, int(version), "") if version.isdigit() else (1, 0, version)
+
+
+def discover_versions(artifacts_dir: str = ARTIFACTS_DIR) -> Dict[str, Path]:
+    """{versiyon: model dosyası}, versiyon numarasına göre sıralı"""
+    found = {}
+    for path in Path(artifacts_dir).glob(MODEL_GLOB):
+        version = version_of(path)
+        if version is not None:
+            found[version] = path
+    return {v: found[v] for v in sorted(found, key=_version_sort_key)}
+
+
+def rss_bytes() -> int:
+    """Process'in resident set size'ı (Linux'ta /proc, diğerlerinde peak RSS)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_usage(pid="self") -> Dict[str, int]:
+    """
+    rss / pss / shared / private (byte). PSS paylaşılan sayfaları process
+    sayısına böler; fork edilmiş worker'ların gerçek maliyeti budur.
+    /proc/<pid>/smaps_rollup olmayan sistemlerde sadece rss döner.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+              "Private_Clean": "private", "Private_Dirty": "private"}
+    out: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    out[fields[key]] = out.get(fields[key], 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    if "rss" not in out and pid == "self":
+        out["rss"] = rss_bytes()
+    return out
+
+
+class LoadedModel:
+    """Belleğe yüklenmiş bir model versiyonu ve ona ait meta / engine / drift"""
+
+    def __init__(self, version: str, path: Path, model, engine: InferenceEngine, meta: Dict[str, Any],
+                 drift: Optional[DriftMonitor], load_seconds: float, rss_delta_bytes: int):
+        self.version = version
+        self.path = Path(path)
+        self.model = model
+        self.engine = engine
+        self.expected_cols = meta["expected_cols"]
+        self.defaults = meta["defaults"]
+        self.categorical_options = meta["categorical_options"]
+        self.sample_rows = meta["sample_rows"]
+        # /predict gövdesi için tipli doğrulayıcı
+        self.schema = RequestSchema.from_pipeline(model, meta)
+        self.drift = drift
+        self.load_seconds = load_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+        self.artifact_bytes = self.path.stat().st_size
+        self.artifact_mtime = self.path.stat().st_mtime
+        self.loaded_at = datetime.now().isoformat()
+
+    def build_row(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Request feature'larından modelin beklediği satırı üretir:
+        eksik/boş değerler default ile doldurulur, sayısal kolonlar float'a çevrilir.
+        """
+        defaults = self.defaults
+        row = {}
+        for col in self.expected_cols:
+            val = features.get(col, None)
+            if val is None or (isinstance(val, str) and val.strip() == ""):
+                val = defaults.get(col)
+
+            # sayısal default varsa float'a çevir
+            if col in defaults and isinstance(defaults[col], float):
+                try:
+                    val = float(val)
+                except Exception:
+                    val = defaults[col]
+
+            row[col] = val
+        return row
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": str(self.path),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "artifact_bytes": self.artifact_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "compiled_scorer": self.engine.compiled,
+            "drift_profile": self.drift is not None,
+        }
+
+
+def load_model(path, version: str, data_path: Optional[str] = None) -> LoadedModel:
+    """
+    Model + meta + drift profilini yükler. Meta dosyası yoksa (eski
+    artifact'lar) data_path'teki veri setinden üretilir.
+    """
+    # joblib/pandas (ve unpickle ile sklearn) ilk yüklemede import edilir;
+    # registry'yi import etmek API'yi ayağa kaldırmayı yavaşlatmasın
+    import joblib
+    import pandas as pd
+
+    t0 = time.perf_counter()
+    rss0 = rss_bytes()
+
+    model = joblib.load(path, mmap_mode="r" if MODEL_MMAP else None)
+    engine = InferenceEngine(model)
+
+    meta = load_ui_meta(meta_path_for(path))
+    if meta is None:
+        if not data_path or not os.path.exists(data_path):
+            raise FileNotFoundError(f"{meta_path_for(path)} not found and no dataset to build meta from")
+        from src.data.cache import load_dataset
+        X, _, cat_cols, num_cols = load_dataset(data_path)
+        meta = build_ui_meta(model, X, cat_cols, num_cols)
+        logger.info(f"Meta built from dataset for v{version} (no {meta_path_for(path)}).")
+
+    # Derlenmiş scorer sklearn ile uyuşmuyorsa kapat
+    if engine.compiled and meta["sample_rows"]:
+        parity = engine.check_parity(pd.DataFrame(meta["sample_rows"], columns=meta["expected_cols"]))
+        if parity["max_abs_diff"] > 1e-6 or parity["label_mismatches"]:
+            engine.scorer = None
+            logger.warning(f"Compiled scorer disabled for v{version}, parity check failed: {parity}")
+
+    drift = DriftMonitor.from_file(profile_path_for(path))
+    if drift is None:
+        logger.warning(f"Drift profile not found for v{version}; distribution drift checks disabled.")
+
+    return LoadedModel(
+        version=version,
+        path=path,
+        model=model,
+        engine=engine,
+        meta=meta,
+        drift=drift,
+        load_seconds=time.perf_counter() - t0,
+        rss_delta_bytes=rss_bytes() - rss0,
+    )
+
+
+class ModelRegistry:
+    """
+    Çoklu versiyon serving.
+
+    _models sözlüğü her değişiklikte yeniden oluşturulur (copy-on-write),
+    _active ise tek bir string; okuyucular kilit almadan tutarlı bir görüntü
+    görür. generation her değişiklikte artar (cache'ler için).
+    """
+
+    def __init__(self, artifacts_dir: str = ARTIFACTS_DIR, data_path: Optional[str] = None):
+        self.artifacts_dir = artifacts_dir
+        self.data_path = data_path
+        self._models: Dict[str, LoadedModel] = {}
+        self._active: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, str] = {}
+        self._listeners = []
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        # version -> diskte görülen son mtime (scan sadece bundan yenileri yükler)
+        self._seen: Dict[str, float] = {}
+        self.generation = 0
+
+    # ---- okuma (request path) ----
+
+    @property
+    def active(self) -> Optional[LoadedModel]:
+        active = self._active
+        return self._models.get(active) if active is not None else None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active
+
+    def get(self, version: Optional[str] = None) -> Optional[LoadedModel]:
+        """version None ise aktif model"""
+        if version is None:
+            return self.active
+        return self._models.get(version)
+
+    def versions(self) -> List[str]:
+        return list(self._models)
+
+    # ---- yazma ----
+
+    def on_change(self, callback):
+        """Aktif model / yüklü versiyonlar değişince çağrılır: callback(registry)"""
+        self._listeners.append(callback)
+
+    def _changed(self):
+        self.generation += 1
+        for cb in self._listeners:
+            try:
+                cb(self)
+            except Exception as e:
+                logger.warning(f"Registry listener failed: {e}")
+
+    def path_for(self, version: str) -> Path:
+        return Path(self.artifacts_dir) / f"churn_model_v{version}.joblib"
+
+    def load(self, version: str, path=None, activate: bool = False) -> LoadedModel:
+        """Senkron yükleme (startup ve arka plan thread'i kullanır)"""
+        path = Path(path) if path is not None else self.path_for(version)
+        try:
+            lm = load_model(path, version, data_path=self.data_path)
+        except Exception as e:
+            self._errors[version] = str(e)
+            raise
+
+        with self._lock:
+            models = dict(self._models)
+            models[version] = lm
+            self._models = models
+            self._errors.pop(version, None)
+            if activate or self._active is None:
+                self._active = version
+        self._changed()
+
+        logger.info(
+            f"Model v{version} loaded from {path} in {lm.load_seconds:.2f}s "
+            f"(compiled scorer: {lm.engine.compiled}, active: {self._active == version})"
+        )
+        return lm
+
+    def load_async(self, version: str, path=None, activate: bool = False) -> Future:
+        """Yüklemeyi request path dışında, arka plan thread'inde yapar"""
+        with self._lock:
+            fut = self._pending.get(version)
+            if fut is not None and not fut.done():
+                return fut
+            fut = self._loader.submit(self.load, version, path, activate)
+            self._pending[version] = fut
+        return fut
+
+    def activate(self, version: str) -> LoadedModel:
+        with self._lock:
+            lm = self._models.get(version)
+            if lm is None:
+                raise KeyError(version)
+            self._active = version
+        self._changed()
+        logger.info(f"Active model switched to v{version}")
+        return lm
+
+    def unload(self, version: str):
+        with self._lock:
+            if version == self._active:
+                raise ValueError("Active model cannot be unloaded")
+            models = dict(self._models)
+            models.pop(version)
+            self._models = models
+        self._changed()
+        logger.info(f"Model v{version} unloaded")
+
+    # ---- dosya izleme ----
+
+    def mark_seen(self):
+        """
+        Diskteki mevcut versiyonları görülmüş sayar (startup'ta çağrılır).
+        Böylece scan sadece bundan sonra eklenen veya değişen artifact'ları
+        yükler; MODEL_PATH ile bilerek eski bir versiyona sabitlenmiş servis
+        diskte zaten duran daha yeni bir versiyona geçmez.
+        """
+        for version, path in discover_versions(self.artifacts_dir).items():
+            try:
+                self._seen[version] = max(self._seen.get(version, 0.0), path.stat().st_mtime)
+            except FileNotFoundError:
+                pass
+
+    def scan(self, auto_activate: bool = False) -> List[str]:
+        """
+        mark_seen'den sonra eklenen veya üzerine yazılan versiyonları arka
+        planda yükler (auto_activate: bunların en yenisi aynı zamanda diskteki
+        en büyük versiyonsa aktif olur)
+
+        Returns:
+            list: Yüklemesi başlatılan versiyonlar
+        """
+        started = []
+        found = discover_versions(self.artifacts_dir)
+        for version, path in found.items():
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            lm = self._models.get(version)
+            known = max(self._seen.get(version, -1.0), lm.artifact_mtime if lm is not None else -1.0)
+            if mtime <= known:
+                continue
+            self._seen[version] = mtime
+            started.append(version)
+
+        newest = list(found)[-1] if found else None
+        for version in started:
+            activate = (auto_activate and version == newest) or version == self._active
+            self.load_async(version, found[version], activate=activate)
+        return started
+
+    def _watch(self, interval: float, auto_activate: bool):
+        while not self._watch_stop.wait(interval):
+            try:
+                started = self.scan(auto_activate=auto_activate)
+                if started:
+                    logger.info(f"Model watcher: loading {started}")
+            except Exception as e:
+                logger.warning(f"Model watcher error: {e}")
+
+    def start_watcher(self, interval: float, auto_activate: bool = False):
+        if self._watcher is not None:
+            return
+        if not self._seen:
+            self.mark_seen()
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval, auto_activate), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5.0)
+            self._watcher = None
+        self._loader.shutdown(wait=False)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active_version": self._active,
+            "generation": self.generation,
+            "rss_bytes": rss_bytes(),
+            "loaded": [lm.info() for lm in self._models.values()],
+            "loading": [v for v, f in self._pending.items() if not f.done()],
+            "errors": dict(self._errors),
+            "available": list(discover_versions(self.artifacts_dir)),
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """Process başına tek registry"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(ARTIFACTS_DIR, data_path=os.getenv("DATA_PATH", "data/raw/telco.csv"))
+    return _registry
@@ -1,35 +1,60 @@
 import os
 import joblib
 import json
+import time
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
-from sklearn.model_selection import train_test_split
+from joblib import Parallel, delayed
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid, ParameterSampler
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, accuracy_score, f1_score, precision_score, recall_score
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import classification_report, accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
 
-from src.data.preprocess import preprocess
+from src.data.cache import load_dataset
+from src.inference.engine import InferenceEngine
+from src.api.drift import build_reference_profile, save_reference_profile, profile_path_for
+from src.models.meta import build_ui_meta, save_ui_meta, meta_path_for
 
 
-def train(version: str = "1"):
-    """
-    Model eğitimi ve versiyonlama
-    
-    Args:
-        version: Model versiyonu (örn: "1", "2")
-    """
-    df = pd.read_csv("data/raw/telco.csv")
+POSITIVE_LABEL = "Yes"
 
-    X, y, cat_cols, num_cols = preprocess(df)
+# Arama modunda kullanılabilecek estimator'lar
+ESTIMATORS = {
+    "logreg": LogisticRegression,
+    "gradient_boosting": GradientBoostingClassifier,
+    "random_forest": RandomForestClassifier,
+}
+
+# Varsayılan hiperparametre arama uzayı (--search-config ile JSON olarak değiştirilebilir)
+SEARCH_SPACE = {
+    "logreg": {
+        "C": [0.01, 0.1, 1.0, 10.0],
+        "penalty": ["l1", "l2"],
+        "solver": ["liblinear"],
+        "max_iter": [1000],
+    },
+    "gradient_boosting": {
+        "n_estimators": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [2, 3],
+        "random_state": [42],
+    },
+    "random_forest": {
+        "n_estimators": [200],
+        "max_depth": [None, 10],
+        "min_samples_leaf": [1, 5],
+        "random_state": [42],
+    },
+}
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
 
+def build_preprocessor(num_cols, cat_cols) -> ColumnTransformer:
     numeric_transformer = Pipeline(steps=[
         ("scaler", StandardScaler())
     ])
@@ -38,16 +63,141 @@ def train(version: str = "1"):
         ("encoder", OneHotEncoder(handle_unknown="ignore"))
     ])
 
-    preprocessor = ColumnTransformer(
+    return ColumnTransformer(
         transformers=[
             ("num", numeric_transformer, num_cols),
             ("cat", categorical_transformer, cat_cols)
         ]
     )
 
+
+def _candidates(search_space, n_iter=None, random_state=42):
+    """(estimator adı, parametreler) listesi; n_iter verilirse random search"""
+    out = []
+    for name, grid in search_space.items():
+        if name not in ESTIMATORS:
+            raise ValueError(f"Bilinmeyen estimator: {name} (seçenekler: {list(ESTIMATORS)})")
+        params = ParameterSampler(grid, n_iter=n_iter, random_state=random_state) if n_iter else ParameterGrid(grid)
+        out.extend((name, dict(p)) for p in params)
+    return out
+
+
+def _fit_candidate_fold(name, params, fold, Xt_tr, y_tr, Xt_val, y_val):
+    """Tek (aday, fold) çifti: önceden transform edilmiş matris üzerinde fit + skor"""
+    clf = ESTIMATORS[name](**params)
+    t0 = time.perf_counter()
+    clf.fit(Xt_tr, y_tr)
+    fit_time = time.perf_counter() - t0
+
+    proba = clf.predict_proba(Xt_val)[:, list(clf.classes_).index(POSITIVE_LABEL)]
+    pred = clf.predict(Xt_val)
+    return {
+        "fold": fold,
+        "roc_auc": float(roc_auc_score(y_val == POSITIVE_LABEL, proba)),
+        "f1_score": float(f1_score(y_val, pred, pos_label=POSITIVE_LABEL, average="binary")),
+        "accuracy": float(accuracy_score(y_val, pred)),
+        "fit_time_sec": fit_time,
+    }
+
+
+def search(X_train, y_train, num_cols, cat_cols, search_space=None, cv=5, n_jobs=1,
+           n_iter=None, scoring="roc_auc"):
+    """
+    Stratified k-fold ile çoklu model / hiperparametre araması
+
+    ColumnTransformer her fold için bir kez fit edilip transform sonucu
+    cache'lenir; adaylar bu matrisler üzerinde process pool'da paralel eğitilir.
+
+    Returns:
+        best: En iyi aday (estimator, params, metrikler)
+        results: Tüm adayların metrikleri (skora göre sıralı)
+    """
+    search_space = search_space or SEARCH_SPACE
+    candidates = _candidates(search_space, n_iter=n_iter)
+
+    # Fold başına preprocessor çıktısı (tüm adaylar için ortak)
+    folds = []
+    skf = StratifiedKFold(n_splits=cv, shuffle=True, random_state=42)
+    y_arr = np.asarray(y_train)
+    for tr, val in skf.split(X_train, y_arr):
+        pre = build_preprocessor(num_cols, cat_cols)
+        Xt_tr = pre.fit_transform(X_train.iloc[tr])
+        Xt_val = pre.transform(X_train.iloc[val])
+        folds.append((Xt_tr, y_arr[tr], Xt_val, y_arr[val]))
+
+    print(f"🔍 Arama: {len(candidates)} aday x {cv} fold, n_jobs={n_jobs}")
+
+    fold_results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_candidate_fold)(name, params, k, *folds[k])
+        for name, params in candidates
+        for k in range(cv)
+    )
+
+    results = []
+    for i, (name, params) in enumerate(candidates):
+        runs = fold_results[i * cv:(i + 1) * cv]
+        entry = {"estimator": name, "params": params}
+        for metric in ("roc_auc", "f1_score", "accuracy"):
+            values = [r[metric] for r in runs]
+            entry[f"mean_{metric}"] = float(np.mean(values))
+            entry[f"std_{metric}"] = float(np.std(values))
+        entry["fit_time_sec"] = float(sum(r["fit_time_sec"] for r in runs))
+        results.append(entry)
+
+    results.sort(key=lambda r: r[f"mean_{scoring}"], reverse=True)
+    best = results[0]
+    print(f"🏆 En iyi aday: {best['estimator']} {best['params']} ({scoring}={best[f'mean_{scoring}']:.4f})")
+    return best, results
+
+
+def train(version: str = "1", search_mode: bool = False, search_space=None, cv: int = 5,
+          n_jobs: int = 1, n_iter: int = None, scoring: str = "roc_auc",
+          capture_labels: str = None, capture_since: str = None):
+    """
+    Model eğitimi ve versiyonlama
+    
+    Args:
+        version: Model versiyonu (örn: "1", "2")
+        search_mode: True ise çoklu model / hiperparametre araması yapılır
+        search_space: {estimator: {param: [değerler]}} (None -> SEARCH_SPACE)
+        cv: Arama için fold sayısı
+        n_jobs: Paralel worker process sayısı (-1: tüm CPU'lar)
+        n_iter: Verilirse estimator başına random search aday sayısı
+        scoring: Aday seçim metriği (roc_auc, f1_score, accuracy)
+        capture_labels: Verilirse yakalanan production satırları (feature_capture)
+                        bu etiket CSV'si ile birleştirilip eğitim setine eklenir
+        capture_since: Yakalanan satırlar için başlangıç zamanı (ISO)
+    """
+    X, y, cat_cols, num_cols = load_dataset("data/raw/telco.csv")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # Test seti sabit kalsın diye yakalanan satırlar sadece eğitime eklenir
+    capture_rows = 0
+    if capture_labels:
+        from src.api.feature_capture import load_labeled_capture
+        X_cap, y_cap = load_labeled_capture(capture_labels, list(X.columns), start=capture_since)
+        capture_rows = len(X_cap)
+        if capture_rows:
+            X_train = pd.concat([X_train, X_cap], ignore_index=True)
+            y_train = pd.concat([y_train, y_cap], ignore_index=True)
+        print(f"📥 Yakalanan trafikten {capture_rows} etiketli satır eğitime eklendi")
+
+    search_results = None
+    if search_mode:
+        best, search_results = search(
+            X_train, y_train, num_cols, cat_cols, search_space=search_space,
+            cv=cv, n_jobs=n_jobs, n_iter=n_iter, scoring=scoring,
+        )
+        classifier = ESTIMATORS[best["estimator"]](**best["params"])
+    else:
+        classifier = LogisticRegression(max_iter=1000)
+
     model = Pipeline(steps=[
-        ("preprocess", preprocessor),
-        ("classifier", LogisticRegression(max_iter=1000))
+        ("preprocess", build_preprocessor(num_cols, cat_cols)),
+        ("classifier", classifier)
     ])
 
     model.fit(X_train, y_train)
@@ -90,31 +240,85 @@ def train(version: str = "1"):
             "precision": float(precision),
             "recall": float(recall)
         },
-        "model_type": "LogisticRegression",
+        "model_type": type(classifier).__name__,
+        "model_params": {k: v for k, v in classifier.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
         "preprocessor": {
             "numeric": "StandardScaler",
             "categorical": "OneHotEncoder"
         },
         "train_size": len(X_train),
+        "capture_rows": capture_rows,
         "test_size": len(X_test),
         "features_count": len(X.columns),
         "random_state": 42
     }
     
+    if search_results is not None:
+        metadata["search"] = {
+            "scoring": scoring,
+            "cv_folds": cv,
+            "n_jobs": n_jobs,
+            "n_candidates": len(search_results),
+            "best": search_results[0],
+            "candidates": search_results,
+        }
+    
     with open(metadata_filename, "w") as f:
         json.dump(metadata, f, indent=2)
     
     print(f"✅ Metadata kaydedildi: {metadata_filename}")
     
+    # Drift için referans profil (eğitim verisi + skor dağılımı)
+    _, train_scores = InferenceEngine(model).predict_frame(X_train)
+    profile = build_reference_profile(X_train, cat_cols, num_cols, train_scores)
+    profile_filename = profile_path_for(model_filename)
+    save_reference_profile(profile, profile_filename)
+    print(f"✅ Drift profili kaydedildi: {profile_filename}")
+    
+    # API/UI meta'sı (API startup'ta dataset okumasın)
+    ui_meta = build_ui_meta(model, X, cat_cols, num_cols)
+    meta_filename = meta_path_for(model_filename)
+    save_ui_meta(ui_meta, meta_filename)
+    print(f"✅ UI meta kaydedildi: {meta_filename}")
+    
     # Backward compatibility için v1'i churn_model.joblib olarak da kaydet
     if version == "1":
         joblib.dump(model, "artifacts/churn_model.joblib")
+        save_reference_profile(profile, profile_path_for("artifacts/churn_model.joblib"))
+        save_ui_meta(ui_meta, meta_path_for("artifacts/churn_model.joblib"))
         print("✅ Backward compatibility: artifacts/churn_model.joblib")
     
     return model, metadata
 
 
 if __name__ == "__main__":
-    import sys
-    version = sys.argv[1] if len(sys.argv) > 1 else "1"
-    train(version=version)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Churn modeli eğitimi")
+    parser.add_argument("version", nargs="?", default="1", help="Model versiyonu")
+    parser.add_argument("--search", action="store_true", help="Çoklu model / hiperparametre araması")
+    parser.add_argument("--search-config", help="Arama uzayı JSON dosyası ({estimator: {param: [..]}})")
+    parser.add_argument("--cv", type=int, default=5, help="Fold sayısı")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Paralel process sayısı (-1: tüm CPU'lar)")
+    parser.add_argument("--n-iter", type=int, default=None, help="Random search: estimator başına aday sayısı")
+    parser.add_argument("--scoring", default="roc_auc", choices=["roc_auc", "f1_score", "accuracy"])
+    parser.add_argument("--capture-labels", help="Yakalanan trafiği bu etiket CSV'si (Customer ID, Churn Label) ile eğitime ekle")
+    parser.add_argument("--capture-since", help="Yakalanan satırlar için başlangıç (ISO)")
+    args = parser.parse_args()
+
+    space = None
+    if args.search_config:
+        with open(args.search_config, "r") as f:
+            space = json.load(f)
+
+    train(
+        version=args.version,
+        search_mode=args.search,
+        search_space=space,
+        cv=args.cv,
+        n_jobs=args.n_jobs,
+        n_iter=args.n_iter,
+        scoring=args.scoring,
+        capture_labels=args.capture_labels,
+        capture_since=args.capture_since,
+    )
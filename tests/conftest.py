@@ -0,0 +1,93 @@
+"""
+Ortak test fixture'ları
+
+Gerçek telco verisi repo'da yok; testler küçük sentetik bir veri setiyle
+train.py'deki pipeline yapısını (StandardScaler + OneHotEncoder +
+LogisticRegression) eğitir.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+NUM_COLS = ["Age", "Tenure in Months", "Monthly Charge"]
+CAT_COLS = ["Gender", "Contract", "Internet Type"]
+
+
+def make_dataset(n_rows: int = 400, seed: int = 0):
+    """Churn olasılığı tenure/contract/charge'a bağlı sentetik veri"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "Age": rng.integers(19, 80, n_rows).astype(float),
+        "Tenure in Months": rng.integers(1, 72, n_rows).astype(float),
+        "Monthly Charge": rng.uniform(18.0, 120.0, n_rows).round(2),
+        "Gender": rng.choice(["Female", "Male"], n_rows).astype(object),
+        "Contract": rng.choice(["Month-to-Month", "One Year", "Two Year"], n_rows).astype(object),
+        "Internet Type": rng.choice(["Cable", "DSL", "Fiber Optic", "None"], n_rows).astype(object),
+    })
+    logit = (
+        0.02 * (X["Monthly Charge"] - 60)
+        - 0.05 * (X["Tenure in Months"] - 30)
+        + np.where(X["Contract"] == "Month-to-Month", 1.2, -0.8)
+    )
+    y = pd.Series(np.where(rng.random(n_rows) < 1 / (1 + np.exp(-logit)), "Yes", "No"), name="Churn Label")
+    return X, y
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    return make_dataset()
+
+
+@pytest.fixture(scope="session")
+def pipeline(dataset):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from src.models.train import build_preprocessor
+
+    X, y = dataset
+    model = Pipeline(steps=[
+        ("preprocess", build_preprocessor(NUM_COLS, CAT_COLS)),
+        ("classifier", LogisticRegression(max_iter=1000)),
+    ])
+    return model.fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def api_client(tmp_path_factory, pipeline, dataset):
+    """
+    Sentetik modelle ayağa kalkan API (TestClient). Tüm yollar göreli
+    olduğundan geçici bir çalışma klasöründe çalışır; repo'daki artifacts/
+    ve monitoring/ dosyalarına dokunulmaz.
+    """
+    import joblib
+    from fastapi.testclient import TestClient
+
+    from src.api.drift import build_reference_profile, profile_path_for, save_reference_profile
+    from src.models.meta import build_ui_meta, meta_path_for, save_ui_meta
+
+    X, _ = dataset
+    workdir = tmp_path_factory.mktemp("api")
+    model_path = workdir / "artifacts" / "churn_model.joblib"
+    model_path.parent.mkdir()
+    (workdir / "monitoring").mkdir()
+    joblib.dump(pipeline, model_path)
+    save_ui_meta(build_ui_meta(pipeline, X, CAT_COLS, NUM_COLS), meta_path_for(model_path))
+    scores = pipeline.predict_proba(X)[:, list(pipeline.classes_).index("Yes")]
+    save_reference_profile(build_reference_profile(X, CAT_COLS, NUM_COLS, scores), profile_path_for(model_path))
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(workdir)
+        mp.setenv("MODEL_WARMUP_BLOCKING", "true")
+        from src.api import app as app_module
+
+        mp.setattr(app_module, "MODEL_WARMUP_BLOCKING", True)
+        with TestClient(app_module.app) as client:
+            yield client
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+
+def _features(client):
+    return client.get("/sample").json()["features"]
+
+
+def test_predict_accepts_sample_and_blank_numerics(api_client):
+    features = _features(api_client)
+    r = api_client.post("/predict", json={"features": features})
+    assert r.status_code == 200
+    assert 0.0 <= r.json()["pred_proba_yes"] <= 1.0
+
+    features["Age"] = ""
+    assert api_client.post("/predict", json={"features": features}).status_code == 200
+
+
+@pytest.mark.parametrize("bad", ["NaN", "nan", "inf", "-Infinity", "Infinity"])
+def test_predict_rejects_non_finite_strings(api_client, bad):
+    features = _features(api_client)
+    features["Age"] = bad
+    r = api_client.post("/predict", json={"features": features})
+    assert r.status_code == 422, r.text
+
+
+@pytest.mark.parametrize("token", ["NaN", "Infinity", "-Infinity", "1e400"])
+def test_predict_rejects_non_finite_json_numbers(api_client, token):
+    features = _features(api_client)
+    features["Age"] = 0
+    body = json.dumps({"features": features}).replace('"Age": 0', f'"Age": {token}')
+    r = api_client.post("/predict", content=body, headers={"content-type": "application/json"})
+    assert r.status_code == 422, r.text
+    assert r.json()["detail"][0]["loc"][:2] == ["features", "Age"]
+
+    values = [features[c] for c in api_client.get("/meta").json()["expected_cols"]]
+    values_body = json.dumps({"values": values})
+    assert api_client.post("/predict", content=values_body,
+                           headers={"content-type": "application/json"}).status_code == 200
+
+
+def test_non_finite_input_does_not_break_monitoring_stats(api_client):
+    features = _features(api_client)
+    features["Monthly Charge"] = "inf"
+    assert api_client.post("/predict", json={"features": features}).status_code == 422
+
+    r = api_client.get("/monitoring/stats")
+    assert r.status_code == 200
+
+
+def test_batch_reports_infinite_cells_as_row_errors(api_client):
+    rows = [_features(api_client) for _ in range(3)]
+    rows[1]["Age"] = "inf"
+    r = api_client.post("/predict/batch", json={"rows": rows})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["scored"] == 2 and body["failed"] == 1
+    assert "finite" in body["results"][1]["error"][0]
+
+
+def _flush_prediction_log():
+    from src.api.monitoring import get_log_writer
+
+    writer = get_log_writer()
+    writer.close()  # kuyrukta kalanları yazar
+    writer.start()
+
+
+def test_batch_predictions_reach_the_monitoring_store(api_client):
+    _flush_prediction_log()
+    before = api_client.get("/monitoring/store").json()["raw_rows"]
+    rows = [_features(api_client) for _ in range(4)]
+    assert api_client.post("/predict/batch", json={"rows": rows}).json()["scored"] == 4
+
+    _flush_prediction_log()
+    assert api_client.get("/monitoring/store").json()["raw_rows"] == before + 4
+
+    from src.api.monitoring import WORKER_ID
+
+    rows = api_client.get("/monitoring/predictions/range").json()["predictions"]
+    assert rows and {r["worker"] for r in rows} == {WORKER_ID}
+
+
+def test_by_id_scores_match_pipeline_with_missing_categories(api_client, pipeline, dataset):
+    import numpy as np
+    import pandas as pd
+
+    from src.data.feature_store import FEATURE_STORE_PATH, ingest
+
+    X, _ = dataset
+    X = X.head(40).copy()
+    X.loc[X.index[::3], "Internet Type"] = np.nan
+    X.loc[X.index[5], "Age"] = np.nan
+    ids = [f"C{i:04d}" for i in range(len(X))]
+    X.insert(0, "Customer ID", ids)
+    X.to_csv("by_id.csv", index=False)
+    ingest("by_id.csv", FEATURE_STORE_PATH)
+
+    # read_csv "None" kategorisini de NaN okur; referans ingest'in gördüğü frame
+    expected = pd.read_csv("by_id.csv").drop(columns="Customer ID")
+    expected["Age"] = expected["Age"].fillna(api_client.get("/meta").json()["defaults"]["Age"])
+    ref = pipeline.predict_proba(expected)[:, list(pipeline.classes_).index("Yes")]
+
+    r = api_client.post("/predict/by-id/batch", json={"customer_ids": ids})
+    assert r.status_code == 200, r.text
+    proba = [row["pred_proba_yes"] for row in r.json()["results"]]
+    np.testing.assert_allclose(proba, ref, rtol=0, atol=1e-9)
+
+    single = api_client.post("/predict/by-id", json={"customer_id": ids[3]})
+    assert single.status_code == 200, single.text
+    assert single.json()["pred_proba_yes"] == pytest.approx(ref[3], abs=1e-9)
+
+
+@pytest.mark.parametrize("blank", ["", "  ", "\t"])
+def test_blank_values_fall_back_to_defaults(api_client, blank):
+    defaults = api_client.get("/meta").json()["defaults"]
+    features = _features(api_client)
+    expected = api_client.post("/predict", json={"features": {**features, **{
+        "Contract": defaults["Contract"], "Age": defaults["Age"]}}}).json()
+
+    features.update({"Contract": blank, "Age": blank})
+    r = api_client.post("/predict", json={"features": features})
+    assert r.status_code == 200, r.text
+    assert r.json()["pred_proba_yes"] == pytest.approx(expected["pred_proba_yes"])
+
+
+def test_categorical_values_are_stripped(api_client):
+    features = _features(api_client)
+    expected = api_client.post("/predict", json={"features": features}).json()
+    features["Contract"] = f"  {features['Contract']} "
+    r = api_client.post("/predict", json={"features": features})
+    assert r.status_code == 200, r.text
+    assert r.json()["pred_proba_yes"] == pytest.approx(expected["pred_proba_yes"])
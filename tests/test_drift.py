@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from src.api.drift import _chi2
+
+
+def test_chi2_ignores_unseen_bins_but_reports_their_share():
+    expected = np.array([50.0, 30.0, 20.0, 0.0])
+    seen = np.array([500.0, 300.0, 200.0, 0.0])
+    with_unseen = np.array([500.0, 300.0, 200.0, 250.0])
+
+    base, shifted = _chi2(expected, seen), _chi2(expected, with_unseen)
+    assert base["chi2"] == pytest.approx(0.0)
+    # Görülmemiş kategoriler seen bin'lerin beklenen değerlerini şişirmez
+    assert shifted["chi2"] == pytest.approx(0.0)
+    assert shifted["unseen_share"] == pytest.approx(0.2)
+
+    only_unseen = _chi2(expected, np.array([0.0, 0.0, 0.0, 10.0]))
+    assert only_unseen["p_value"] == 0.0 and only_unseen["unseen_share"] == 1.0
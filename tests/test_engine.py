@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.inference.engine import InferenceEngine
+
+
+def test_compiled_scorer_matches_sklearn(pipeline, dataset):
+    X, _ = dataset
+    engine = InferenceEngine(pipeline)
+    assert engine.compiled
+
+    labels, proba = engine.predict_frame(X)
+    ref_proba = pipeline.predict_proba(X)[:, list(pipeline.classes_).index("Yes")]
+
+    np.testing.assert_allclose(proba, ref_proba, rtol=0, atol=1e-12)
+    assert (labels == pipeline.predict(X)).all()
+
+    parity = engine.check_parity(X)
+    assert parity["label_mismatches"] == 0
+    assert parity["max_abs_diff"] < 1e-12
+
+
+def test_unknown_and_missing_categories_match_sklearn(pipeline, dataset):
+    X, _ = dataset
+    X = X.head(20).copy()
+    X.loc[X.index[:5], "Contract"] = "Three Year"
+    X.loc[X.index[5:10], "Internet Type"] = None
+
+    engine = InferenceEngine(pipeline)
+    _, proba = engine.predict_frame(X)
+    _, ref = engine.predict_frame(X, use_compiled=False)
+    np.testing.assert_allclose(proba, ref, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf])
+def test_non_finite_numeric_raises_like_sklearn(pipeline, dataset, bad):
+    X, _ = dataset
+    X = X.head(10).copy()
+    X.loc[X.index[3], "Age"] = bad
+
+    engine = InferenceEngine(pipeline)
+    with pytest.raises(ValueError):
+        pipeline.predict_proba(X)
+    with pytest.raises(ValueError, match="Age"):
+        engine.predict_frame(X)
+    with pytest.raises(ValueError, match="Age"):
+        engine.predict_row(X.iloc[3].to_dict())
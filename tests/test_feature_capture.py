@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from src.api.feature_capture import enforce_retention, iter_segments
+
+
+def _segment(root, when: datetime, name: str, size: int = 100):
+    part = root / f"date={when:%Y-%m-%d}" / f"hour={when:%H}"
+    part.mkdir(parents=True, exist_ok=True)
+    path = part / f"seg-{name}.npz"
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def test_retention_drops_expired_partitions(tmp_path):
+    now = datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc).timestamp()
+    old = _segment(tmp_path, datetime(2026, 10, 1, 9), "1")
+    recent = _segment(tmp_path, datetime(2026, 10, 17, 9), "2")
+
+    deleted = enforce_retention(tmp_path, retention_days=7, max_bytes=0, now=now)
+
+    assert deleted == {"segments_deleted": 1, "bytes_deleted": 100}
+    assert not old.exists() and not (tmp_path / "date=2026-10-01").exists()
+    assert list(iter_segments(tmp_path)) == [recent]
+
+
+def test_max_bytes_deletes_oldest_segments_first(tmp_path):
+    now = datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc).timestamp()
+    segs = [
+        _segment(tmp_path, datetime(2026, 10, 18, 10), "1000"),
+        _segment(tmp_path, datetime(2026, 10, 18, 11), "2000"),
+        _segment(tmp_path, datetime(2026, 10, 18, 11), "3000"),
+        _segment(tmp_path, datetime(2026, 10, 18, 12), "4000"),
+    ]
+
+    deleted = enforce_retention(tmp_path, retention_days=0, max_bytes=250, now=now)
+
+    assert deleted["segments_deleted"] == 2
+    assert list(iter_segments(tmp_path)) == segs[2:]
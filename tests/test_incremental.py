@@ -0,0 +1,54 @@
+import copy
+import json
+
+import joblib
+import numpy as np
+
+from src.inference.engine import InferenceEngine
+from src.models.incremental import extend_categories, incremental_train, metadata_path_for
+
+
+def test_extend_categories_widens_encoder_and_coefficients(pipeline, dataset):
+    X, _ = dataset
+    model = copy.deepcopy(pipeline)
+    pre = model.steps[0][1]
+    width = pre.transform(X.head(1)).shape[1]
+    _, before = InferenceEngine(pipeline).predict_frame(X)
+
+    new = X.head(30).copy()
+    new.loc[new.index[:10], "Contract"] = "Four Year"
+    new.loc[new.index[10:20], "Internet Type"] = "Satellite"
+    added = extend_categories(model, new)
+
+    assert added == {"Contract": ["Four Year"], "Internet Type": ["Satellite"]}
+    assert pre.transform(new).shape[1] == width + 2
+    assert model.steps[-1][1].coef_.shape[1] == width + 2
+    assert pre.output_indices_["cat"].stop == width + 2
+
+    # Yeni katsayılar 0: eski satırlar ve yeni kategoriler parent ile aynı skoru alır
+    engine = InferenceEngine(model)
+    _, after = engine.predict_frame(X)
+    np.testing.assert_allclose(after, before, rtol=0, atol=1e-12)
+    _, parent_new = InferenceEngine(pipeline).predict_frame(new)
+    np.testing.assert_allclose(engine.predict_frame(new)[1], parent_new, rtol=0, atol=1e-12)
+
+    parity = engine.check_parity(new)
+    assert parity["label_mismatches"] == 0
+    assert parity["max_abs_diff"] < 1e-12
+
+
+def test_incremental_metadata_counts_only_new_rows(tmp_path, pipeline, dataset):
+    X, y = dataset
+    parent_path = tmp_path / "churn_model_v1.joblib"
+    joblib.dump(pipeline, parent_path)
+    metadata_path_for(parent_path).write_text(json.dumps({"version": "1", "train_size": 400}))
+
+    delta = X.head(100).assign(**{"Churn Label": y.head(100).to_numpy()})
+    delta.to_csv(tmp_path / "delta.csv", index=False)
+
+    _, metadata = incremental_train(str(tmp_path / "delta.csv"), parent="1", version="2", artifacts_dir=str(tmp_path))
+
+    assert metadata["incremental"]["mode"] == "sgd"
+    assert metadata["train_size"] == 80
+    assert metadata["incremental"]["parent_train_size"] == 400
+    assert metadata["incremental"]["cumulative_train_size"] == 480
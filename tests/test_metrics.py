@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+
+from src.api import metrics
+from src.api.metrics import Metrics, _merge_worker_snapshots
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _write_snapshot(directory, pid, requests):
+    worker = f"{pid}-1700000000"
+    data = {
+        "counters": [["churn_http_requests_total", [["route", "/predict"], ["method", "POST"], ["status", "200"]], requests]],
+        "histograms": [["churn_prediction_score", [], [requests, 0, 0], 0.1 * requests]],
+        "worker_id": worker,
+        "pid": pid,
+        "memory": {"rss": 1},
+    }
+    path = directory / f"metrics_{worker}.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_dead_worker_metrics_are_folded_into_one_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path)
+    m = Metrics(tmp_path)
+    monkeypatch.setattr(metrics, "_metrics", m)
+
+    dead = [_write_snapshot(tmp_path, _dead_pid(), n) for n in (3, 4)]
+    key = ("churn_http_requests_total", (("route", "/predict"), ("method", "POST"), ("status", "200")))
+
+    counters, histograms, memory = _merge_worker_snapshots()
+    assert counters[key] == 7
+    assert m.compact() == 2
+
+    assert not any(p.exists() for p in dead)
+    assert sorted(p.name for p in tmp_path.glob("metrics_*.json")) == ["metrics_compacted.json"]
+    after_counters, after_histograms, after_memory = _merge_worker_snapshots()
+    assert after_counters == counters
+    assert after_histograms == histograms
+    # Ölü worker'ların memory gauge'ları raporlanmaz
+    assert list(after_memory) == [m.worker_id]
+
+    _write_snapshot(tmp_path, _dead_pid(), 5)
+    assert m.compact() == 1
+    assert _merge_worker_snapshots()[0][key] == 12
@@ -0,0 +1,97 @@
+import gzip
+import json
+import math
+import subprocess
+import sys
+
+import pytest
+
+from src.api import monitoring
+from src.api.monitoring import (
+    ProbabilityStats,
+    compact_worker_snapshots,
+    compacted_snapshot_path,
+    read_worker_snapshots,
+)
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.mark.parametrize("bad", [math.nan, math.inf, -0.1, 1.5])
+def test_update_rejects_invalid_probability_without_mutating(bad):
+    stats = ProbabilityStats()
+    stats.update(0.25)
+    before = stats.to_dict()
+
+    with pytest.raises(ValueError):
+        stats.update(bad)
+    with pytest.raises(ValueError):
+        stats.update_many([0.5, bad])
+
+    assert stats.to_dict() == before
+
+
+def test_dead_worker_snapshots_are_compacted(tmp_path):
+    live, dead = ProbabilityStats(), ProbabilityStats()
+    live.update_many([0.1, 0.2])
+    dead.update_many([0.7, 0.8, 0.9])
+
+    live_path = tmp_path / f"probability_stats_{monitoring.WORKER_ID}.json"
+    dead_path = tmp_path / f"probability_stats_{_dead_pid()}-1700000000.json"
+    live_path.write_text(json.dumps(live.to_dict()))
+    dead_path.write_text(json.dumps(dead.to_dict()))
+
+    def total():
+        merged = ProbabilityStats()
+        for data in read_worker_snapshots(tmp_path, "probability_stats"):
+            merged.merge(ProbabilityStats.from_dict(data))
+        return merged
+
+    before = total()
+    assert compact_worker_snapshots(tmp_path, "probability_stats", monitoring._fold_probability_stats) == 1
+
+    assert live_path.exists() and not dead_path.exists()
+    assert compacted_snapshot_path(tmp_path, "probability_stats").exists()
+    after = total()
+    assert after.count == before.count == 5
+    assert after.histogram == before.histogram
+    assert after.mean == pytest.approx(before.mean)
+
+    # Tekrar çalıştırmak bir şey değiştirmez
+    assert compact_worker_snapshots(tmp_path, "probability_stats", monitoring._fold_probability_stats) == 0
+    assert total().count == 5
+
+
+def test_folded_but_undeleted_snapshot_is_not_counted_twice(tmp_path):
+    stats = ProbabilityStats()
+    stats.update_many([0.3, 0.6])
+    worker = f"{_dead_pid()}-1700000000"
+    path = tmp_path / f"probability_stats_{worker}.json"
+    path.write_text(json.dumps(stats.to_dict()))
+
+    compacted = stats.to_dict()
+    compacted["folded_workers"] = [worker]
+    compacted_snapshot_path(tmp_path, "probability_stats").write_text(json.dumps(compacted))
+
+    assert sum(d["count"] for d in read_worker_snapshots(tmp_path, "probability_stats")) == 2
+    assert compact_worker_snapshots(tmp_path, "probability_stats", monitoring._fold_probability_stats) == 0
+    assert not path.exists()
+
+
+def test_recent_lines_fill_from_compressed_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitoring, "MONITORING_DIR", tmp_path)
+    monkeypatch.setattr(monitoring, "PREDICTIONS_LOG", tmp_path / "predictions.log")
+
+    with gzip.open(tmp_path / "predictions-20260101T000000.log.gz", "wb") as f:
+        f.write(b"".join(b"old-%d\n" % i for i in range(10)))
+    with gzip.open(tmp_path / "predictions-20260102T000000.log.gz", "wb") as f:
+        f.write(b"".join(b"mid-%d\n" % i for i in range(4)))
+    (tmp_path / "predictions.log").write_bytes(b"new-0\nnew-1\nnew-2\n")
+
+    assert monitoring._read_recent_lines(5) == [b"mid-2", b"mid-3", b"new-0", b"new-1", b"new-2"]
+    assert monitoring._read_recent_lines(9) == [b"old-8", b"old-9"] + [b"mid-%d" % i for i in range(4)] \
+        + [b"new-0", b"new-1", b"new-2"]
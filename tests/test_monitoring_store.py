@@ -0,0 +1,55 @@
+import math
+from datetime import datetime
+
+from src.api.monitoring_store import MonitoringStore
+
+
+def _entry(proba, version="v1", label="Yes", timestamp="2026-01-01T00:00:30"):
+    return {
+        "timestamp": timestamp,
+        "response": {"pred_label": label, "pred_proba_yes": proba, "model_version": version},
+    }
+
+
+def test_invalid_entries_do_not_lose_the_batch(tmp_path):
+    store = MonitoringStore(tmp_path / "monitoring.db", "w1")
+    entries = [
+        _entry(0.2),
+        _entry(math.nan),
+        _entry(math.inf),
+        _entry(1.5),
+        _entry("abc"),
+        _entry(None),
+        _entry(0.4, version=None),
+        {"timestamp": "2026-01-01T00:00:30", "response": "broken"},
+        _entry(0.8, label="No"),
+    ]
+    store.write_batch(entries)
+
+    assert store.write_errors == 0
+    assert store.rows_written == 2
+    assert store.rows_rejected == len(entries) - 2
+
+    ts = datetime.fromisoformat(_entry(0)["timestamp"]).timestamp()
+    rows = store.query_range(ts - 60, ts + 60)
+    assert [r["pred_proba_yes"] for r in rows] == [0.2, 0.8]
+
+    (bucket,) = store.aggregate(ts - 60, ts + 60, "minute")
+    assert bucket["count"] == 2
+    assert bucket["churn_rate"] == 0.5
+    assert bucket["min_proba"] == 0.2 and bucket["max_proba"] == 0.8
+
+
+def test_singleton_adopts_worker_id_when_created_without_one(tmp_path, monkeypatch):
+    from src.api import monitoring_store
+
+    monkeypatch.setattr(monitoring_store, "MONITORING_STORE_PATH", tmp_path / "monitoring.db")
+    monkeypatch.setattr(monitoring_store, "_store", None)
+
+    store = monitoring_store.get_monitoring_store()
+    assert store.worker_id == ""
+    assert monitoring_store.get_monitoring_store("w1") is store
+    assert store.worker_id == "w1"
+    # Sonraki çağrılar değiştirmez
+    monitoring_store.get_monitoring_store("w2")
+    assert store.worker_id == "w1"
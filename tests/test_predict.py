@@ -0,0 +1,78 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference.engine import InferenceEngine
+from src.inference.predict import fill_missing, load_defaults, score_chunk, score_file
+from src.models.meta import build_ui_meta, meta_path_for, save_ui_meta
+from conftest import CAT_COLS, NUM_COLS
+
+
+@pytest.fixture()
+def model_path(tmp_path, pipeline, dataset):
+    X, _ = dataset
+    path = tmp_path / "churn_model.joblib"
+    joblib.dump(pipeline, path)
+    save_ui_meta(build_ui_meta(pipeline, X, CAT_COLS, NUM_COLS), meta_path_for(path))
+    return path
+
+
+def _raw_chunk(dataset, n=8):
+    X, _ = dataset
+    chunk = X.head(n).copy()
+    chunk.insert(0, "Customer ID", [f"C{i}" for i in range(n)])
+    return chunk
+
+
+def test_missing_numerics_are_filled_with_model_defaults(pipeline, dataset, model_path):
+    engine = InferenceEngine(pipeline)
+    defaults = load_defaults(str(model_path))
+
+    chunk = _raw_chunk(dataset).astype({"Age": object})
+    chunk.loc[chunk.index[1], "Age"] = np.nan
+    chunk.loc[chunk.index[2], "Age"] = "n/a"
+    chunk.loc[chunk.index[3], "Internet Type"] = np.nan
+
+    out = score_chunk(chunk, engine=engine, defaults=defaults)
+
+    expected = chunk.drop(columns=["Customer ID"]).copy()
+    expected.loc[expected.index[[1, 2]], "Age"] = defaults["Age"]
+    # Kategorik NaN modelin öğrendiği ayrı bir kategoridir, doldurulmaz
+    expected.loc[expected.index[3], "Internet Type"] = np.nan
+    _, ref = engine.predict_frame(engine.coerce_frame(expected.astype({"Age": float})), use_compiled=False)
+
+    np.testing.assert_allclose(out["pred_proba_yes"].to_numpy(), ref, rtol=0, atol=1e-12)
+    assert out["pred_label"].notna().all()
+    assert out["Customer ID"].tolist() == chunk["Customer ID"].tolist()
+
+
+def test_rows_that_cannot_be_scored_are_reported_not_labelled(pipeline, dataset):
+    engine = InferenceEngine(pipeline)
+    chunk = _raw_chunk(dataset)
+    chunk.loc[chunk.index[2], "Monthly Charge"] = np.inf
+    chunk.loc[chunk.index[5], "Age"] = np.nan
+
+    # Meta yok: eksik sayısal değer doldurulamaz
+    out = score_chunk(chunk, engine=engine, defaults=None)
+
+    assert out["pred_label"].isna().tolist() == [i in (2, 5) for i in range(len(chunk))]
+    assert out["pred_proba_yes"].isna().sum() == 2
+    _, valid = fill_missing(engine, chunk.drop(columns=["Customer ID"]), None)
+    assert valid.sum() == len(chunk) - 2
+
+
+def test_score_file_reports_invalid_rows(tmp_path, dataset, model_path):
+    chunk = _raw_chunk(dataset, n=30)
+    chunk.loc[chunk.index[4], "Tenure in Months"] = np.inf
+    chunk.loc[chunk.index[7], "Age"] = np.nan
+    src = tmp_path / "in.csv"
+    chunk.to_csv(src, index=False)
+
+    summary = score_file(str(src), str(tmp_path / "out.csv"), model_path=str(model_path), chunksize=10)
+    scored = pd.read_csv(tmp_path / "out.csv")
+
+    assert summary["rows"] == 30 and summary["chunks"] == 3
+    assert summary["invalid_rows"] == 1
+    assert scored["pred_label"].isna().sum() == 1
+    assert scored.loc[7, "pred_label"] in ("Yes", "No")
@@ -0,0 +1,54 @@
+import os
+
+import joblib
+import pytest
+
+from src.models.meta import build_ui_meta, meta_path_for, save_ui_meta
+from src.models.registry import ModelRegistry
+
+from conftest import CAT_COLS, NUM_COLS
+
+
+@pytest.fixture
+def artifacts(tmp_path, pipeline, dataset):
+    X, _ = dataset
+    meta = build_ui_meta(pipeline, X, CAT_COLS, NUM_COLS)
+
+    def write(version: str, mtime: float):
+        path = tmp_path / f"churn_model_v{version}.joblib"
+        joblib.dump(pipeline, path)
+        save_ui_meta(meta, meta_path_for(path))
+        os.utime(path, (mtime, mtime))
+        return path
+
+    return tmp_path, write
+
+
+def test_scan_only_loads_versions_added_after_startup(artifacts):
+    directory, write = artifacts
+    v1 = write("1", 1_000_000)
+    write("2", 1_000_000)
+
+    registry = ModelRegistry(str(directory))
+    try:
+        registry.load("1", v1, activate=True)
+        registry.mark_seen()
+
+        # Diskte zaten duran v2 yeni değil: sabitlenmiş v1 aktif kalır
+        assert registry.scan(auto_activate=True) == []
+        assert registry.active_version == "1"
+
+        write("3", 1_000_100)
+        assert registry.scan(auto_activate=True) == ["3"]
+        registry._pending["3"].result(timeout=30)
+        assert registry.active_version == "3"
+        assert registry.scan(auto_activate=True) == []
+
+        # Üzerine yazılan eski versiyon yeniden yüklenir ama aktif olmaz
+        write("2", 1_000_200)
+        assert registry.scan(auto_activate=True) == ["2"]
+        registry._pending["2"].result(timeout=30)
+        assert registry.active_version == "3"
+        assert sorted(registry.versions()) == ["1", "2", "3"]
+    finally:
+        registry.stop()
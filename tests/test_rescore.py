@@ -0,0 +1,52 @@
+import sqlite3
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference.rescore import rescore
+from src.models.meta import build_ui_meta, meta_path_for, save_ui_meta
+from conftest import CAT_COLS, NUM_COLS
+
+
+@pytest.fixture()
+def setup(tmp_path, pipeline, dataset):
+    X, _ = dataset
+    model = tmp_path / "churn_model.joblib"
+    joblib.dump(pipeline, model)
+    save_ui_meta(build_ui_meta(pipeline, X, CAT_COLS, NUM_COLS), meta_path_for(model))
+
+    df = X.head(50).copy()
+    df.insert(0, "Customer ID", [f"C{i:03d}" for i in range(len(df))])
+    df.loc[df.index[3], "Age"] = np.nan
+    df.loc[df.index[9], "Monthly Charge"] = np.inf
+    csv = tmp_path / "customers.csv"
+    df.to_csv(csv, index=False)
+    return csv, model, tmp_path / "index.db", tmp_path
+
+
+def test_missing_numerics_are_defaulted_and_invalid_rows_retried(setup):
+    csv, model, index, tmp = setup
+    first = rescore(str(csv), model_path=str(model), index_path=str(index), output_path=str(tmp / "a.csv"))
+    assert first["rows"] == 50 and first["scored"] == 49 and first["invalid_rows"] == 1
+
+    out = pd.read_csv(tmp / "a.csv")
+    assert out["pred_label"].isna().tolist() == [i == 9 for i in range(50)]
+    assert out.loc[3, "pred_label"] in ("Yes", "No")
+
+    second = rescore(str(csv), model_path=str(model), index_path=str(index))
+    assert second["scored"] == 0 and second["skipped"] == 49
+    # Skorlanamayan satır index'e yazılmadı; her çalıştırmada yeniden denenir
+    assert second["new_rows"] == 1 and second["invalid_rows"] == 1
+
+
+def test_index_entries_without_probability_are_rescored(setup):
+    csv, model, index, _ = setup
+    rescore(str(csv), model_path=str(model), index_path=str(index))
+
+    with sqlite3.connect(index) as conn:
+        conn.execute("UPDATE scores SET pred_proba_yes = NULL, pred_label = 'No' WHERE customer_id = 'C003'")
+
+    again = rescore(str(csv), model_path=str(model), index_path=str(index))
+    assert again["stale_rows"] == 1 and again["scored"] == 1
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from src.api import shadow
+from src.api.monitoring import ShadowStats
+from src.api.shadow import TrafficSplitter
+
+
+class _Engine:
+    def __init__(self, gate):
+        self.gate = gate
+
+    def predict_row(self, row):
+        self.gate.wait(5)
+        return "No", 0.2
+
+
+class _Model:
+    def __init__(self, version, gate):
+        self.version = version
+        self.engine = _Engine(gate)
+
+    def build_row(self, features):
+        return features
+
+
+class _Registry:
+    def __init__(self, models):
+        self.models = models
+
+    def get(self, version):
+        return self.models.get(version)
+
+
+def _free_slots(splitter):
+    n = 0
+    while splitter._slots.acquire(blocking=False):
+        n += 1
+    for _ in range(n):
+        splitter._slots.release()
+    return n
+
+
+def test_close_releases_slots_of_cancelled_shadow_jobs(tmp_path, monkeypatch):
+    stats = ShadowStats(tmp_path)
+    monkeypatch.setattr(shadow, "get_shadow_stats", lambda: stats)
+
+    gate = threading.Event()
+    splitter = TrafficSplitter(_Registry({"2": _Model("2", gate)}), shadow_versions=["2"], workers=1, max_pending=4)
+
+    # 1 iş çalışıyor, 3'ü kuyrukta; 5. iş shed edilir
+    assert sum(splitter.submit({}, "1", "No", 0.3) for _ in range(5)) == 4
+    assert stats.pairs["1->2"].shed == 1
+
+    splitter.close()
+    gate.set()
+    deadline = time.time() + 5
+    while _free_slots(splitter) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert _free_slots(splitter) == 4
+
+    # Yeniden açılan pool tüm kapasiteyle çalışır
+    assert sum(splitter.submit({}, "1", "No", 0.3) for _ in range(4)) == 4
+    splitter.close()